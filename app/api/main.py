@@ -0,0 +1,220 @@
+# app/api/main.py
+"""
+API de consultas (FastAPI) sobre la misma capa de consultas del dashboard
+(app/utils/queries.py), para consumir los números sin levantar Streamlit.
+
+- Un único dataset en memoria por proceso (`Consultas`, cargado al primer pedido).
+- ETag por (versión de los datos, ruta, parámetros): un cliente con
+  If-None-Match recibe 304 sin que se calcule nada.
+- Caché LRU de respuestas ya serializadas (DELITOS_API_CACHE entradas).
+- Las respuestas con muchas filas (p. ej. la grilla a zoom alto) se
+  serializan y envían por bloques (StreamingResponse) y se guardan en la
+  caché al terminar.
+
+Endpoints: /salud, /valores/{columna}, /conteos/{dimension}, /serie,
+/barrios/top, /grilla. La grilla se acota: con zoom mayor a
+ZOOM_MAX_SIN_BBOX hay que pasar la caja visible (lat_min, lat_max, lon_min,
+lon_max; si no, 400) y si la respuesta supera MAX_CELDAS celdas se
+responde 413. Filtros repetibles en todos: año, barrio, zona,
+distrito, prevenible (p. ej. ?año=2022&año=2023&zona=ZONA%20CENTRO).
+
+Requiere: pip install fastapi uvicorn
+Ejecutar: uvicorn app.api.main:app --port 8000
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.utils.coords import BBOX_CORDOBA
+from app.utils.cube import DIMENSIONES
+from app.utils.grid import ZOOM_MAX_GRILLA, ZOOM_MIN, tamaño_celda
+from app.utils.queries import COLUMNAS_FILTRO, MEDIDA_CONTEO, Consultas, a_registros
+from app.utils.rates import MEDIDAS
+from app.utils.render_cache import clave_render
+
+MAX_RESPUESTAS = int(os.environ.get("DELITOS_API_CACHE", "512"))
+FILAS_STREAMING = 5_000  # desde cuántas filas se responde por bloques
+FILAS_POR_BLOQUE = 2_000
+BYTES_STREAMING = 256 * 1024  # cuerpos ya guardados más grandes que esto también van por bloques
+BYTES_POR_BLOQUE = 64 * 1024
+ZOOM_MAX_SIN_BBOX = 14  # toda la ciudad a este zoom son ~35.000 celdas posibles
+MAX_CELDAS = int(os.environ.get("DELITOS_API_MAX_CELDAS", "20000"))
+
+
+class CacheRespuestas:
+    """LRU de cuerpos JSON ya serializados, por ETag; seguro entre hilos."""
+
+    def __init__(self, max_entradas=MAX_RESPUESTAS):
+        self.max_entradas = max_entradas
+        self.entradas = OrderedDict()
+        self.lock = threading.Lock()
+
+    def leer(self, etag):
+        with self.lock:
+            cuerpo = self.entradas.get(etag)
+            if cuerpo is not None:
+                self.entradas.move_to_end(etag)
+            return cuerpo
+
+    def guardar(self, etag, cuerpo):
+        with self.lock:
+            self.entradas[etag] = cuerpo
+            self.entradas.move_to_end(etag)
+            while len(self.entradas) > self.max_entradas:
+                self.entradas.popitem(last=False)
+
+
+cache = CacheRespuestas()
+app = FastAPI(title="Delitos Córdoba", description="Conteos, series y grillas de hechos delictivos.")
+
+
+@lru_cache(maxsize=None)
+def consultas():
+    return Consultas.cargar()
+
+
+def filtros(
+    año: Optional[List[int]] = Query(None),
+    barrio: Optional[List[str]] = Query(None),
+    zona: Optional[List[str]] = Query(None),
+    distrito: Optional[List[str]] = Query(None),
+    prevenible: Optional[List[str]] = Query(None),
+):
+    valores = {"año": año, "barrio": barrio, "zona": zona, "distrito": distrito, "prevenible": prevenible}
+    return {c: v for c, v in valores.items() if v}
+
+
+def _json(registros):
+    return json.dumps(registros, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _por_bloques(df, etag):
+    """Serializa `df` de a FILAS_POR_BLOQUE filas y guarda el cuerpo completo al terminar."""
+    partes = [b"["]
+    yield partes[0]
+    for inicio in range(0, len(df), FILAS_POR_BLOQUE):
+        bloque = _json(a_registros(df.iloc[inicio:inicio + FILAS_POR_BLOQUE]))[1:-1]
+        if inicio:
+            bloque = b"," + bloque
+        partes.append(bloque)
+        yield bloque
+    partes.append(b"]")
+    yield partes[-1]
+    cache.guardar(etag, b"".join(partes))
+
+
+def _enviar(cuerpo, cabeceras):
+    if len(cuerpo) > BYTES_STREAMING:
+        pasos = range(0, len(cuerpo), BYTES_POR_BLOQUE)
+        return StreamingResponse((cuerpo[i:i + BYTES_POR_BLOQUE] for i in pasos),
+                                 media_type="application/json", headers=cabeceras)
+    return Response(cuerpo, media_type="application/json", headers=cabeceras)
+
+
+def responder(request: Request, calcular):
+    """
+    Respuesta con ETag y caché: 304 si el cliente ya tiene la versión, el
+    cuerpo guardado si está en la caché, o `calcular()` (un DataFrame o un
+    objeto JSON) en otro caso.
+    """
+    parametros = sorted(request.query_params.multi_items())
+    etag = f'"{clave_render(consultas().version, request.url.path, parametros)[:32]}"'
+    cabeceras = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cabeceras)
+
+    cuerpo = cache.leer(etag)
+    if cuerpo is not None:
+        return _enviar(cuerpo, cabeceras)
+
+    resultado = calcular()
+    if hasattr(resultado, "iloc"):
+        if len(resultado) > FILAS_STREAMING:
+            return StreamingResponse(_por_bloques(resultado, etag), media_type="application/json",
+                                     headers=cabeceras)
+        resultado = a_registros(resultado)
+    cuerpo = _json(resultado)
+    cache.guardar(etag, cuerpo)
+    return _enviar(cuerpo, cabeceras)
+
+
+@app.get("/salud")
+def salud():
+    datos = consultas()
+    return {"filas": len(datos.filas), "cubos": sorted(datos.cubos), "version": datos.version}
+
+
+@app.get("/valores/{columna}")
+def valores(columna: str, request: Request):
+    if columna not in COLUMNAS_FILTRO:
+        raise HTTPException(404, f"Columna no filtrable: {columna}. Opciones: {COLUMNAS_FILTRO}")
+    return responder(request, lambda: consultas().valores(columna))
+
+
+@app.get("/conteos/{dimension}")
+def conteos(dimension: str, request: Request, medida: str = MEDIDA_CONTEO, f: dict = Depends(filtros)):
+    if dimension not in DIMENSIONES:
+        raise HTTPException(404, f"Dimensión desconocida: {dimension}. Opciones: {DIMENSIONES}")
+    if medida not in MEDIDAS:
+        raise HTTPException(422, f"Medida desconocida: {medida}. Opciones: {list(MEDIDAS)}")
+    return responder(request, lambda: consultas().conteos(dimension, f, medida))
+
+
+@app.get("/serie")
+def serie(request: Request, frecuencia: str = Query("mes", pattern="^(mes|dia)$"),
+          grupo: Optional[str] = None, f: dict = Depends(filtros)):
+    if grupo is not None and (frecuencia != "dia" or grupo not in COLUMNAS_FILTRO):
+        raise HTTPException(422, f"`grupo` sólo con frecuencia=dia y una de {COLUMNAS_FILTRO}")
+    return responder(request, lambda: consultas().serie(frecuencia, f, grupo))
+
+
+@app.get("/barrios/top")
+def barrios_top(request: Request, n: int = Query(10, ge=1, le=500), f: dict = Depends(filtros)):
+    return responder(request, lambda: consultas().top_barrios(n, f))
+
+
+def _caja(zoom, lat_min, lat_max, lon_min, lon_max):
+    """
+    Caja pedida recortada a BBOX_CORDOBA (None si no se pidió ninguna). El
+    borde inferior se alinea a la grilla de toda la ciudad: las celdas no se
+    corren al desplazar el mapa.
+    """
+    pedida = (lat_min, lat_max, lon_min, lon_max)
+    if all(v is None for v in pedida):
+        return None
+    if any(v is None for v in pedida) or lat_min >= lat_max or lon_min >= lon_max:
+        raise HTTPException(400, "La caja necesita lat_min < lat_max y lon_min < lon_max (los cuatro bordes)")
+    caja = (max(lat_min, BBOX_CORDOBA[0]), min(lat_max, BBOX_CORDOBA[1]),
+            max(lon_min, BBOX_CORDOBA[2]), min(lon_max, BBOX_CORDOBA[3]))
+    if caja[0] >= caja[1] or caja[2] >= caja[3]:
+        raise HTTPException(400, f"La caja no se superpone con Córdoba {BBOX_CORDOBA}")
+    dlon, dlat = tamaño_celda(zoom)
+    lat0 = BBOX_CORDOBA[0] + np.floor((caja[0] - BBOX_CORDOBA[0]) / dlat) * dlat
+    lon0 = BBOX_CORDOBA[2] + np.floor((caja[2] - BBOX_CORDOBA[2]) / dlon) * dlon
+    return float(lat0), caja[1], float(lon0), caja[3]
+
+
+@app.get("/grilla")
+def grilla(request: Request, zoom: int = Query(12, ge=ZOOM_MIN, le=ZOOM_MAX_GRILLA),
+           desglose: bool = False, lat_min: Optional[float] = None, lat_max: Optional[float] = None,
+           lon_min: Optional[float] = None, lon_max: Optional[float] = None, f: dict = Depends(filtros)):
+    caja = _caja(zoom, lat_min, lat_max, lon_min, lon_max)
+    if caja is None and zoom > ZOOM_MAX_SIN_BBOX:
+        raise HTTPException(400, f"Con zoom mayor a {ZOOM_MAX_SIN_BBOX} hay que pasar lat_min, lat_max, lon_min y lon_max")
+
+    def calcular():
+        celdas = consultas().grilla(zoom, f, desglose, caja or BBOX_CORDOBA)
+        if len(celdas) > MAX_CELDAS:
+            raise HTTPException(413, f"{len(celdas):,} celdas (máximo {MAX_CELDAS:,}): "
+                                     "bajar el zoom o achicar la caja")
+        return celdas
+
+    return responder(request, calcular)
@@ -1,8 +1,23 @@
 import streamlit as st
 from app.utils.charts import plot_barrios, plot_evolucion
+from app.utils.loader import version_datos
+from app.utils.perf import medido
+from app.utils.render_cache import figura_cacheada
 
-def plot_barrios_chart(filtro):
-    st.plotly_chart(plot_barrios(filtro), use_container_width=True)
 
-def plot_evolucion_chart(filtro):
-    st.plotly_chart(plot_evolucion(filtro), use_container_width=True)
+@medido("charts.mostrar_figura", "render")
+def mostrar_figura(construir, clave=None):
+    """
+    Muestra una figura de Plotly. Con `clave` (página, filtros, ...) la figura
+    sale de la caché en disco y sólo se construye si no estaba.
+    """
+    if clave is None:
+        st.plotly_chart(construir(), use_container_width=True)
+    else:
+        st.plotly_chart(figura_cacheada((version_datos(), *clave), construir), use_container_width=True)
+
+def plot_barrios_chart(filtro, clave=None):
+    mostrar_figura(lambda: plot_barrios(filtro), ("barrios", clave) if clave is not None else None)
+
+def plot_evolucion_chart(filtro, clave=None):
+    mostrar_figura(lambda: plot_evolucion(filtro), ("evolucion", clave) if clave is not None else None)
@@ -1,7 +1,10 @@
 import streamlit as st
-from app.utils.loader import load_data
+from app.utils.filters import apply_filters
+from app.utils.loader import load_cubo
+from app.utils.perf import rerun
 from app.dashboard import sidebar, metrics, charts, map
 
+@rerun("Inicio")
 def run():
     st.set_page_config(
         page_title="Dashboard Delitos Córdoba",
@@ -11,21 +14,24 @@ def run():
 
     st.title("🚔 Dashboard de Delitos en Córdoba (2019 - 2023)")
 
-    # --- Carga de datos ---
-    df = load_data()
+    # --- Sidebar / Filtros + carga de datos (sólo los años elegidos) ---
+    filtro, años, barrios = sidebar.render()
 
-    # --- Sidebar / Filtros ---
-    filtro, años, barrios = sidebar.render(df)
+    # Los conteos salen del rollup más chico que alcanza (con barrio sólo si
+    # se filtra por barrio); el mapa necesita las filas crudas
+    def conteos(*dims):
+        cubo = load_cubo([*dims, *(["barrio"] if barrios else [])], años=tuple(años))
+        return apply_filters(cubo, {"barrio": barrios or None}) if cubo is not None else filtro
 
     # --- KPIs / Métricas ---
-    metrics.render(filtro, años, barrios)
+    metrics.render(conteos("año"), años, barrios)
 
     # --- Gráficos ---
     st.subheader("📊 Distribución por barrios")
-    charts.plot_barrios_chart(filtro)
+    charts.plot_barrios_chart(conteos("barrio"), clave=(tuple(años), tuple(barrios)))
 
     st.subheader("📈 Evolución temporal")
-    charts.plot_evolucion_chart(filtro)
+    charts.plot_evolucion_chart(conteos("año", "mes"), clave=(tuple(años), tuple(barrios)))
 
     # --- Mapa ---
     st.subheader("🗺️ Mapa de delitos")
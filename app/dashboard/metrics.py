@@ -1,7 +1,8 @@
 import streamlit as st
+from app.utils.cube import total
 
 def render(filtro, años, barrios):
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total de hechos", f"{len(filtro):,}")
+    col1.metric("Total de hechos", f"{total(filtro):,}")
     col2.metric("Años analizados", len(años))
     col3.metric("Barrios seleccionados", len(barrios) if barrios else "Todos")
@@ -1,13 +1,60 @@
 import streamlit as st
+from app.utils.filters import apply_filters
+from app.utils.loader import (
+    MODO_CARGA, años_disponibles, load_agregado, load_backend, load_compartido, load_cubo, load_data,
+    load_filas, load_indice,
+)
+from app.utils.cube import DIMENSIONES, puede_responder
 
-def render(df):
-    st.sidebar.header("Filtros")
-    años = st.sidebar.multiselect("Año", sorted(df["año"].unique()), default=df["año"].unique())
+def render_años(header="Filtros"):
+    """Selector de años. Se resuelve antes de cargar datos para leer sólo esos años."""
+    st.sidebar.header(header)
+    disponibles = años_disponibles()
+    return st.sidebar.multiselect("Año", disponibles, default=disponibles)
+
+def render(agregado=False, dimensiones=None):
+    """
+    Filtros de año y barrio. Con agregado=True, si hay rollups de conteos con
+    `dimensiones` y barrio, `filtro` es el rollup más chico que alcanza,
+    filtrado, en lugar de las filas crudas (sirve para los gráficos de
+    conteos por esas dimensiones; ver app/utils/cube.py).
+
+    Con un backend SQL (DELITOS_BACKEND) los filtros y la agregación por
+    `dimensiones` (todas las del cubo si es None) se resuelven en la base y
+    sólo vuelve el resultado.
+    """
+    años = render_años()
+
+    if load_backend() is not None:
+        barrios = st.sidebar.multiselect("Barrio", load_backend().valores("barrio", {"año": años}))
+        if agregado:
+            filtro = load_agregado(tuple(dimensiones or DIMENSIONES), tuple(años), tuple(barrios))
+        else:
+            filtro = load_filas(años, barrios)
+        return filtro, años, barrios
+
+    if agregado and puede_responder([*(dimensiones or []), "barrio"]):
+        opciones = load_cubo(["barrio"], años=tuple(años))  # rollup año x barrio
+        if opciones is not None:
+            barrios = st.sidebar.multiselect("Barrio", opciones["barrio"].unique())
+            # sin barrios elegidos alcanza un rollup sin la dimensión barrio (más chico)
+            cubo = load_cubo([*(dimensiones or []), *(["barrio"] if barrios else [])], años=tuple(años))
+            return apply_filters(cubo, {"barrio": barrios or None}), años, barrios
+
+    if MODO_CARGA == "compartido":
+        # Dataset mapeado en memoria: los filtros son índices de fila y sólo
+        # se materializa la selección final
+        dataset = load_compartido()
+        barrios = st.sidebar.multiselect("Barrio", dataset.valores("barrio", dataset.filas(años=años)))
+        filtro = dataset.a_pandas(dataset.filas(años=años, barrios=barrios))
+        return filtro, años, barrios
+
+    # Sólo se leen los años elegidos; el índice es uno por conjunto de años
+    df = load_data(años=tuple(sorted(años)))
+    indice = load_indice(años=tuple(sorted(años)))
     barrios = st.sidebar.multiselect("Barrio", df["barrio"].unique())
 
-    # Filtrado
-    filtro = df[df["año"].isin(años)]
-    if barrios:
-        filtro = filtro[filtro["barrio"].isin(barrios)]
+    # Filtrado con los bitmaps del índice sobre las filas crudas
+    filtro = apply_filters(df, {"barrio": barrios or None}, indice=indice)
 
     return filtro, años, barrios
@@ -0,0 +1,244 @@
+# app/utils/backends.py
+"""
+Backends SQL para consultar el dataset limpio sin cargarlo en pandas.
+
+Las páginas piden filtro + agregación (año, barrio, zona, distrito,
+prevenible, caja de coordenadas) y sólo vuelve a Python el resultado
+agregado, con el mismo formato que el cubo de conteos (dimensiones +
+columna `hechos`, ver app/utils/cube.py): los gráficos no cambian.
+
+- "duckdb": consulta directamente el parquet limpio (o el dataset
+  particionado, con poda por directorio `año=`); DuckDB usa las
+  estadísticas min/max de cada row group como índice. Requiere `pip install duckdb`.
+- "sqlite": base en data/delitos.sqlite con índices en las columnas de
+  filtro y en (latitud, longitud). Se construye por lotes, sin cargar todo:
+  python -m app.utils.backends --sqlite
+- "pandas" (por defecto): sin backend, todo en memoria como hasta ahora.
+
+Se elige con la variable de entorno DELITOS_BACKEND.
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from app.utils.cube import COLUMNA_CONTEO, DIMENSIONES
+from app.utils.schema import aplicar_esquema
+
+BACKEND = os.environ.get("DELITOS_BACKEND", "pandas")
+SQLITE_PATH = Path(os.environ.get("DELITOS_SQLITE", "data/delitos.sqlite"))
+TABLA = "hechos"
+
+COLUMNAS_SQL = DIMENSIONES + ["distrito_geo", "latitud", "longitud", "fecha_hora"]
+COLUMNAS_INDICE_SQL = ["año", "barrio", "zona", "distrito", "prevenible"]
+FILAS_POR_LOTE = 200_000
+
+
+def _id(columna):
+    return '"' + columna.replace('"', '""') + '"'
+
+
+def condiciones(filtros=None, bbox=None):
+    """
+    Cláusula WHERE (con marcadores ?) y sus parámetros. `filtros` es
+    {columna: valores} (None = sin filtro, lista vacía = ninguna fila);
+    `bbox` es (lat_min, lat_max, lon_min, lon_max).
+    """
+    partes, parametros = [], []
+    for columna, valores in (filtros or {}).items():
+        if valores is None:
+            continue
+        valores = [v.item() if hasattr(v, "item") else v for v in valores]
+        if not valores:
+            partes.append("1 = 0")
+            continue
+        partes.append(f"{_id(columna)} IN ({', '.join('?' * len(valores))})")
+        parametros.extend(valores)
+    if bbox is not None:
+        partes.append("latitud BETWEEN ? AND ? AND longitud BETWEEN ? AND ?")
+        parametros.extend(float(v) for v in bbox)
+    return (" WHERE " + " AND ".join(partes) if partes else ""), parametros
+
+
+class BackendSQL:
+    """Consultas comunes; cada backend sólo implementa `consultar(sql, parámetros)`."""
+
+    nombre = None
+
+    def consultar(self, sql, parametros=()):
+        raise NotImplementedError
+
+    def cubo(self, dims, filtros=None, bbox=None):
+        """Conteos por `dims` con el formato del cubo (los nulos de las dimensiones se descartan)."""
+        dims = list(dims)
+        where, parametros = condiciones(filtros, bbox)
+        if dims:
+            no_nulos = " AND ".join(f"{_id(d)} IS NOT NULL" for d in dims)
+            where = f"{where} AND {no_nulos}" if where else f" WHERE {no_nulos}"
+            columnas = ", ".join(_id(d) for d in dims)
+            sql = f"SELECT {columnas}, COUNT(*) AS {COLUMNA_CONTEO} FROM {TABLA}{where} GROUP BY {columnas}"
+        else:
+            sql = f"SELECT COUNT(*) AS {COLUMNA_CONTEO} FROM {TABLA}{where}"
+        resultado = self.consultar(sql, parametros)
+        resultado[COLUMNA_CONTEO] = resultado[COLUMNA_CONTEO].astype("int64")
+        return aplicar_esquema(resultado)
+
+    def contar(self, dims, filtros=None, bbox=None):
+        """Como `cube.contar`: Series de hechos indexada por `dims`."""
+        dims = [dims] if isinstance(dims, str) else list(dims)
+        return self.cubo(dims, filtros, bbox).set_index(dims)[COLUMNA_CONTEO].sort_index()
+
+    def total(self, filtros=None, bbox=None):
+        return int(self.cubo([], filtros, bbox)[COLUMNA_CONTEO].iloc[0])
+
+    def valores(self, columna, filtros=None):
+        """Valores distintos (no nulos) de una columna, ordenados."""
+        where, parametros = condiciones(filtros)
+        no_nulo = f"{_id(columna)} IS NOT NULL"
+        where = f"{where} AND {no_nulo}" if where else f" WHERE {no_nulo}"
+        sql = f"SELECT DISTINCT {_id(columna)} AS valor FROM {TABLA}{where} ORDER BY 1"
+        return self.consultar(sql, parametros)["valor"].tolist()
+
+    def años(self):
+        return [int(a) for a in self.valores("año")]
+
+    def filas(self, columnas=None, filtros=None, bbox=None, limite=None):
+        """Filas crudas (sólo las `columnas` pedidas; todas si es None), con tope opcional."""
+        where, parametros = condiciones(filtros, bbox)
+        seleccion = ", ".join(_id(c) for c in columnas) if columnas else "*"
+        sql = f"SELECT {seleccion} FROM {TABLA}{where}"
+        if limite is not None:
+            sql += f" LIMIT {int(limite)}"
+        df = self.consultar(sql, parametros)
+        if "fecha_hora" in df.columns:
+            df["fecha_hora"] = pd.to_datetime(df["fecha_hora"], errors="coerce")
+        return aplicar_esquema(df)
+
+
+class BackendSQLite(BackendSQL):
+    """Base SQLite de sólo lectura; una conexión por hilo (Streamlit atiende cada sesión en un hilo)."""
+
+    nombre = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"{self.path} no existe: python -m app.utils.backends --sqlite")
+        self._local = threading.local()
+
+    def _conexion(self):
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = self._local.conexion = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        return conexion
+
+    def consultar(self, sql, parametros=()):
+        return pd.read_sql_query(sql, self._conexion(), params=list(parametros))
+
+
+class BackendDuckDB(BackendSQL):
+    """Vista `hechos` de DuckDB sobre el parquet limpio o el dataset particionado."""
+
+    nombre = "duckdb"
+
+    def __init__(self, origen=None):
+        import duckdb
+
+        from app.utils.loader import _origen
+
+        origen = Path(origen) if origen else _origen()
+        if origen.is_dir():
+            # sólo los directorios de partición (el cubo vive en _cubo/)
+            lectura = f"read_parquet('{(origen / 'año=*' / '**' / '*.parquet').as_posix()}', hive_partitioning = true)"
+        elif origen.suffix == ".parquet":
+            lectura = f"read_parquet('{origen.as_posix()}')"
+        else:
+            raise ValueError(f"DuckDB necesita el parquet limpio o el dataset particionado, no {origen}")
+        self.origen = origen
+        self._conexion = duckdb.connect()
+        self._conexion.execute(f"CREATE VIEW {TABLA} AS SELECT * FROM {lectura}")
+
+    def consultar(self, sql, parametros=()):
+        # un cursor por consulta: la conexión se comparte entre hilos
+        return self._conexion.cursor().execute(sql, list(parametros)).df()
+
+
+def abrir_backend(tipo=BACKEND):
+    """Backend configurado, o None para seguir con pandas en memoria."""
+    if tipo == "sqlite":
+        return BackendSQLite()
+    if tipo == "duckdb":
+        return BackendDuckDB()
+    if tipo != "pandas":
+        raise ValueError(f"DELITOS_BACKEND desconocido: {tipo} (pandas, sqlite o duckdb)")
+    return None
+
+
+def construir_sqlite(origen=None, destino=SQLITE_PATH, filas_por_lote=FILAS_POR_LOTE):
+    """
+    Copia las columnas consultables del dataset limpio a SQLite, de a lotes
+    de `filas_por_lote` filas (la memoria no depende del tamaño del dataset),
+    y crea los índices de filtro.
+    """
+    import pyarrow.dataset as ds
+
+    from app.utils.ingest import abrir_dataset
+    from app.utils.loader import _origen
+
+    origen = Path(origen) if origen else _origen()
+    if origen.is_dir():
+        dataset = abrir_dataset(origen)
+    elif origen.suffix == ".parquet":
+        dataset = ds.dataset(origen)
+    else:
+        raise ValueError(f"Se necesita el parquet limpio o el dataset particionado, no {origen}")
+    columnas = [c for c in COLUMNAS_SQL if c in dataset.schema.names]
+
+    destino = Path(destino)
+    tmp = destino.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    conexion = sqlite3.connect(tmp)
+    total = 0
+    try:
+        for lote in dataset.to_batches(columns=columnas, batch_size=filas_por_lote):
+            df = lote.to_pandas()
+            for c in df.columns:
+                if isinstance(df[c].dtype, pd.CategoricalDtype):
+                    df[c] = df[c].astype(object)
+            if "fecha_hora" in df.columns:
+                df["fecha_hora"] = pd.to_datetime(df["fecha_hora"], errors="coerce").dt.strftime("%Y-%m-%d %H:%M:%S")
+            df.to_sql(TABLA, conexion, if_exists="append", index=False)
+            total += len(df)
+            print(f"   {total:,} filas")
+        for c in COLUMNAS_INDICE_SQL:
+            if c in columnas:
+                conexion.execute(f"CREATE INDEX idx_{TABLA}_{c} ON {TABLA} ({_id(c)})")
+        if {"latitud", "longitud"} <= set(columnas):
+            conexion.execute(f"CREATE INDEX idx_{TABLA}_coordenadas ON {TABLA} (latitud, longitud)")
+        conexion.execute("ANALYZE")
+        conexion.commit()
+    finally:
+        conexion.close()
+    os.replace(tmp, destino)
+    print(f"✅ SQLite guardado en: {destino} ({total:,} filas, {destino.stat().st_size / 1e6:.1f} MB)")
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backends SQL del dataset limpio.")
+    parser.add_argument("--sqlite", action="store_true", help="construir la base SQLite")
+    parser.add_argument("--origen", default=None, help="parquet limpio o dataset particionado")
+    parser.add_argument("--destino", default=str(SQLITE_PATH))
+    args = parser.parse_args()
+    if args.sqlite:
+        construir_sqlite(args.origen, args.destino)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,27 @@
-import plotly.express as px
+from app.utils.perf import medido
+from app.utils.queries import serie_mensual, top_barrios
 
+# Las funciones aceptan el cubo de conteos o las filas crudas (ver app/utils/cube.py).
+# plotly se importa al construir la figura: si sale de la caché en disco no se carga.
+
+@medido("charts.plot_barrios", "figura")
 def plot_barrios(df):
-    top_barrios = df["barrio"].value_counts().head(10)
+    import plotly.express as px
+    top = top_barrios(df, 10)
     fig = px.bar(
-        top_barrios,
-        x=top_barrios.index,
-        y=top_barrios.values,
-        labels={"x": "Barrio", "y": "Cantidad"},
+        top,
+        x="barrio",
+        y="hechos",
+        labels={"barrio": "Barrio", "hechos": "Cantidad"},
         title="Top 10 Barrios con más hechos"
     )
     fig.update_layout(xaxis_tickangle=-45)
     return fig
 
+@medido("charts.plot_evolucion", "figura")
 def plot_evolucion(df):
-    evolucion = df.groupby(["año", "mes"]).size().reset_index(name="hechos")
+    import plotly.express as px
+    evolucion = serie_mensual(df)
     fig = px.line(
         evolucion,
         x="mes",
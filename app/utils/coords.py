@@ -0,0 +1,74 @@
+# app/utils/coords.py
+"""
+Coordenadas de los hechos.
+
+Algunos registros traen sólo X/Y en POSGAR 98 / Argentina faja 4
+(EPSG:22174, el mismo sistema de los GeoJSON de distritos) y latitud/longitud
+vacías. `completar_latlon` los reproyecta a WGS84 en una sola llamada
+vectorizada por DataFrame (o por chunk), reutilizando un Transformer por par
+de CRS, y `marcar_fuera_de_cordoba` marca las coordenadas que caen fuera de
+la caja de la ciudad (errores de carga, ejes invertidos, ceros).
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+CRS_POSGAR = "EPSG:22174"
+CRS_WGS84 = "EPSG:4326"
+
+# Caja que contiene la ciudad de Córdoba y alrededores (lat_min, lat_max, lon_min, lon_max)
+BBOX_CORDOBA = (-31.65, -31.20, -64.45, -63.95)
+
+COLUMNA_FUERA = "fuera_de_cordoba"
+
+
+@lru_cache(maxsize=None)
+def transformador(origen=CRS_POSGAR, destino=CRS_WGS84):
+    """Transformer de pyproj (orden x/y = lon/lat), construido una vez por par de CRS."""
+    from pyproj import Transformer
+
+    return Transformer.from_crs(origen, destino, always_xy=True)
+
+
+def a_wgs84(x, y, origen=CRS_POSGAR):
+    """Reproyecta arrays X/Y a (lat, lon) en WGS84."""
+    lon, lat = transformador(origen, CRS_WGS84).transform(
+        np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+    )
+    return lat, lon
+
+
+def completar_latlon(df, origen=CRS_POSGAR):
+    """
+    Completa latitud/longitud desde X/Y en las filas que no las tienen.
+    Devuelve la cantidad de filas completadas.
+    """
+    if not {"latitud", "longitud", "X", "Y"} <= set(df.columns):
+        return 0
+    faltan = (df["latitud"].isna() | df["longitud"].isna()) & df["X"].notna() & df["Y"].notna()
+    if not faltan.any():
+        return 0
+    lat, lon = a_wgs84(df.loc[faltan, "X"], df.loc[faltan, "Y"], origen)
+    df.loc[faltan, "latitud"] = lat
+    df.loc[faltan, "longitud"] = lon
+    return int(faltan.sum())
+
+
+def dentro_de_bbox(lat, lon, bbox=BBOX_CORDOBA):
+    lat_min, lat_max, lon_min, lon_max = bbox
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    return (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+
+
+def marcar_fuera_de_cordoba(df, bbox=BBOX_CORDOBA):
+    """
+    Agrega la columna booleana `fuera_de_cordoba`: True si el hecho tiene
+    coordenadas pero caen fuera de la caja de la ciudad. Devuelve cuántas son.
+    """
+    if not {"latitud", "longitud"} <= set(df.columns):
+        return 0
+    con_coords = df["latitud"].notna() & df["longitud"].notna()
+    df[COLUMNA_FUERA] = con_coords.to_numpy() & ~dentro_de_bbox(df["latitud"], df["longitud"], bbox)
+    return int(df[COLUMNA_FUERA].sum())
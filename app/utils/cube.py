@@ -0,0 +1,121 @@
+# app/utils/cube.py
+"""
+Cubos de conteos precalculados para los gráficos del dashboard.
+
+En lugar de un único cubo con todas las dimensiones (casi tan grande como el
+dataset: año x mes x hora x barrio x ... tiene del orden de una celda por
+hecho) se guardan varios rollups chicos, cada uno con sólo las dimensiones
+que usa alguna vista, y la cantidad en la columna `hechos`. Su tamaño queda
+acotado por la cardinalidad de esas dimensiones, no por la cantidad de hechos:
+
+- año x prevenible / zona / distrito / distrito_geo: Comparación (cantidades
+  y tasas) y el mapa estático por distrito;
+- año x mes: Evolución sin filtro de barrio;
+- año x día de semana x hora: hora del día x día de semana;
+- año x barrio y año x mes x barrio: Inicio, Barrios y Evolución, que
+  filtran por barrio.
+
+Un conteo agrupado/filtrado por ciertas columnas se responde con el rollup
+más chico que las tiene a todas (`rollup_para`); si ninguno alcanza, con las
+filas crudas.
+
+Las funciones de este módulo aceptan indistintamente un cubo o las filas
+crudas: si la fuente tiene columna `hechos` se suma, si no se cuentan filas.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from app.utils.perf import medido
+
+DIMENSIONES = ["año", "mes", "weekday", "hora", "barrio", "comisaria", "distrito", "zona", "prevenible"]
+COLUMNA_CONTEO = "hechos"
+
+# de menor a mayor tamaño esperado: `rollup_para` elige el primero que alcanza
+ROLLUPS = {
+    "año_prevenible": ["año", "prevenible"],
+    "año_zona": ["año", "zona"],
+    "año_distrito": ["año", "distrito"],
+    "año_distrito_geo": ["año", "distrito_geo"],
+    "año_mes": ["año", "mes"],
+    "hora_dia": ["año", "weekday", "hora"],
+    "año_barrio": ["año", "barrio"],
+    "año_mes_barrio": ["año", "mes", "barrio"],
+}
+
+OUT_CUBOS = Path("data/delitos_cordoba_2019_2023_cubos")  # <rollup>.parquet
+CUBO_DIR = "_cubo"  # dentro del dataset particionado, _cubo/<rollup>/<hash>.parquet (pyarrow lo ignora)
+
+
+def es_cubo(fuente):
+    return COLUMNA_CONTEO in fuente.columns
+
+
+def construir_cubo(df, dims):
+    """Agrupa las filas limpias por las `dims` disponibles (las de un rollup)."""
+    dims = [c for c in dims if c in df.columns]
+    return (
+        df.groupby(dims, dropna=False, observed=True, sort=False)
+        .size()
+        .rename(COLUMNA_CONTEO)
+        .reset_index()
+    )
+
+
+def construir_rollups(df):
+    """{nombre: cubo} con todos los ROLLUPS de las filas limpias."""
+    return {nombre: construir_cubo(df, dims) for nombre, dims in ROLLUPS.items()}
+
+
+def combinar_cubos(cubos):
+    """Une cubos parciales de un mismo rollup (chunks o archivos ingestados) sumando los conteos."""
+    cubos = [c for c in cubos if c is not None]
+    if not any(len(c) for c in cubos):
+        # sin conteos, pero con las columnas del rollup
+        return cubos[0].iloc[:0] if cubos else pd.DataFrame(columns=[COLUMNA_CONTEO])
+    cubo = pd.concat([c for c in cubos if len(c)], ignore_index=True)
+    dims = [c for c in cubo.columns if c != COLUMNA_CONTEO]
+    return (
+        cubo.groupby(dims, dropna=False, observed=True, sort=False)[COLUMNA_CONTEO]
+        .sum()
+        .reset_index()
+    )
+
+
+def acumular_rollups(acumulados, df):
+    """Suma los rollups de `df` a `acumulados` (streaming: la memoria queda acotada por los rollups)."""
+    parciales = construir_rollups(df)
+    return {nombre: combinar_cubos([(acumulados or {}).get(nombre), cubo]) for nombre, cubo in parciales.items()}
+
+
+def rollup_para(columnas):
+    """Nombre del rollup más chico que tiene todas las `columnas`, o None si ninguno alcanza."""
+    for nombre, dims in ROLLUPS.items():
+        if all(c in dims for c in columnas):
+            return nombre
+    return None
+
+
+def puede_responder(columnas):
+    """True si un conteo agrupado/filtrado por `columnas` se puede resolver con algún rollup."""
+    return rollup_para(columnas) is not None
+
+
+@medido("cube.contar", "agregacion")
+def contar(fuente, dims):
+    """
+    Cantidad de hechos por `dims` (Series indexada por dims), desde el cubo o desde filas.
+    Igual que `groupby(dims).size()`: los valores nulos de las dimensiones se descartan.
+    """
+    if es_cubo(fuente):
+        return fuente.groupby(dims, observed=True)[COLUMNA_CONTEO].sum()
+    return fuente.groupby(dims, observed=True).size()
+
+
+def total(fuente):
+    """Cantidad total de hechos de la fuente."""
+    if es_cubo(fuente):
+        return int(fuente[COLUMNA_CONTEO].sum())
+    return len(fuente)
+
@@ -4,35 +4,159 @@
 Extrae y construye diccionarios para normalizar columnas y
 completar datos faltantes usando relaciones jerárquicas:
 barrio -> comisaria -> distrito -> zona
+
+Cada barrio toma la asignación (comisaria, distrito, zona) más frecuente en
+los datos, no la última fila leída. Se cuenta con un solo groupby sobre las
+filas completas y en el mapping queda, por barrio:
+- `soporte`: cantidad de hechos con la asignación elegida;
+- `confianza`: soporte / total de hechos del barrio con jerarquía completa;
+- `alternativas`: las otras asignaciones vistas (las MAX_ALTERNATIVAS más
+  frecuentes), con su soporte.
+
+Con --actualizar, los conteos guardados en el mapping existente se suman a
+los de los CSV nuevos (pasar sólo datos que no se hayan contado antes). Las
+claves viejas se canonicalizan con el mismo vocabulario que los datos nuevos
+(ver `clave()` en app/utils/normalize.py), así sus votos se suman a la misma
+variante y no quedan barrios duplicados.
+Además del JSON se escribe un lookup binario (comisarias_mapping.arrow) que
+el preprocesamiento lee en lugar del JSON mientras esté al día.
+
+Ejecutar: python -m app.utils.extract_mapping ["data/raw/*.csv"] [--actualizar]
 """
 
+import argparse
+import glob
 import pandas as pd
 import json
 from pathlib import Path
 
+from app.utils.hierarchy import cargar_mapping, guardar_lookup_binario
+from app.utils.normalize import canonicalizar_columna, normalizar_columna
+from app.utils.reglas import reglas_distrito
+
 INPUT = Path("data/delitos_cordoba_2019_2023.csv")
 OUT_PREVENIBLE = Path("data/delitos_mapping.json")
 OUT_COMISARIA = Path("data/comisarias_mapping.json")
 
-def normalize_text(s):
-    if pd.isna(s):
-        return None
-    s = str(s).strip()
-    if s in ["", "s/d", "SIN DATOS", "-"]:
-        return None
-    return s.upper()
+COLUMNAS = ["prevenible", "delito", "comisaria", "distrito", "barrio", "zona"]
+HIER_COLS = ["barrio", "comisaria", "distrito", "zona"]
+NIVELES = ["comisaria", "distrito", "zona"]
+MAX_ALTERNATIVAS = 5
+
+def leer_crudos(patron, columnas=COLUMNAS):
+    """Lee y concatena (sólo las `columnas` pedidas) todos los CSV crudos que coinciden con `patron`."""
+    archivos = sorted(glob.glob(str(patron)))
+    if not archivos:
+        raise FileNotFoundError(f"No existe {patron}. Coloca el CSV en data/ y vuelve a intentar.")
+    partes = []
+    for path in archivos:
+        print(f"Leyendo {path}...")
+        partes.append(pd.read_csv(path, low_memory=False, dtype=str, usecols=lambda c: c in columnas))
+    return pd.concat(partes, ignore_index=True)
 
-def main():
-    if not INPUT.exists():
-        raise FileNotFoundError(f"No existe {INPUT}. Coloca el CSV en data/ y vuelve a intentar.")
+def contar_asignaciones(df):
+    """Hechos por (barrio, comisaria, distrito, zona), sólo filas con la jerarquía completa."""
+    completos = df[HIER_COLS].dropna()
+    return completos.groupby(HIER_COLS, sort=False).size().rename("soporte").reset_index()
 
-    print("Leyendo CSV...")
-    df = pd.read_csv(INPUT, low_memory=False, dtype=str)
+def conteos_desde_mapping(mapping):
+    """
+    Conteos guardados en un mapping existente (elegida + alternativas). Las
+    entradas sin `soporte` (mappings viejos) cuentan como un hecho.
+    """
+    filas = []
+    for barrio, entrada in mapping.items():
+        for asignacion in [entrada] + list(entrada.get("alternativas", [])):
+            if all(asignacion.get(c) for c in NIVELES):
+                filas.append((barrio, *(asignacion[c] for c in NIVELES), int(asignacion.get("soporte", 1))))
+    conteos = pd.DataFrame(filas, columns=HIER_COLS + ["soporte"])
+    conteos["distrito"] = reglas_distrito().aplicar(conteos["distrito"])
+    return conteos
+
+def elegir_mayoria(conteos):
+    """
+    Asignación más frecuente por barrio (empates: orden alfabético) y tabla
+    con soporte/confianza. Devuelve (elegidas indexadas por barrio, alternativas).
+    """
+    conteos = conteos.groupby(HIER_COLS, sort=False)["soporte"].sum().reset_index()
+    conteos["total"] = conteos.groupby("barrio")["soporte"].transform("sum")
+    conteos = conteos.sort_values(
+        ["barrio", "soporte", "comisaria", "distrito", "zona"],
+        ascending=[True, False, True, True, True],
+        ignore_index=True,
+    )
+    primera = conteos.groupby("barrio").cumcount() == 0
+    elegidas = conteos[primera].set_index("barrio")
+    elegidas["confianza"] = (elegidas["soporte"] / elegidas["total"]).round(4)
+    return elegidas.drop(columns="total"), conteos[~primera].drop(columns="total")
+
+def construir_mapping(elegidas, alternativas, max_alternativas=MAX_ALTERNATIVAS):
+    """Dict {barrio: {comisaria, distrito, zona, soporte, confianza[, alternativas]}} para el JSON."""
+    alternativas = alternativas[alternativas.groupby("barrio").cumcount() < max_alternativas]
+    por_barrio = {
+        barrio: grupo[NIVELES + ["soporte"]].to_dict(orient="records")
+        for barrio, grupo in alternativas.groupby("barrio", sort=False)
+    }
+    mapping = {}
+    for barrio, fila in zip(elegidas.index, elegidas[NIVELES + ["soporte", "confianza"]].to_dict(orient="records")):
+        fila["soporte"] = int(fila["soporte"])
+        if barrio in por_barrio:
+            fila["alternativas"] = [{**a, "soporte": int(a["soporte"])} for a in por_barrio[barrio]]
+        mapping[barrio] = fila
+    return mapping
+
+def reportar_cambios(anterior, mapping, top=10):
+    """Barrios cuya asignación cambió respecto del mapping anterior y los de menor confianza."""
+    cambios = [
+        (b, tuple(anterior[b].get(c) for c in NIVELES), tuple(e[c] for c in NIVELES))
+        for b, e in mapping.items()
+        if b in anterior and any(anterior[b].get(c) != e[c] for c in NIVELES)
+    ]
+    print(f"🔁 Barrios con asignación distinta a la anterior: {len(cambios)}")
+    for barrio, antes, ahora in cambios[:top]:
+        print(f"   {barrio}: {' / '.join(map(str, antes))} -> {' / '.join(ahora)}")
+    conflictos = sorted(
+        ((e["confianza"], b) for b, e in mapping.items() if "alternativas" in e)
+    )
+    print(f"⚖️ Barrios con asignaciones en conflicto: {len(conflictos)}")
+    for confianza, barrio in conflictos[:top]:
+        e = mapping[barrio]
+        print(f"   {barrio}: {e['comisaria']} / {e['distrito']} / {e['zona']} "
+              f"(confianza {confianza:.0%}, {len(e['alternativas'])} alternativas)")
+
+def main(patron=INPUT, actualizar=False):
+    df = leer_crudos(patron)
+    anterior = cargar_mapping(OUT_COMISARIA) or {}
+    previos = conteos_desde_mapping(anterior) if actualizar and anterior else None
 
     # Normalizar columnas clave
-    for col in ["prevenible", "delito", "comisaria", "distrito", "barrio", "zona"]:
+    for col in COLUMNAS:
+        if col in df.columns:
+            df[col] = normalizar_columna(df[col])
+
+    # Unificar variantes que sólo difieren en espacios, tildes o puntuación;
+    # con --actualizar, las claves del mapping viejo entran al mismo vocabulario
+    for col in ["barrio", "comisaria", "zona"]:
         if col in df.columns:
-            df[col] = df[col].apply(normalize_text)
+            vocabulario = set(pd.unique(df[col].dropna()))
+            if previos is not None:
+                vocabulario |= set(previos[col])
+                if col == "barrio":
+                    vocabulario |= set(anterior)
+            vocabulario = tuple(sorted(vocabulario))
+            df[col], variantes = canonicalizar_columna(df[col], vocabulario)
+            if previos is not None:
+                previos[col], viejas = canonicalizar_columna(previos[col], vocabulario)
+                variantes = {**variantes, **viejas}
+                if col == "barrio":
+                    canonicas, _ = canonicalizar_columna(pd.Series(list(anterior), dtype=object), vocabulario)
+                    anterior = dict(zip(canonicas, anterior.values()))
+            if variantes:
+                print(f"🔤 {col}: {len(variantes)} variantes unificadas")
+
+    # "DISTRITO IX" y "DISTRITO 9" votan por el mismo distrito
+    if "distrito" in df.columns:
+        df["distrito"] = reglas_distrito().aplicar(df["distrito"])
 
     # --------------------------
     # 1️⃣ Diccionario de delitos/prevenible
@@ -46,32 +170,44 @@ def main():
         print(f"✅ Diccionario prevenible generado con {len(mapping_prevenible)} entradas.")
     """
     # --------------------------
-    # 2️⃣ Diccionario jerárquico comisarias -> distritos -> zonas
+    # 2️⃣ Diccionario jerárquico comisarias -> distritos -> zonas (por mayoría)
     # --------------------------
-    hier_cols = ["barrio", "comisaria", "distrito", "zona"]
-    mapping_comisaria = {}
-
-    if all(c in df.columns for c in hier_cols):
-        # crear un DataFrame único sin duplicados
-        df_hier = df[hier_cols].dropna(subset=["barrio", "comisaria", "distrito", "zona"]).drop_duplicates()
+    if all(c in df.columns for c in HIER_COLS):
+        conteos = contar_asignaciones(df)
+        if previos is not None:
+            conteos = pd.concat([previos, conteos], ignore_index=True)
+            print(f"➕ Actualizando {len(anterior)} barrios existentes con los datos nuevos")
 
-        # construir mapping jerárquico
-        for _, row in df_hier.iterrows():
-            mapping_comisaria[row["barrio"]] = {
-                "comisaria": row["comisaria"],
-                "distrito": row["distrito"],
-                "zona": row["zona"]
-            }
+        elegidas, alternativas = elegir_mayoria(conteos)
+        mapping_comisaria = construir_mapping(elegidas, alternativas)
+        if actualizar:
+            # barrios del mapping anterior sin datos completos quedan como estaban
+            for barrio, entrada in anterior.items():
+                mapping_comisaria.setdefault(barrio, entrada)
 
         with open(OUT_COMISARIA, "w", encoding="utf-8") as f:
             json.dump(mapping_comisaria, f, ensure_ascii=False, indent=2)
         print(f"✅ Diccionario jerárquico generado con {len(mapping_comisaria)} barrios.")
 
+        # lookup binario para el preprocesamiento (escrito después del JSON: queda al día)
+        tabla = pd.DataFrame.from_dict(mapping_comisaria, orient="index")
+        tabla = tabla[[c for c in NIVELES + ["soporte", "confianza"] if c in tabla.columns]]
+        binario = guardar_lookup_binario(tabla, OUT_COMISARIA)
+        print(f"✅ Lookup binario guardado en: {binario}")
+
+        if anterior:
+            reportar_cambios(anterior, mapping_comisaria)
+
     # --------------------------
     # 3️⃣ Reporte de nulos
     # --------------------------
-    nulos = df[hier_cols].isna().sum()
+    nulos = df[HIER_COLS].isna().sum()
     print("❗ Valores nulos por columna:\n", nulos)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Construye los mappings desde uno o varios CSV crudos.")
+    parser.add_argument("patron", nargs="?", default=str(INPUT), help=f"CSV o glob de CSV crudos (por defecto {INPUT}).")
+    parser.add_argument("--actualizar", action="store_true",
+                        help="sumar los conteos del mapping existente en lugar de reconstruirlo")
+    args = parser.parse_args()
+    main(args.patron, args.actualizar)
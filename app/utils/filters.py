@@ -0,0 +1,137 @@
+# app/utils/filters.py
+"""
+Índice de filtros para los multiselect del dashboard (año, barrio, zona,
+distrito, prevenible).
+
+Se construye una vez al cargar los datos:
+- columnas con pocos valores (año, zona, distrito, prevenible): un bitmap
+  empaquetado (1 bit por fila) por valor;
+- columnas con muchos valores (barrio): listas ordenadas de ids de fila por
+  valor (formato CSR: filas ordenadas por código + offsets).
+
+Cualquier combinación de filtros se resuelve con OR de bitmaps dentro de cada
+columna, AND entre columnas e intersección con las listas de ids, sin volver
+a recorrer las columnas de texto.
+
+`apply_filters` es la API única que usan sidebar y páginas: con índice usa
+las estructuras de arriba; sin índice (p. ej. sobre el cubo de conteos)
+aplica máscaras `isin`.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.utils.perf import medido
+
+COLUMNAS_INDICE = ["año", "barrio", "zona", "distrito", "prevenible"]
+MAX_VALORES_BITMAP = 64
+
+
+class _IndiceColumna:
+    def __init__(self, codigos, valores):
+        self.n = len(codigos)
+        self.posicion = {v: i for i, v in enumerate(valores)}
+        self.hay_nulos = bool((codigos < 0).any())
+        self.es_bitmap = len(valores) <= MAX_VALORES_BITMAP
+        if self.es_bitmap:
+            self.bitmaps = [
+                np.packbits(codigos == i, bitorder="little") for i in range(len(valores))
+            ]
+        else:
+            self.filas = np.argsort(codigos, kind="stable").astype(np.int32)
+            conteos = np.bincount(codigos[codigos >= 0], minlength=len(valores))
+            # las filas nulas (código -1) quedan al principio de `filas`
+            self.offsets = np.concatenate([[0], np.cumsum(conteos)]) + int((codigos < 0).sum())
+
+    def codigos_de(self, valores):
+        return [self.posicion[v] for v in valores if v in self.posicion]
+
+    def cubre_todo(self, valores):
+        """True si los valores seleccionados incluyen todas las filas (filtro innecesario)."""
+        return not self.hay_nulos and len(set(self.codigos_de(valores))) == len(self.posicion)
+
+    def bitmap(self, valores):
+        mascara = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for i in self.codigos_de(valores):
+            np.bitwise_or(mascara, self.bitmaps[i], out=mascara)
+        return mascara
+
+    def ids(self, valores):
+        partes = [self.filas[self.offsets[i]:self.offsets[i + 1]] for i in self.codigos_de(valores)]
+        if not partes:
+            return np.empty(0, dtype=np.int32)
+        return partes[0] if len(partes) == 1 else np.sort(np.concatenate(partes))
+
+
+class IndiceFiltros:
+    """Índice por valor de las columnas filtrables de un DataFrame o tabla Arrow."""
+
+    def __init__(self, columnas, n):
+        self.columnas = columnas
+        self.n = n
+
+    @classmethod
+    def desde_dataframe(cls, df, columnas=COLUMNAS_INDICE):
+        indices = {}
+        for col in columnas:
+            if col in df.columns:
+                codigos, valores = pd.factorize(df[col], sort=True)
+                indices[col] = _IndiceColumna(codigos.astype(np.int32), list(valores))
+        return cls(indices, len(df))
+
+    @classmethod
+    def desde_tabla(cls, tabla, columnas=COLUMNAS_INDICE):
+        """Construye el índice leyendo de a una columna de una tabla Arrow."""
+        indices = {}
+        for col in columnas:
+            if col in tabla.column_names:
+                serie = tabla.column(col).to_pandas()
+                codigos, valores = pd.factorize(serie, sort=True)
+                indices[col] = _IndiceColumna(codigos.astype(np.int32), list(valores))
+        return cls(indices, tabla.num_rows)
+
+    def resolver(self, filtros):
+        """
+        Ids de fila (ordenados) que cumplen todos los filtros, o None si no hay filtros.
+        `filtros` es {columna: valores}; None significa "sin filtro" y una lista
+        vacía no deja pasar ninguna fila (como `isin([])`).
+        """
+        mascara = None
+        ids = None
+        for col, valores in filtros.items():
+            if valores is None:
+                continue
+            indice = self.columnas.get(col)
+            if indice is None:
+                raise KeyError(f"La columna '{col}' no está indexada.")
+            if indice.cubre_todo(valores):
+                continue
+            if indice.es_bitmap:
+                b = indice.bitmap(valores)
+                mascara = b if mascara is None else np.bitwise_and(mascara, b, out=mascara)
+            else:
+                f = indice.ids(valores)
+                ids = f if ids is None else np.intersect1d(ids, f, assume_unique=True)
+
+        if mascara is None:
+            return ids
+        if ids is None:
+            return np.flatnonzero(np.unpackbits(mascara, count=self.n, bitorder="little"))
+        bits = (mascara[ids >> 3] >> (ids & 7).astype(np.uint8)) & 1
+        return ids[bits.astype(bool)]
+
+
+@medido("filters.apply_filters", "filtro")
+def apply_filters(df, filtros, indice=None):
+    """
+    Filtra `df` por {columna: valores}. Con `indice` (construido sobre el mismo
+    `df`) usa bitmaps/listas de ids; sin índice, máscaras `isin`.
+    """
+    if indice is not None:
+        filas = indice.resolver(filtros)
+        return df if filas is None else df.iloc[filas]
+
+    for col, valores in filtros.items():
+        if valores is not None:
+            df = df[df[col].isin(valores)]
+    return df
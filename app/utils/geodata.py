@@ -0,0 +1,368 @@
+# app/utils/geodata.py
+#!/usr/bin/env python3
+"""
+Geometrías de distritos en WGS84, listas para el mapa.
+
+Los GeoJSON originales están en POSGAR 98 (EPSG:22174). Este script los
+reproyecta una sola vez y guarda:
+- data/distritos_policiales_wgs84.geojson: polígonos con sus propiedades, a
+  precisión completa (para ubicar hechos en distritos);
+- data/distritos_policiales_wgs84.topojson: los mismos polígonos simplificados
+  en varios niveles de detalle, para dibujar;
+- data/distritos_etiquetas_wgs84.json: nombre, lat y lon de cada etiqueta.
+
+Niveles de detalle: los bordes se parten en arcos compartidos (cada límite
+entre dos distritos se guarda una sola vez) y cada arco se simplifica con
+Douglas-Peucker, así los vecinos siguen encajando sin huecos ni solapes.
+Las coordenadas se cuantizan a una grilla entera con deltas (TopoJSON). El
+mapa pide el nivel que corresponde a su zoom y recibe un GeoJSON compacto:
+sólo las propiedades que muestra y los decimales que se ven a ese zoom.
+
+El dashboard sólo lee estos archivos: no se reproyecta ni se escribe nada
+al atender una página. Si un archivo es más viejo que su fuente se avisa y
+se usa igual; si falta, el mapa sigue sin esa capa. Se regeneran con este
+script o, si faltan o están desactualizados, al preprocesar/ingestar
+(`construir_faltantes`).
+
+Ejecutar: python -m app.utils.geodata
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from app.utils.coords import CRS_WGS84, a_wgs84
+
+DISTRITOS_GEOJSON = Path("data/distritos_policiales.geojson")
+ETIQUETAS_GEOJSON = Path("data/distritos_policiales_monbre.geojson")
+DISTRITOS_WGS84 = Path("data/distritos_policiales_wgs84.geojson")
+ETIQUETAS_WGS84 = Path("data/distritos_etiquetas_wgs84.json")
+DISTRITOS_TOPOJSON = Path("data/distritos_policiales_wgs84.topojson")
+
+# nivel: (zoom máximo en que se usa, tolerancia de simplificación en metros, decimales del GeoJSON)
+# A la latitud de Córdoba un píxel mide ~33 m en zoom 12 y ~8 m en zoom 14.
+NIVELES_DETALLE = {
+    "bajo": (11, 40.0, 4),
+    "medio": (13, 10.0, 5),
+    "alto": (None, 1.0, 5),
+}
+PASO_TOPOLOGIA_M = 0.1  # vértices de distritos vecinos a menos de esto se consideran el mismo
+CUANTIZACION = 100_000  # la caja de los distritos se divide en 1e5 x 1e5 (~0,4 m)
+PROPIEDADES_MAPA = ("nombre", "sup_km2", "pob_est_20")
+
+
+def construir_distritos(origen=DISTRITOS_GEOJSON, destino=DISTRITOS_WGS84):
+    import geopandas as gpd
+
+    gdf = gpd.read_file(origen).to_crs(CRS_WGS84)
+    gdf.to_file(destino, driver="GeoJSON", COORDINATE_PRECISION=6)
+    print(f"✅ Distritos en WGS84 guardados en: {destino} ({len(gdf)} polígonos)")
+    return destino
+
+
+def construir_etiquetas(origen=ETIQUETAS_GEOJSON, destino=ETIQUETAS_WGS84):
+    with open(origen, "r", encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    x = [f["geometry"]["coordinates"][0] for f in features]
+    y = [f["geometry"]["coordinates"][1] for f in features]
+    lat, lon = a_wgs84(x, y)
+    etiquetas = [
+        {"nombre": f["properties"]["nombre"], "lat": round(float(la), 6), "lon": round(float(lo), 6)}
+        for f, la, lo in zip(features, lat, lon)
+    ]
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(etiquetas, f, ensure_ascii=False, indent=1)
+    print(f"✅ Etiquetas en WGS84 guardadas en: {destino} ({len(etiquetas)} etiquetas)")
+    return destino
+
+
+def _poligonos(geometria):
+    if geometria["type"] == "Polygon":
+        return [geometria["coordinates"]]
+    return geometria["coordinates"]
+
+
+def _juntas(anillos):
+    """Vértices donde un borde se junta con otro o se separa (los extremos de los arcos)."""
+    vecinos = {}
+    juntas = set()
+    for anillo in anillos:
+        puntos = anillo[:-1]
+        for i, p in enumerate(puntos):
+            par = frozenset((puntos[i - 1], puntos[(i + 1) % len(puntos)]))
+            if vecinos.setdefault(p, par) != par:
+                juntas.add(p)
+    return juntas
+
+
+def _arcos(anillos, juntas):
+    """
+    Parte cada anillo en arcos entre juntas. Devuelve (arcos, referencias por
+    anillo); un arco recorrido al revés se referencia como ~i (TopoJSON).
+    """
+    arcos, indices, referencias = [], {}, []
+    for anillo in anillos:
+        puntos = anillo[:-1]
+        cortes = [i for i, p in enumerate(puntos) if p in juntas]
+        if cortes:
+            puntos = puntos[cortes[0]:] + puntos[:cortes[0]]
+        else:
+            # anillo sin vecinos: arranca en su mínimo para reconocerlo si se repite
+            inicio = puntos.index(min(puntos))
+            puntos = puntos[inicio:] + puntos[:inicio]
+        puntos = puntos + [puntos[0]]
+        tramos, actual = [], [puntos[0]]
+        for p in puntos[1:]:
+            actual.append(p)
+            if p in juntas:
+                tramos.append(tuple(actual))
+                actual = [p]
+        if len(actual) > 1:
+            tramos.append(tuple(actual))
+
+        refs = []
+        for tramo in tramos:
+            if tramo in indices:
+                refs.append(indices[tramo])
+            elif tramo[::-1] in indices:
+                refs.append(~indices[tramo[::-1]])
+            else:
+                indices[tramo] = len(arcos)
+                refs.append(len(arcos))
+                arcos.append(tramo)
+        referencias.append(refs)
+    return arcos, referencias
+
+
+def _simplificar(arco, tolerancia):
+    from shapely.geometry import LineString
+
+    if tolerancia <= 0 or len(arco) <= 2:
+        return list(arco)
+    simple = list(LineString(arco).simplify(tolerancia, preserve_topology=False).coords)
+    if arco[0] == arco[-1] and len(simple) < 4:
+        # un anillo cerrado no puede quedar en menos de un triángulo
+        simple = list(LineString(arco).simplify(tolerancia, preserve_topology=True).coords)
+        if len(simple) < 4:
+            return list(arco)
+    return simple
+
+
+def _cuantizar(lon, lat, caja):
+    lon_min, lat_min, lon_max, lat_max = caja
+    kx = (lon_max - lon_min) / (CUANTIZACION - 1)
+    ky = (lat_max - lat_min) / (CUANTIZACION - 1)
+    x = [round((v - lon_min) / kx) for v in lon]
+    y = [round((v - lat_min) / ky) for v in lat]
+    return list(zip(x, y)), [kx, ky], [lon_min, lat_min]
+
+
+def _deltas(puntos):
+    """Quita vértices repetidos (la cuantización puede juntarlos) y codifica en deltas."""
+    unicos = [puntos[0]] + [p for a, p in zip(puntos, puntos[1:]) if p != a]
+    if len(unicos) == 1:
+        unicos.append(unicos[0])
+    x0, y0 = unicos[0]
+    codificado = [[x0, y0]]
+    for (xa, ya), (xb, yb) in zip(unicos, unicos[1:]):
+        codificado.append([xb - xa, yb - ya])
+    return codificado
+
+
+def construir_niveles(origen=DISTRITOS_GEOJSON, destino=DISTRITOS_TOPOJSON):
+    """
+    TopoJSON con un objeto por nivel de detalle (NIVELES_DETALLE). La topología
+    y la simplificación se calculan en metros (POSGAR 98) y recién los arcos
+    ya simplificados se reproyectan a WGS84.
+    """
+    import numpy as np
+
+    with open(origen, "r", encoding="utf-8") as f:
+        features = json.load(f)["features"]
+
+    # anillos en enteros de PASO_TOPOLOGIA_M: une los vértices casi coincidentes
+    anillos, estructura = [], []
+    for feature in features:
+        poligonos = []
+        for poligono in _poligonos(feature["geometry"]):
+            poligonos.append(list(range(len(anillos), len(anillos) + len(poligono))))
+            for anillo in poligono:
+                anillos.append([(round(x / PASO_TOPOLOGIA_M), round(y / PASO_TOPOLOGIA_M)) for x, y in anillo])
+        estructura.append(poligonos)
+    arcos, referencias = _arcos(anillos, _juntas(anillos))
+
+    # simplificar cada arco una vez por nivel y reproyectar todos juntos
+    simplificados = {
+        nivel: [_simplificar(arco, tolerancia / PASO_TOPOLOGIA_M) for arco in arcos]
+        for nivel, (_, tolerancia, _) in NIVELES_DETALLE.items()
+    }
+    todos = [p for por_nivel in simplificados.values() for arco in por_nivel for p in arco]
+    xy = np.asarray(todos, dtype="float64") * PASO_TOPOLOGIA_M
+    lat, lon = a_wgs84(xy[:, 0], xy[:, 1])
+    caja = (float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max()))
+    cuantizados, escala, traslado = _cuantizar(lon, lat, caja)
+
+    arcos_topo, objetos, i = [], {}, 0
+    for nivel, por_nivel in simplificados.items():
+        base = len(arcos_topo)
+        for arco in por_nivel:
+            arcos_topo.append(_deltas(cuantizados[i:i + len(arco)]))
+            i += len(arco)
+
+        def desplazar(ref, base=base):
+            return ref + base if ref >= 0 else ~(~ref + base)
+
+        geometrias = []
+        for feature, poligonos in zip(features, estructura):
+            arcos_poligonos = [[[desplazar(r) for r in referencias[a]] for a in poligono] for poligono in poligonos]
+            propiedades = {k: feature["properties"].get(k) for k in PROPIEDADES_MAPA}
+            if isinstance(propiedades.get("pob_est_20"), float):
+                propiedades["pob_est_20"] = round(propiedades["pob_est_20"])
+            geometrias.append({"type": "MultiPolygon", "arcs": arcos_poligonos, "properties": propiedades})
+        objetos[nivel] = {"type": "GeometryCollection", "geometries": geometrias}
+
+    topologia = {
+        "type": "Topology",
+        "transform": {"scale": escala, "translate": traslado},
+        "objects": objetos,
+        "arcs": arcos_topo,
+    }
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(topologia, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"✅ Niveles de detalle guardados en: {destino} ({len(arcos)} arcos compartidos)")
+    for nivel in NIVELES_DETALLE:
+        vertices = sum(len(a) for a in simplificados[nivel])
+        print(f"   {nivel:6} {vertices:6,} vértices")
+    return destino
+
+
+def _decodificar_arcos(topologia):
+    import numpy as np
+
+    (kx, ky), (x0, y0) = topologia["transform"]["scale"], topologia["transform"]["translate"]
+    arcos = []
+    for arco in topologia["arcs"]:
+        xy = np.cumsum(np.asarray(arco, dtype="int64"), axis=0)
+        arcos.append(np.column_stack([xy[:, 0] * kx + x0, xy[:, 1] * ky + y0]))
+    return arcos
+
+
+def _anillo(refs, arcos, decimales):
+    puntos = []
+    for ref in refs:
+        arco = arcos[ref] if ref >= 0 else arcos[~ref][::-1]
+        puntos.extend(arco.round(decimales).tolist()[1 if puntos else 0:])
+    return puntos
+
+
+def _vigente(destino, origen):
+    return destino.exists() and (not origen.exists() or destino.stat().st_mtime >= origen.stat().st_mtime)
+
+
+_AVISADOS = set()
+
+
+def _disponible(destino, origen):
+    """
+    True si el archivo construido existe. Sólo lectura: nunca lo construye
+    (eso lo hacen el script y el preprocesamiento); si falta o es más viejo
+    que la fuente, avisa una vez por proceso.
+    """
+    if destino not in _AVISADOS:
+        if not destino.exists() and origen.exists():
+            print(f"⚠️ Falta {destino}: generarlo con python -m app.utils.geodata")
+            _AVISADOS.add(destino)
+        elif not _vigente(destino, origen):
+            print(f"⚠️ {destino} es más viejo que {origen}; se usa igual. "
+                  f"Regenerar con python -m app.utils.geodata")
+            _AVISADOS.add(destino)
+    return destino.exists()
+
+
+@lru_cache(maxsize=None)
+def _leer(path, mtime):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def distritos_wgs84():
+    """FeatureCollection de distritos en WGS84, o None si no está construida."""
+    if not _disponible(DISTRITOS_WGS84, DISTRITOS_GEOJSON):
+        return None
+    return _leer(DISTRITOS_WGS84, DISTRITOS_WGS84.stat().st_mtime_ns)
+
+
+def nivel_para_zoom(zoom):
+    """Nivel de detalle (clave de NIVELES_DETALLE) para un zoom de Leaflet."""
+    for nivel, (zoom_max, _, _) in NIVELES_DETALLE.items():
+        if zoom_max is None or zoom <= zoom_max:
+            return nivel
+    return nivel
+
+
+@lru_cache(maxsize=None)
+def _geojson_nivel(path, mtime, nivel):
+    topologia = _leer(path, mtime)
+    arcos = _decodificar_arcos(topologia)
+    decimales = NIVELES_DETALLE[nivel][2]
+    features = [
+        {
+            "type": "Feature",
+            "properties": g["properties"],
+            "geometry": {
+                "type": "MultiPolygon",
+                "coordinates": [[_anillo(refs, arcos, decimales) for refs in poligono] for poligono in g["arcs"]],
+            },
+        }
+        for g in topologia["objects"][nivel]["geometries"]
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def distritos_nivel(nivel):
+    """
+    FeatureCollection compacta de distritos en WGS84 al nivel de detalle pedido.
+    Para dibujar; para ubicar puntos usar distritos_wgs84(). Si la topología
+    no está construida se dibujan los polígonos a precisión completa.
+    """
+    if not _disponible(DISTRITOS_TOPOJSON, DISTRITOS_GEOJSON):
+        return distritos_wgs84()
+    return _geojson_nivel(DISTRITOS_TOPOJSON, DISTRITOS_TOPOJSON.stat().st_mtime_ns, nivel)
+
+
+def version_distritos():
+    """Versión de la geometría que se dibuja, para las claves de los mapas guardados en disco."""
+    if not DISTRITOS_TOPOJSON.exists():
+        return str(DISTRITOS_TOPOJSON)
+    return f"{DISTRITOS_TOPOJSON}:{DISTRITOS_TOPOJSON.stat().st_mtime_ns}"
+
+
+def etiquetas_wgs84():
+    """Lista de {nombre, lat, lon} de las etiquetas de distrito ([] si no está construida)."""
+    if not _disponible(ETIQUETAS_WGS84, ETIQUETAS_GEOJSON):
+        return []
+    return _leer(ETIQUETAS_WGS84, ETIQUETAS_WGS84.stat().st_mtime_ns)
+
+
+def construir_faltantes():
+    """
+    Construye los archivos que faltan o son más viejos que su fuente. Para el
+    preprocesamiento y la ingesta, no para el camino de las páginas.
+    """
+    for destino, origen, construir in [
+        (DISTRITOS_WGS84, DISTRITOS_GEOJSON, construir_distritos),
+        (ETIQUETAS_WGS84, ETIQUETAS_GEOJSON, construir_etiquetas),
+        (DISTRITOS_TOPOJSON, DISTRITOS_GEOJSON, construir_niveles),
+    ]:
+        if origen.exists() and not _vigente(destino, origen):
+            construir()
+
+
+def main():
+    construir_distritos()
+    construir_niveles()
+    construir_etiquetas()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# app/utils/grid.py
+"""
+Agregación espacial de hechos en una grilla cuadrada, por nivel de zoom.
+
+El tamaño de celda se elige para que cada celda ocupe siempre unos
+~32 px en pantalla (8 celdas por tile de 256 px), así que la cantidad de
+celdas a dibujar depende del área visible y no de la cantidad de hechos.
+El conteo es un `bincount` sobre el id de celda: no hay loops por fila.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.utils.coords import BBOX_CORDOBA
+
+LAT_REFERENCIA = -31.4
+
+CELDAS_POR_TILE = 8
+ZOOM_MIN = 10
+ZOOM_MAX_GRILLA = 17  # desde ZOOM_PUNTOS en adelante se dibujan hechos individuales
+ZOOM_PUNTOS = 16
+MAX_PUNTOS = 2000
+
+
+def tamaño_celda(zoom):
+    """Lado de la celda en grados (lon, lat) para un nivel de zoom de Leaflet."""
+    zoom = int(np.clip(zoom, ZOOM_MIN, ZOOM_MAX_GRILLA))
+    dlon = 360.0 / (2 ** zoom) / CELDAS_POR_TILE
+    dlat = dlon * np.cos(np.radians(LAT_REFERENCIA))
+    return dlon, dlat
+
+
+def agregar_grilla(lat, lon, zoom, categorias=None, bbox=BBOX_CORDOBA):
+    """
+    Cuenta hechos por celda.
+
+    lat, lon: arrays de coordenadas (NaN se ignoran).
+    categorias: Series categórica opcional (p. ej. prevenible) para el desglose por tipo.
+
+    Devuelve un DataFrame con una fila por celda ocupada: centro (lat, lon),
+    límites (lat_min, lat_max, lon_min, lon_max), `hechos` y, si hay
+    categorías, una columna de conteo por categoría.
+    """
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    lat_min, lat_max, lon_min, lon_max = bbox
+    dlon, dlat = tamaño_celda(zoom)
+    nx = int(np.ceil((lon_max - lon_min) / dlon))
+    ny = int(np.ceil((lat_max - lat_min) / dlat))
+
+    dentro = (lat >= lat_min) & (lat < lat_max) & (lon >= lon_min) & (lon < lon_max)
+    ix = ((lon[dentro] - lon_min) / dlon).astype(np.int64)
+    iy = ((lat[dentro] - lat_min) / dlat).astype(np.int64)
+    celda = ix * ny + iy
+
+    conteos = np.bincount(celda, minlength=nx * ny)
+    ocupadas = np.flatnonzero(conteos)
+    cx, cy = np.divmod(ocupadas, ny)
+    celdas = pd.DataFrame({
+        "lat_min": lat_min + cy * dlat,
+        "lon_min": lon_min + cx * dlon,
+        "hechos": conteos[ocupadas],
+    })
+    celdas["lat_max"] = celdas["lat_min"] + dlat
+    celdas["lon_max"] = celdas["lon_min"] + dlon
+    celdas["lat"] = celdas["lat_min"] + dlat / 2
+    celdas["lon"] = celdas["lon_min"] + dlon / 2
+
+    if categorias is not None:
+        cats = pd.Categorical(categorias)
+        codigos = np.asarray(cats.codes)[dentro]
+        nombres = list(cats.categories)
+        # renumerar sólo las celdas ocupadas para que la matriz celda x categoría sea chica
+        posicion = np.full(nx * ny, -1, dtype=np.int64)
+        posicion[ocupadas] = np.arange(len(ocupadas))
+        validos = codigos >= 0
+        matriz = np.bincount(
+            posicion[celda[validos]] * len(nombres) + codigos[validos],
+            minlength=len(ocupadas) * len(nombres),
+        ).reshape(len(ocupadas), len(nombres))
+        celdas = pd.concat([celdas, pd.DataFrame(matriz, columns=nombres)], axis=1)
+
+    return celdas
+
+
+def puntos_visibles(lat, lon, bounds, maximo=MAX_PUNTOS):
+    """
+    Posiciones de los hechos dentro de `bounds` ((lat_min, lon_min), (lat_max, lon_max)),
+    como máximo `maximo` (tomados a intervalos regulares, de forma determinística).
+    """
+    (lat_min, lon_min), (lat_max, lon_max) = bounds
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    filas = np.flatnonzero((lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max))
+    if len(filas) > maximo:
+        filas = filas[np.linspace(0, len(filas) - 1, maximo).astype(np.int64)]
+    return filas
+
+
+GRANULARIDADES = {"Día": "D", "Semana": "W", "Mes": "M"}
+MAX_PUNTOS_FRAME = 500
+MAX_PUNTOS_TOTAL = 100_000
+
+
+def frames_temporales(fechas, lat, lon, zoom, granularidad="D",
+                      max_por_frame=MAX_PUNTOS_FRAME, max_total=MAX_PUNTOS_TOTAL, bbox=BBOX_CORDOBA):
+    """
+    Frames para HeatMapWithTime: por cada período (día, semana o mes) las celdas
+    de la grilla con hechos, como [lat, lon, peso] (peso = hechos / máximo global).
+
+    Cada frame conserva como mucho `max_por_frame` celdas (las de más hechos) y
+    el total de puntos queda acotado por `max_total`, así que el tamaño del HTML
+    no depende de la cantidad de hechos ni de días del rango.
+
+    Devuelve (etiquetas, frames).
+    """
+    fechas = pd.to_datetime(pd.Series(fechas), errors="coerce")
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    lat_min, lat_max, lon_min, lon_max = bbox
+    dlon, dlat = tamaño_celda(zoom)
+    ny = int(np.ceil((lat_max - lat_min) / dlat))
+
+    dentro = (
+        fechas.notna().to_numpy()
+        & (lat >= lat_min) & (lat < lat_max) & (lon >= lon_min) & (lon < lon_max)
+    )
+    periodos = fechas[dentro].dt.to_period(granularidad)
+    codigos, etiquetas = pd.factorize(periodos, sort=True)
+    if not len(etiquetas):
+        return [], []
+    ix = ((lon[dentro] - lon_min) / dlon).astype(np.int64)
+    iy = ((lat[dentro] - lat_min) / dlat).astype(np.int64)
+    celda = ix * ny + iy
+    ncel = int(celda.max()) + 1
+
+    # conteo por (período, celda), ordenado por período y, dentro de cada uno, por hechos desc.
+    claves, hechos = np.unique(codigos.astype(np.int64) * ncel + celda, return_counts=True)
+    periodo, celda = np.divmod(claves, ncel)
+    orden = np.lexsort((-hechos, periodo))
+    periodo, celda, hechos = periodo[orden], celda[orden], hechos[orden]
+
+    tope = max(1, min(max_por_frame, max_total // len(etiquetas)))
+    inicio = np.searchsorted(periodo, np.arange(len(etiquetas)))
+    rango = np.arange(len(periodo)) - inicio[periodo]
+    periodo, celda, hechos = periodo[rango < tope], celda[rango < tope], hechos[rango < tope]
+
+    cx, cy = np.divmod(celda, ny)
+    puntos = np.column_stack([
+        np.round(lat_min + (cy + 0.5) * dlat, 5),
+        np.round(lon_min + (cx + 0.5) * dlon, 5),
+        np.round(hechos / hechos.max(), 3),
+    ]).tolist()
+    cortes = np.searchsorted(periodo, np.arange(1, len(etiquetas)))
+    frames = [puntos[a:b] for a, b in zip(np.r_[0, cortes], np.r_[cortes, len(puntos)])]
+    nombres = [
+        str(p.start_time.date()) if granularidad == "W" else str(p) for p in etiquetas
+    ]
+    return nombres, frames
@@ -0,0 +1,169 @@
+# app/utils/hierarchy.py
+"""
+Motor columnar para completar la jerarquía barrio -> comisaria -> distrito -> zona.
+
+Los mappings JSON se cargan una sola vez como tablas de lookup y el relleno se
+resuelve por códigos: se factoriza la columna clave (pocos cientos de valores
+distintos), se busca cada valor único en la tabla y el resultado se expande a
+todas las filas con un `take` sobre arrays. No hay `apply` fila por fila.
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+NIVELES_BARRIO = ["comisaria", "distrito", "zona"]
+
+
+@lru_cache(maxsize=None)
+def _leer_json(path, mtime):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def _leer_lookup(path, mtime):
+    tabla = pd.DataFrame.from_dict(_leer_json(path, mtime), orient="index")
+    tabla.index = pd.Index(tabla.index, dtype=object)
+    return tabla
+
+
+def cargar_mapping(mapping_path):
+    """
+    Carga un mapping JSON tal cual (dict), en caché por proceso.
+    Devuelve None si el archivo no existe.
+    """
+    mapping_path = Path(mapping_path)
+    if not mapping_path.exists():
+        return None
+    return _leer_json(str(mapping_path), mapping_path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def _leer_lookup_binario(path, mtime):
+    import pyarrow.feather as feather
+
+    # columna a columna a numpy: evita la conversión genérica de to_pandas
+    tabla = feather.read_table(path, memory_map=True)
+    clave, *columnas = tabla.column_names
+    return pd.DataFrame(
+        {c: tabla[c].to_numpy(zero_copy_only=False) for c in columnas},
+        index=pd.Index(tabla[clave].to_numpy(zero_copy_only=False), dtype=object),
+    )
+
+
+def ruta_binaria(mapping_path):
+    """Lookup binario (Arrow IPC) que acompaña a un mapping JSON: mismo nombre, extensión .arrow."""
+    return Path(mapping_path).with_suffix(".arrow")
+
+
+def guardar_lookup_binario(tabla, mapping_path, clave="barrio"):
+    """
+    Escribe `tabla` (DataFrame indexado por clave, columnas escalares) como
+    lookup binario junto al JSON. Se usa en lugar del JSON mientras no sea
+    más viejo que él.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    destino = ruta_binaria(mapping_path)
+    df = tabla.rename_axis(clave).reset_index()
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), destino, compression="uncompressed")
+    return destino
+
+
+def cargar_lookup(mapping_path):
+    """
+    Carga un mapping JSON {clave: {columna: valor}} como DataFrame indexado por clave.
+    Si hay un lookup binario (.arrow) al menos tan nuevo como el JSON, se lee ése.
+    La tabla queda en caché por proceso y se recarga sola si el archivo cambia.
+    Devuelve None si el archivo no existe.
+    """
+    mapping_path = Path(mapping_path)
+    if not mapping_path.exists():
+        return None
+    mtime = mapping_path.stat().st_mtime_ns
+    binario = ruta_binaria(mapping_path)
+    if binario.exists() and binario.stat().st_mtime_ns >= mtime:
+        return _leer_lookup_binario(str(binario), binario.stat().st_mtime_ns)
+    return _leer_lookup(str(mapping_path), mtime)
+
+
+def posiciones_en_lookup(claves, tabla):
+    """
+    Devuelve, para cada fila, la posición de su clave en `tabla` (-1 si no está o es nula).
+    La búsqueda se hace sólo sobre los valores únicos de la columna.
+    """
+    codigos, unicos = pd.factorize(claves)
+    pos_unicos = tabla.index.get_indexer(pd.Index(unicos, dtype=object))
+    # el código -1 (nulo) toma el último elemento, que es -1
+    return np.append(pos_unicos, -1)[codigos]
+
+
+def rellenar_desde_lookup(df, destino, posiciones, tabla):
+    """
+    Completa los nulos de `df[destino]` con `tabla[destino]` según `posiciones`.
+    Devuelve la cantidad de filas completadas.
+    """
+    if destino not in tabla.columns:
+        return 0
+    if destino not in df.columns:
+        df[destino] = None
+
+    valores = tabla[destino].to_numpy(dtype=object)
+    candidatos = np.where(posiciones >= 0, posiciones, 0)
+    nuevos = valores[candidatos] if len(valores) else np.full(len(df), None, dtype=object)
+    llenar = (
+        df[destino].isna().to_numpy()
+        & (posiciones >= 0)
+        & pd.notna(nuevos)
+    )
+    n = int(llenar.sum())
+    if n:
+        columna = df[destino].to_numpy(dtype=object, copy=True)
+        columna[llenar] = nuevos[llenar]
+        df[destino] = columna
+    return n
+
+
+def backfill_jerarquia(df, comisarias_path, distritos_path, normalizar_distrito=None):
+    """
+    Completa comisaria/distrito/zona desde barrio y luego zona desde distrito.
+    Equivale a `aplicar_mapping_lugar` seguido de `fill_zona_from_distrito`.
+
+    `normalizar_distrito` (Series -> Series, p. ej. `reglas_distrito().aplicar`)
+    se aplica a los distritos del mapping de barrios antes de copiarlos: así un
+    "DISTRITO IV" del mapping llega como "DISTRITO 4" y también completa la zona.
+
+    Devuelve (df, reporte) donde reporte indica cuántas filas completó cada nivel.
+    """
+    reporte = {}
+
+    tabla_barrios = cargar_lookup(comisarias_path)
+    if tabla_barrios is not None and normalizar_distrito is not None and "distrito" in tabla_barrios.columns:
+        # copia: el lookup está en caché por proceso
+        tabla_barrios = tabla_barrios.assign(distrito=normalizar_distrito(tabla_barrios["distrito"]))
+    if tabla_barrios is None:
+        print(f"⚠️ No se encontró mapping en {comisarias_path}, no se aplican reemplazos.")
+    elif "barrio" in df.columns:
+        posiciones = posiciones_en_lookup(df["barrio"], tabla_barrios)
+        for col in NIVELES_BARRIO:
+            reporte[f"{col} (desde barrio)"] = rellenar_desde_lookup(df, col, posiciones, tabla_barrios)
+
+    tabla_distritos = cargar_lookup(distritos_path)
+    if tabla_distritos is None:
+        print(f"⚠️ No se encontró mapping en {distritos_path}, no se aplican reemplazos.")
+    elif "distrito" in df.columns:
+        posiciones = posiciones_en_lookup(df["distrito"], tabla_distritos)
+        reporte["zona (desde distrito)"] = rellenar_desde_lookup(df, "zona", posiciones, tabla_distritos)
+
+    return df, reporte
+
+
+def imprimir_reporte(reporte, total):
+    print("🧩 Filas completadas por nivel de la jerarquía:")
+    for nivel, n in reporte.items():
+        print(f"   {nivel}: {n}/{total}")
@@ -0,0 +1,196 @@
+# app/utils/hotspots.py
+"""
+Detección de zonas calientes sobre una grilla regular que cubre los distritos.
+
+Los hechos se cuentan por celda con un `bincount` (una pasada, sin loops por
+fila) y todo lo demás trabaja sobre la grilla, cuyo tamaño depende del área
+y del lado de la celda, no de la cantidad de hechos:
+
+- KDE: convolución de la grilla de conteos con un núcleo gaussiano truncado a
+  3 anchos de banda, por FFT (con relleno de ceros, sin efecto de borde
+  circular). Resultado en hechos por km².
+- Getis-Ord Gi*: vecinos binarios dentro de una distancia (incluida la propia
+  celda). Como los pesos son un disco fijo, las sumas de vecinos son otra
+  convolución por FFT; sólo entran las celdas cuyo centro cae en un distrito.
+
+Celdas clasificadas por z de Gi*: ±1.65 (90 %), ±1.96 (95 %), ±2.58 (99 %).
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.utils.coords import BBOX_CORDOBA
+from app.utils.geodata import distritos_wgs84
+from app.utils.grid import LAT_REFERENCIA
+
+METROS_POR_GRADO = 111_320
+CELDA_M = 250
+ANCHO_BANDA_M = 500
+NUCLEO_SIGMAS = 3
+
+# (z mínimo, etiqueta), de la más exigente a la menos
+NIVELES_GI = [
+    (2.58, "Caliente 99%"),
+    (1.96, "Caliente 95%"),
+    (1.65, "Caliente 90%"),
+    (-1.65, "No significativo"),
+    (-1.96, "Frío 90%"),
+    (-2.58, "Frío 95%"),
+    (-np.inf, "Frío 99%"),
+]
+
+
+def bbox_distritos():
+    """(lat_min, lat_max, lon_min, lon_max) de los polígonos de distritos; BBOX_CORDOBA si no hay."""
+    coleccion = distritos_wgs84()
+    if not coleccion:
+        return BBOX_CORDOBA
+    coords = []
+    for f in coleccion["features"]:
+        pila = [f["geometry"]["coordinates"]]
+        while pila:
+            actual = pila.pop()
+            if actual and isinstance(actual[0], (int, float)):
+                coords.append(actual[:2])
+            else:
+                pila.extend(actual)
+    lon, lat = np.asarray(coords, dtype="float64").T
+    return lat.min(), lat.max(), lon.min(), lon.max()
+
+
+def grilla(celda_m=CELDA_M, bbox=None):
+    """Definición de la grilla: origen, lado en grados (dlat, dlon) y forma (ny, nx)."""
+    lat_min, lat_max, lon_min, lon_max = bbox if bbox is not None else bbox_distritos()
+    dlat = celda_m / METROS_POR_GRADO
+    dlon = celda_m / (METROS_POR_GRADO * np.cos(np.radians(LAT_REFERENCIA)))
+    ny = int(np.ceil((lat_max - lat_min) / dlat))
+    nx = int(np.ceil((lon_max - lon_min) / dlon))
+    return {"lat_min": lat_min, "lon_min": lon_min, "dlat": dlat, "dlon": dlon, "forma": (ny, nx)}
+
+
+def contar_en_grilla(lat, lon, g):
+    """Matriz (ny, nx) de hechos por celda; los puntos fuera de la grilla o sin coordenadas se ignoran."""
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    ny, nx = g["forma"]
+    with np.errstate(invalid="ignore"):
+        iy = np.floor((lat - g["lat_min"]) / g["dlat"])
+        ix = np.floor((lon - g["lon_min"]) / g["dlon"])
+    dentro = (iy >= 0) & (iy < ny) & (ix >= 0) & (ix < nx)
+    celda = iy[dentro].astype(np.int64) * nx + ix[dentro].astype(np.int64)
+    return np.bincount(celda, minlength=ny * nx).reshape(ny, nx).astype("float64")
+
+
+def convolucionar(matriz, nucleo):
+    """Convolución 2D 'same' por FFT (núcleo de lados impares, relleno de ceros)."""
+    ky, kx = nucleo.shape
+    forma = (matriz.shape[0] + ky - 1, matriz.shape[1] + kx - 1)
+    resultado = np.fft.irfft2(np.fft.rfft2(matriz, forma) * np.fft.rfft2(nucleo, forma), forma)
+    y0, x0 = ky // 2, kx // 2
+    return resultado[y0:y0 + matriz.shape[0], x0:x0 + matriz.shape[1]]
+
+
+def nucleo_gaussiano(ancho_banda_m, celda_m):
+    """Núcleo gaussiano normalizado (suma 1), truncado a NUCLEO_SIGMAS anchos de banda."""
+    sigma = ancho_banda_m / celda_m
+    radio = max(int(np.ceil(NUCLEO_SIGMAS * sigma)), 1)
+    y, x = np.mgrid[-radio:radio + 1, -radio:radio + 1]
+    nucleo = np.exp(-(x ** 2 + y ** 2) / (2 * sigma ** 2))
+    return nucleo / nucleo.sum()
+
+
+def nucleo_disco(distancia_m, celda_m):
+    """Pesos binarios de Gi*: 1 para las celdas a menos de `distancia_m` (incluida la propia)."""
+    radio = int(distancia_m // celda_m)
+    y, x = np.mgrid[-radio:radio + 1, -radio:radio + 1]
+    return ((x ** 2 + y ** 2) * celda_m ** 2 <= distancia_m ** 2).astype("float64")
+
+
+def densidad_kde(conteos, ancho_banda_m, celda_m):
+    """Densidad de hechos por km² en cada celda."""
+    area_km2 = (celda_m / 1000) ** 2
+    return np.clip(convolucionar(conteos, nucleo_gaussiano(ancho_banda_m, celda_m)), 0, None) / area_km2
+
+
+def getis_ord(conteos, distancia_m, celda_m, mascara=None):
+    """
+    z de Gi* por celda (NaN fuera de `mascara`). `mascara` marca las celdas del
+    área de estudio; sin máscara se usa toda la grilla.
+    """
+    if mascara is None:
+        mascara = np.ones(conteos.shape, dtype=bool)
+    n = int(mascara.sum())
+    z = np.full(conteos.shape, np.nan)
+    if n < 2:
+        return z
+    x = np.where(mascara, conteos, 0.0)
+    media = x.sum() / n
+    s = np.sqrt((x ** 2).sum() / n - media ** 2)
+    if s == 0:
+        return z
+
+    pesos = nucleo_disco(distancia_m, celda_m)
+    # suma de valores vecinos y cantidad de vecinos dentro del área (pesos binarios: Σw² = Σw)
+    suma_vecinos = np.rint(convolucionar(x, pesos))
+    w = np.rint(convolucionar(mascara.astype("float64"), pesos))
+    denominador = s * np.sqrt(np.clip(n * w - w ** 2, 0, None) / (n - 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valores = (suma_vecinos - media * w) / denominador
+    z[mascara] = valores[mascara]
+    z[~np.isfinite(z)] = np.nan
+    return z
+
+
+def mascara_distritos(g):
+    """Celdas cuyo centro cae dentro de algún distrito (toda la grilla si no hay polígonos)."""
+    from app.utils.spatial import distrito_por_coordenadas
+
+    ny, nx = g["forma"]
+    iy, ix = np.mgrid[0:ny, 0:nx]
+    lat = g["lat_min"] + (iy.ravel() + 0.5) * g["dlat"]
+    lon = g["lon_min"] + (ix.ravel() + 0.5) * g["dlon"]
+    dentro = pd.notna(distrito_por_coordenadas(lat, lon))
+    if not dentro.any():
+        return np.ones((ny, nx), dtype=bool)
+    return dentro.reshape(ny, nx)
+
+
+def clasificar_gi(z):
+    """Etiqueta de significancia para cada z (None si es NaN)."""
+    etiquetas = np.full(z.shape, None, dtype=object)
+    pendiente = ~np.isnan(z)
+    for umbral, etiqueta in NIVELES_GI:
+        elegir = pendiente & (z >= umbral)
+        etiquetas[elegir] = etiqueta
+        pendiente &= ~elegir
+    return etiquetas
+
+
+def calcular_hotspots(lat, lon, ancho_banda_m=ANCHO_BANDA_M, celda_m=CELDA_M, bbox=None):
+    """
+    KDE y Gi* de los hechos. La distancia de vecindad de Gi* es el ancho de banda.
+
+    Devuelve un DataFrame con una fila por celda del área de estudio: centro y
+    límites (lat, lon, lat_min, ...), `hechos`, `densidad` (hechos/km²),
+    `gi_z` y `nivel`.
+    """
+    g = grilla(celda_m, bbox)
+    conteos = contar_en_grilla(lat, lon, g)
+    mascara = mascara_distritos(g)
+    densidad = densidad_kde(conteos, ancho_banda_m, celda_m)
+    z = getis_ord(conteos, max(ancho_banda_m, celda_m), celda_m, mascara)
+
+    iy, ix = np.nonzero(mascara)
+    celdas = pd.DataFrame({
+        "lat_min": g["lat_min"] + iy * g["dlat"],
+        "lon_min": g["lon_min"] + ix * g["dlon"],
+        "hechos": conteos[iy, ix].astype("int64"),
+        "densidad": densidad[iy, ix],
+        "gi_z": z[iy, ix],
+    })
+    celdas["lat_max"] = celdas["lat_min"] + g["dlat"]
+    celdas["lon_max"] = celdas["lon_min"] + g["dlon"]
+    celdas["lat"] = celdas["lat_min"] + g["dlat"] / 2
+    celdas["lon"] = celdas["lon_min"] + g["dlon"] / 2
+    celdas["nivel"] = clasificar_gi(celdas["gi_z"].to_numpy())
+    return celdas
@@ -0,0 +1,324 @@
+# app/utils/ingest.py
+#!/usr/bin/env python3
+"""
+Ingesta incremental al dataset limpio particionado (estilo Hive) por año
+(y opcionalmente por mes):
+
+    data/delitos_clean/año=2023/<hash>-00000-0.parquet
+    data/delitos_clean/año=2024/...
+
+Junto con las filas se guardan los rollups de conteos parciales de cada
+archivo en `_cubo/<rollup>/<hash>.parquet` (ver app/utils/cube.py); se suman
+al leer.
+
+Sólo se procesan los archivos crudos que no están en el manifiesto
+(`_manifest.json`, indexado por el SHA-256 del contenido). Si un archivo ya
+ingestado cambia de contenido, se borran sus particiones anteriores y se
+vuelve a procesar. Cada archivo agrega archivos nuevos: nunca se reescribe
+el resto del dataset.
+
+Los archivos nuevos se procesan en paralelo, uno por proceso (--workers), y
+al final se muestran estadísticas por archivo (filas, sin coordenadas,
+barrios sin mapping).
+
+Ejecutar: python -m app.utils.ingest "data/raw/*.csv" [--por-mes] [--chunksize N] [--workers N]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.utils.cube import CUBO_DIR, acumular_rollups, combinar_cubos
+from app.utils.geodata import construir_faltantes
+from app.utils.hierarchy import cargar_lookup
+from app.utils.preprocess import MAPPING_JSON_COMISARIA, esquema_arrow, limpiar
+
+CLEAN_DATASET = Path("data/delitos_clean")
+MANIFEST = "_manifest.json"
+COMMON_METADATA = "_common_metadata"
+RAW_GLOB = "data/raw/*.csv"
+
+TIPOS_PARTICION = {"año": pa.int16(), "mes": pa.int8()}
+
+
+def hash_archivo(path, bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for parte in iter(lambda: f.read(bloque), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def leer_manifest(root=CLEAN_DATASET):
+    path = Path(root) / MANIFEST
+    if not path.exists():
+        return {"particiones": None, "archivos": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def guardar_manifest(manifest, root=CLEAN_DATASET):
+    path = Path(root) / MANIFEST
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    tmp.replace(path)
+
+
+def particionado(columnas):
+    return ds.partitioning(pa.schema([(c, TIPOS_PARTICION[c]) for c in columnas]), flavor="hive")
+
+
+def leer_esquema(root=CLEAN_DATASET):
+    """Esquema común del dataset (incluye las columnas de partición) o None si está vacío."""
+    path = Path(root) / COMMON_METADATA
+    return pq.read_schema(path) if path.exists() else None
+
+
+def _a_tabla(chunk, columnas_particion):
+    tabla = pa.Table.from_pandas(chunk, schema=esquema_arrow(chunk), preserve_index=False)
+    for c in columnas_particion:
+        i = tabla.schema.get_field_index(c)
+        tabla = tabla.set_column(i, c, pc.cast(tabla[c], TIPOS_PARTICION[c]))
+    return tabla.replace_schema_metadata(None)
+
+
+def _alinear(tabla, schema):
+    """Reordena la tabla según `schema`, agregando como nulas las columnas que falten."""
+    columnas = [
+        tabla[f.name].cast(f.type) if f.name in tabla.column_names else pa.nulls(len(tabla), f.type)
+        for f in schema
+    ]
+    return pa.Table.from_arrays(columnas, schema=schema)
+
+
+def estadisticas_chunk(chunk, barrios_conocidos):
+    """Filas, filas sin coordenadas y barrios que no están en el mapping de comisarías."""
+    sin_coords = 0
+    if {"latitud", "longitud"} <= set(chunk.columns):
+        sin_coords = int(chunk[["latitud", "longitud"]].isna().any(axis=1).sum())
+    sin_mapping = pd.Series(dtype="int64")
+    if "barrio" in chunk.columns:
+        barrios = chunk["barrio"].dropna().astype(str)
+        sin_mapping = barrios[~barrios.isin(barrios_conocidos)].value_counts()
+    return {"filas": len(chunk), "sin_coordenadas": sin_coords}, sin_mapping
+
+
+def ingestar_archivo(path, root, columnas_particion, chunksize, schema, h=None):
+    """
+    Limpia `path` de a chunks y escribe cada chunk en sus particiones, más los
+    rollups de conteos del archivo.
+    Devuelve (archivos escritos, estadísticas del archivo, esquema común actualizado).
+    """
+    root = Path(root)
+    prefijo = (h or hash_archivo(path))[:16]
+    tabla_barrios = cargar_lookup(MAPPING_JSON_COMISARIA)
+    barrios_conocidos = set(tabla_barrios.index) if tabla_barrios is not None else set()
+    escritos = []
+    cubos = None
+    stats = {"filas": 0, "sin_coordenadas": 0}
+    sin_mapping = pd.Series(dtype="int64")
+    for i, chunk in enumerate(pd.read_csv(path, dtype=str, chunksize=chunksize)):
+        chunk = limpiar(chunk, verbose=False)
+        cubos = acumular_rollups(cubos, chunk)
+        parcial, faltantes = estadisticas_chunk(chunk, barrios_conocidos)
+        stats = {k: stats[k] + parcial[k] for k in stats}
+        sin_mapping = sin_mapping.add(faltantes, fill_value=0)
+        tabla = _a_tabla(chunk, columnas_particion)
+        schema = tabla.schema if schema is None else pa.unify_schemas([schema, tabla.schema])
+        ds.write_dataset(
+            _alinear(tabla, schema),
+            root,
+            format="parquet",
+            partitioning=particionado(columnas_particion),
+            basename_template=f"{prefijo}-{i:05d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_visitor=lambda f: escritos.append(Path(f.path).relative_to(root).as_posix()),
+        )
+
+    for nombre, conteos in (cubos or {}).items():
+        cubo = Path(CUBO_DIR) / nombre / f"{prefijo}.parquet"
+        (root / cubo.parent).mkdir(parents=True, exist_ok=True)
+        conteos.to_parquet(root / cubo, index=False)
+        escritos.append(cubo.as_posix())
+
+    stats["barrios_sin_mapping"] = int(sin_mapping.sum())
+    stats["barrios_sin_mapping_distintos"] = len(sin_mapping)
+    stats["barrios_sin_mapping_top"] = {
+        b: int(n) for b, n in sin_mapping.sort_values(ascending=False).head(5).items()
+    }
+    return escritos, stats, schema
+
+
+def _ingestar_en_worker(path, root, columnas_particion, chunksize, schema, h):
+    """Punto de entrada de cada proceso del pool (sólo escribe archivos propios del hash)."""
+    t0 = time.perf_counter()
+    escritos, stats, schema = ingestar_archivo(path, root, columnas_particion, chunksize, schema, h)
+    stats["segundos"] = round(time.perf_counter() - t0, 1)
+    return escritos, stats, schema
+
+
+def imprimir_estadisticas(resultados):
+    """Tabla de estadísticas por archivo ingestado."""
+    if not resultados:
+        return
+    tabla = pd.DataFrame({
+        path: {k: v for k, v in stats.items() if k != "barrios_sin_mapping_top"}
+        for path, stats in resultados.items()
+    }).T
+    tipos = {c: "float64" if c == "segundos" else "int64" for c in tabla.columns}
+    tabla = tabla.astype(tipos)
+    # fila de totales con los mismos tipos: asignarla con .loc pasaría los contadores a float
+    total = tabla.sum().to_frame("TOTAL").T.astype(tipos)
+    tabla = pd.concat([tabla, total])
+    print("📊 Estadísticas por archivo:")
+    print(tabla.to_string())
+
+
+def ingestar(patron=RAW_GLOB, root=CLEAN_DATASET, por_mes=False, chunksize=200_000, workers=None):
+    """
+    Ingesta los archivos crudos de `patron` que todavía no están en el manifiesto.
+
+    Los archivos se limpian y escriben en paralelo en `workers` procesos
+    (por defecto, uno por núcleo; con 1 se procesan en este mismo proceso).
+    Cada archivo escribe sólo archivos con su propio prefijo de hash, así que
+    los procesos no se pisan; el manifiesto y el esquema común los actualiza
+    únicamente este proceso, a medida que cada archivo termina.
+
+    Devuelve la lista de archivos procesados.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = leer_manifest(root)
+    columnas_particion = ["año", "mes"] if por_mes else ["año"]
+    if manifest["particiones"] is None:
+        manifest["particiones"] = columnas_particion
+    elif manifest["particiones"] != columnas_particion:
+        raise ValueError(
+            f"El dataset {root} está particionado por {manifest['particiones']}; "
+            f"no se puede ingestar con {columnas_particion}."
+        )
+
+    archivos = sorted(Path(p) for p in glob.glob(str(patron)))
+    if not archivos:
+        print(f"⚠️ No hay archivos que coincidan con {patron}.")
+        return []
+
+    # geometrías de distritos al día antes de limpiar (los procesos sólo las leen)
+    construir_faltantes()
+
+    ingestados = manifest["archivos"]
+    por_nombre = {info["archivo"]: h for h, info in ingestados.items()}
+    schema = leer_esquema(root)
+
+    pendientes = {}
+    for path in archivos:
+        h = hash_archivo(path)
+        if h in ingestados or h in pendientes.values():
+            print(f"⏭️  {path} ya ingestado, se omite.")
+            continue
+
+        anterior = por_nombre.get(path.as_posix())
+        if anterior is not None:
+            print(f"♻️  {path} cambió desde la última ingesta, se reemplazan sus particiones.")
+            for parte in ingestados.pop(anterior)["parquet"]:
+                (root / parte).unlink(missing_ok=True)
+            guardar_manifest(manifest, root)
+        pendientes[path] = h
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pendientes) or 1))
+    print(f"📥 Ingestando {len(pendientes)} archivos con {workers} proceso(s)...")
+
+    def registrar(path, h, escritos, stats, schema_archivo):
+        nonlocal schema
+        schema = schema_archivo if schema is None else pa.unify_schemas([schema, schema_archivo])
+        pq.write_metadata(schema, root / COMMON_METADATA)
+        ingestados[h] = {
+            "archivo": path.as_posix(),
+            "filas": stats["filas"],
+            "estadisticas": stats,
+            "ingestado": datetime.now().isoformat(timespec="seconds"),
+            "parquet": escritos,
+        }
+        guardar_manifest(manifest, root)
+        print(f"✅ {path}: {stats['filas']} filas en {len(escritos)} archivos nuevos.")
+
+    resultados = {}
+    if workers == 1:
+        for path, h in pendientes.items():
+            escritos, stats, schema_archivo = _ingestar_en_worker(
+                path, root, columnas_particion, chunksize, schema, h
+            )
+            registrar(path, h, escritos, stats, schema_archivo)
+            resultados[path.as_posix()] = stats
+    else:
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as pool:
+            futuros = {
+                pool.submit(_ingestar_en_worker, path, root, columnas_particion, chunksize, schema, h): (path, h)
+                for path, h in pendientes.items()
+            }
+            for futuro in as_completed(futuros):
+                path, h = futuros[futuro]
+                escritos, stats, schema_archivo = futuro.result()
+                registrar(path, h, escritos, stats, schema_archivo)
+                resultados[path.as_posix()] = stats
+
+    imprimir_estadisticas(resultados)
+    print(f"Ingesta finalizada: {len(resultados)} archivos nuevos, {len(ingestados)} en total.")
+    return [Path(p) for p in resultados]
+
+
+def abrir_dataset(root=CLEAN_DATASET):
+    """Abre el dataset particionado sin leer los archivos (sólo lista directorios)."""
+    root = Path(root)
+    manifest = leer_manifest(root)
+    return ds.dataset(
+        root,
+        format="parquet",
+        schema=leer_esquema(root),
+        partitioning=particionado(manifest["particiones"] or ["año"]),
+    )
+
+
+def leer_cubo(nombre, root=CLEAN_DATASET, años=None):
+    """Suma el rollup `nombre` de todos los archivos ingestados (o None si no hay)."""
+    partes = sorted((Path(root) / CUBO_DIR / nombre).glob("*.parquet"))
+    if not partes:
+        return None
+    filtros = [("año", "in", list(años))] if años is not None else None
+    return combinar_cubos([pd.read_parquet(p, filters=filtros) for p in partes])
+
+
+def años_en_dataset(root=CLEAN_DATASET):
+    """Años disponibles, leídos de los nombres de directorio `año=YYYY`."""
+    años = set()
+    for d in Path(root).glob("año=*"):
+        valor = d.name.split("=", 1)[1]
+        if valor.isdigit():
+            años.add(int(valor))
+    return sorted(años)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingesta incremental de CSV crudos al dataset particionado.")
+    parser.add_argument("patron", nargs="?", default=RAW_GLOB, help=f"Glob de archivos crudos (por defecto {RAW_GLOB}).")
+    parser.add_argument("--destino", default=str(CLEAN_DATASET), help="Directorio del dataset particionado.")
+    parser.add_argument("--por-mes", action="store_true", help="Particionar también por mes.")
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, uno por núcleo).")
+    args = parser.parse_args()
+    ingestar(args.patron, args.destino, por_mes=args.por_mes, chunksize=args.chunksize, workers=args.workers)
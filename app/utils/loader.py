@@ -1,32 +1,90 @@
 # app/utils/loader.py
+import os
 from pathlib import Path
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 import streamlit as st
 from functools import lru_cache
 
+from app.utils.backends import BACKEND, abrir_backend
+from app.utils.cube import OUT_CUBOS, rollup_para
+from app.utils.filters import IndiceFiltros, apply_filters
+from app.utils.ingest import CLEAN_DATASET, MANIFEST, abrir_dataset, años_en_dataset, leer_cubo
+from app.utils.perf import medido
+from app.utils.schema import aplicar_esquema
+from app.utils.shared import ARROW_PATH, abrir_compartido
+
 CLEAN_PARQUET = Path("data/delitos_cordoba_2019_2023_clean.parquet")
 CLEAN_CSV_GZ = Path("data/delitos_cordoba_2019_2023_clean.csv.gz")
 RAW_CSV = Path("data/delitos_cordoba_2019_2023.csv")
 
+# "pandas": cada sesión recibe su copia del DataFrame (st.cache_data).
+# "compartido": un único archivo Arrow mapeado en memoria por proceso (ver app/utils/shared.py).
+MODO_CARGA = os.environ.get("DELITOS_MODO_CARGA", "pandas")
+
+
+def _origen(path=None):
+    if path:
+        return Path(path)
+    if (CLEAN_DATASET / MANIFEST).exists():
+        return CLEAN_DATASET
+    if CLEAN_PARQUET.exists():
+        return CLEAN_PARQUET
+    if CLEAN_CSV_GZ.exists():
+        return CLEAN_CSV_GZ
+    return RAW_CSV
+
+
+def version_datos(path: str = None):
+    """
+    Versión de la fuente limpia (ruta, mtime y tamaño), para las claves de las
+    cachés en disco: cambia cada vez que se reprocesa o se ingesta algo.
+    """
+    p = _origen(path)
+    fuente = p / MANIFEST if p.is_dir() else p
+    if not fuente.exists():
+        return str(p)
+    info = fuente.stat()
+    return f"{p}:{info.st_mtime_ns}:{info.st_size}"
+
+
 @st.cache_data
-def load_data(path: str = None):
+def años_disponibles(path: str = None):
     """
-    Carga el dataset limpio (parquet preferido). Devuelve un DataFrame listo para usar.
+    Años presentes en el dataset, sin cargarlo: en el dataset particionado se
+    leen de los nombres de directorio; en un parquet, sólo la columna año.
     """
-    # elegir archivo
-    if path:
-        p = Path(path)
+    if path is None and load_backend() is not None:
+        return load_backend().años()
+    p = _origen(path)
+    if p.is_dir():
+        return años_en_dataset(p)
+    if p.suffix == ".parquet":
+        años = pd.read_parquet(p, columns=["año"])["año"]
     else:
-        if CLEAN_PARQUET.exists():
-            p = CLEAN_PARQUET
-        elif CLEAN_CSV_GZ.exists():
-            p = CLEAN_CSV_GZ
-        else:
-            p = RAW_CSV
+        años = load_data(path)["año"]
+    return sorted(int(a) for a in años.dropna().unique())
+
+
+@st.cache_data(max_entries=8)
+@medido("loader.load_data", "carga")
+def load_data(path: str = None, años: tuple = None):
+    """
+    Carga el dataset limpio (dataset particionado o parquet preferido). Devuelve un DataFrame listo para usar.
+    Si se indican `años`, el filtro se empuja a la lectura: en el dataset
+    particionado sólo se abren los archivos de esos años.
+    """
+    # elegir archivo
+    p = _origen(path)
 
     print(f"Cargando datos desde {p} ...")
-    if p.suffix == ".parquet":
-        df = pd.read_parquet(p)
+    if p.is_dir():
+        filtro = ds.field("año").isin(list(años)) if años is not None else None
+        df = abrir_dataset(p).to_table(filter=filtro).to_pandas()
+    elif p.suffix == ".parquet":
+        filtros = [("año", "in", list(años))] if años is not None else None
+        df = pd.read_parquet(p, filters=filtros)
     else:
         df = pd.read_csv(p, low_memory=False)
 
@@ -47,4 +105,104 @@ def load_data(path: str = None):
     if "año" not in df.columns:
         df["año"] = df["fecha_hora"].dt.year
 
+    # Tipos compactos (category / enteros chicos), iguales para todas las fuentes
+    df = aplicar_esquema(df)
+
+    if años is not None and not p.is_dir() and p.suffix != ".parquet":
+        df = df[df["año"].isin(años)]
+
     return df
+
+
+def leer_rollup(nombre, path: str = None, años: tuple = None):
+    """Rollup de conteos `nombre` (ver app/utils/cube.py) para los años dados, sin caché; None si no hay."""
+    p = _origen(path)
+    if p.is_dir():
+        cubo = leer_cubo(nombre, p, años)
+    elif p == CLEAN_PARQUET and (OUT_CUBOS / f"{nombre}.parquet").exists():
+        filtros = [("año", "in", list(años))] if años is not None else None
+        cubo = pd.read_parquet(OUT_CUBOS / f"{nombre}.parquet", filters=filtros)
+    else:
+        return None
+    return aplicar_esquema(cubo) if cubo is not None else None
+
+
+@st.cache_data(max_entries=32)
+@medido("loader.load_cubo", "carga")
+def _load_rollup(nombre, path: str = None, años: tuple = None):
+    return leer_rollup(nombre, path, años)
+
+
+def load_cubo(dims, path: str = None, años: tuple = None):
+    """
+    Conteos precalculados que alcanzan para agrupar/filtrar por `dims`: el
+    rollup más chico que las tiene a todas (ver app/utils/cube.py), para los
+    años dados. Devuelve None si ningún rollup alcanza o no hay cubos: en ese
+    caso las páginas usan las filas crudas.
+    """
+    nombre = rollup_para(list(dims))
+    return None if nombre is None else _load_rollup(nombre, path, años)
+
+
+@st.cache_resource
+def load_compartido(path: str = None):
+    """
+    Dataset compartido (memory-map de Arrow IPC), uno por proceso y sin copias
+    por sesión. Se reconstruye solo si la fuente limpia es más nueva.
+    """
+    p = _origen(path)
+    fuente = p / MANIFEST if p.is_dir() else p
+    mtime = fuente.stat().st_mtime if fuente.exists() else 0
+    return abrir_compartido(mtime, ARROW_PATH, cargar=lambda: load_data.__wrapped__(path))
+
+
+@st.cache_resource(max_entries=8)
+def load_indice(path: str = None, años: tuple = None):
+    """
+    Índice de filtros sobre `load_data(path, años)`: uno por conjunto de años
+    (acotado con max_entries), compartido entre sesiones.
+    """
+    return IndiceFiltros.desde_dataframe(load_data(path, años))
+
+
+@st.cache_resource
+def load_backend():
+    """Backend SQL configurado con DELITOS_BACKEND (uno por proceso), o None en modo pandas."""
+    return abrir_backend(BACKEND)
+
+
+@st.cache_data(max_entries=64)
+@medido("loader.load_agregado", "carga")
+def load_agregado(dims: tuple, años: tuple, barrios: tuple = None):
+    """Cubo de conteos por `dims` calculado por el backend SQL para los filtros dados."""
+    return load_backend().cubo(list(dims), {"año": list(años), "barrio": list(barrios) if barrios else None})
+
+
+@st.cache_resource(max_entries=16)
+def _filas_backend(años: tuple, barrios: tuple = None, columnas: tuple = None):
+    """Filas del backend como tabla Arrow inmutable: una copia por proceso, no una por sesión."""
+    filtros = {"año": list(años), "barrio": list(barrios) if barrios else None}
+    df = load_backend().filas(list(columnas) if columnas else None, filtros)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+@medido("loader.load_filas", "carga")
+def load_filas(años, barrios=None, columnas=None):
+    """
+    Filas crudas filtradas por año/barrio con las `columnas` pedidas (todas si es None).
+    Con un backend SQL sólo se leen esas filas y columnas (cacheadas como tabla
+    Arrow compartida); en modo compartido se toma un slice (o las filas) de la
+    tabla mapeada; en ambos casos no se guardan más copias pandas en
+    `st.cache_data`. En modo pandas se parte del DataFrame de `load_data`
+    con sólo esos años (el filtro se empuja a la lectura) y su índice.
+    """
+    if load_backend() is not None:
+        tabla = _filas_backend(tuple(años), tuple(barrios) if barrios else None,
+                               tuple(columnas) if columnas else None)
+        return tabla.to_pandas(split_blocks=True)
+    if MODO_CARGA == "compartido":
+        dataset = load_compartido()
+        return dataset.a_pandas(dataset.filas(años=años, barrios=barrios), columnas)
+    años = tuple(sorted(años))
+    df = apply_filters(load_data(años=años), {"barrio": barrios or None}, indice=load_indice(años=años))
+    return df[columnas] if columnas else df
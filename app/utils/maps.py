@@ -1,14 +1,277 @@
-import os
+# app/utils/maps.py
+# folium, streamlit_folium, plotly, geopandas y matplotlib se importan dentro
+# de cada modo de visualización: la página carga rápido y cada usuario paga
+# sólo por el mapa que abre.
 import streamlit as st
-import folium
-from streamlit_folium import st_folium
-import geopandas as gpd
-from pyproj import Transformer
-from folium.plugins import HeatMap, HeatMapWithTime, MarkerCluster
+import numpy as np
 import pandas as pd
 
+from app.utils.loader import version_datos
+from app.utils.render_cache import html_cacheado
+from app.utils.geodata import distritos_nivel, etiquetas_wgs84, nivel_para_zoom, version_distritos
+from app.utils.perf import medido, medir
+from app.utils.queries import grilla_calor
+from app.utils.grid import (
+    GRANULARIDADES,
+    MAX_PUNTOS_FRAME,
+    ZOOM_PUNTOS,
+    frames_temporales,
+    puntos_visibles,
+)
 
-def page_mapa(df):
+CENTRO_CORDOBA = [-31.4, -64.2]
+ZOOM_INICIAL = 12
+MODOS_CALOR = ("Mapa de calor", "Mapa de calor temporal")
+MODO_HOTSPOTS = "Zonas calientes (KDE / Gi*)"
+CAPAS_HOTSPOTS = ("Densidad (KDE)", "Getis-Ord Gi*")
+COLORES_GI = {
+    "Caliente 99%": "#b2182b",
+    "Caliente 95%": "#ef8a62",
+    "Caliente 90%": "#fddbc7",
+    "Frío 90%": "#d1e5f0",
+    "Frío 95%": "#67a9cf",
+    "Frío 99%": "#2166ac",
+}
+
+
+@st.cache_data(max_entries=64)
+def _celdas_cacheadas(_df, version, clave, zoom, desglose):
+    """
+    Grilla agregada por (versión de los datos, filtros, zoom, desglose); `_df`
+    no se hashea, la versión y la clave lo identifican.
+    """
+    return _celdas(_df, zoom, desglose)
+
+
+@medido("maps.celdas", "agregacion")
+def _celdas(df, zoom, desglose):
+    return grilla_calor(df, zoom, desglose)
+
+
+@st.cache_data(max_entries=32)
+def _hotspots_cacheados(_df, version, clave, ancho_banda, celda):
+    """KDE y Gi* por (versión de los datos, filtros, ancho de banda, tamaño de celda)."""
+    return _hotspots(_df, ancho_banda, celda)
+
+
+@medido("maps.hotspots", "agregacion")
+def _hotspots(df, ancho_banda, celda):
+    from app.utils.hotspots import calcular_hotspots
+    return calcular_hotspots(df["lat"].to_numpy(), df["lon"].to_numpy(), ancho_banda, celda)
+
+
+def _columna_fecha(df):
+    return next((c for c in ("fecha_hora", "fecha") if c in df.columns), None)
+
+
+@medido("maps.mapa_calor", "mapa")
+def _mapa_calor(df, subopcion, granularidad=None):
+    """Mapa de calor (muestra de 3000 hechos) o mapa de calor temporal por período."""
+    import folium
+    from folium.plugins import HeatMap, HeatMapWithTime
+
+    m = folium.Map(location=CENTRO_CORDOBA, zoom_start=ZOOM_INICIAL)
+    if subopcion == "Mapa de calor":
+        muestra = df[["lat", "lon"]].dropna()
+        if len(muestra) > 3000:
+            muestra = muestra.sample(3000, random_state=42)
+        HeatMap(muestra.values.tolist(), radius=10, blur=8).add_to(m)
+    else:
+        columna_fecha = _columna_fecha(df)
+        if columna_fecha is not None:
+            etiquetas, frames = frames_temporales(
+                df[columna_fecha], df["lat"].to_numpy(), df["lon"].to_numpy(),
+                ZOOM_INICIAL, GRANULARIDADES[granularidad]
+            )
+            HeatMapWithTime(
+                frames,
+                index=etiquetas,
+                radius=10,
+                auto_play=True,
+                max_opacity=0.8
+            ).add_to(m)
+    _capas_distritos(m)
+    folium.LayerControl().add_to(m)
+    return m
+
+
+def _capas_distritos(m, zoom=ZOOM_INICIAL):
+    """
+    Distritos y etiquetas, ya en WGS84 (python -m app.utils.geodata), con el
+    nivel de detalle que se distingue a `zoom`: a zoom bajo viaja al navegador
+    una fracción de los vértices.
+    """
+    import folium
+
+    distritos = distritos_nivel(nivel_para_zoom(zoom))
+    if distritos is not None:
+        folium.GeoJson(
+            distritos,
+            name="Distritos",
+            style_function=lambda feature: {
+                "fillColor": "blue",
+                "color": "black",
+                "weight": 1,
+                "fillOpacity": 0.2
+            },
+            tooltip=folium.features.GeoJsonTooltip(fields=["nombre"], aliases=["Distrito:"]),
+            popup=folium.GeoJsonPopup(
+                fields=["nombre", "sup_km2", "pob_est_20"],
+                aliases=["Distrito", "Superficie km²", "Población estimada 2020"]
+            )
+        ).add_to(m)
+
+    for etiqueta in etiquetas_wgs84():
+        folium.Marker(
+            location=[etiqueta["lat"], etiqueta["lon"]],
+            icon=folium.DivIcon(
+                html=f'<div style="font-size:10pt; font-weight:bold; color:blue; white-space:nowrap">{etiqueta["nombre"]}</div>'
+            )
+        ).add_to(m)
+
+
+def _rectangulo(c):
+    return {"type": "Polygon", "coordinates": [[
+        [round(c.lon_min, 6), round(c.lat_min, 6)], [round(c.lon_max, 6), round(c.lat_min, 6)],
+        [round(c.lon_max, 6), round(c.lat_max, 6)], [round(c.lon_min, 6), round(c.lat_max, 6)],
+        [round(c.lon_min, 6), round(c.lat_min, 6)],
+    ]]}
+
+
+@medido("maps.mapa_hotspots", "mapa")
+def _mapa_hotspots(celdas, capa):
+    """
+    Celdas de la grilla de zonas calientes: densidad KDE (escala continua, se
+    omiten las celdas con menos del 1 % del máximo) o niveles de Gi* (sólo las
+    celdas significativas).
+    """
+    import folium
+    from branca.colormap import LinearColormap
+
+    m = folium.Map(location=CENTRO_CORDOBA, zoom_start=ZOOM_INICIAL)
+    if capa == "Densidad (KDE)":
+        maximo = float(celdas["densidad"].max()) if len(celdas) else 0.0
+        visibles = celdas[celdas["densidad"] > 0.01 * maximo] if maximo > 0 else celdas.iloc[:0]
+        escala = LinearColormap(["#ffffb2", "#fd8d3c", "#bd0026"], vmin=0, vmax=max(maximo, 1e-9),
+                                caption="Hechos por km²")
+        color = {i: escala(d) for i, d in zip(visibles.index, visibles["densidad"])}
+        escala.add_to(m)
+    else:
+        visibles = celdas[celdas["nivel"].isin(list(COLORES_GI))]
+        color = {i: COLORES_GI[n] for i, n in zip(visibles.index, visibles["nivel"])}
+
+    features = [
+        {
+            "type": "Feature",
+            "geometry": _rectangulo(c),
+            "properties": {
+                "color": color[i],
+                "hechos": int(c.hechos),
+                "densidad": round(float(c.densidad), 1),
+                "gi_z": None if np.isnan(c.gi_z) else round(float(c.gi_z), 2),
+                "nivel": c.nivel,
+            },
+        }
+        for i, c in zip(visibles.index, visibles.itertuples(index=False))
+    ]
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        name=capa,
+        style_function=lambda f: {
+            "fillColor": f["properties"]["color"],
+            "color": f["properties"]["color"],
+            "weight": 0,
+            "fillOpacity": 0.6,
+        },
+        tooltip=folium.features.GeoJsonTooltip(
+            fields=["hechos", "densidad", "gi_z", "nivel"],
+            aliases=["Hechos en la celda:", "Hechos por km² (KDE):", "z de Gi*:", "Nivel:"],
+        ),
+    ).add_to(m)
+    _capas_distritos(m)
+    folium.LayerControl().add_to(m)
+    return m
+
+
+def _detalle(celdas, tipos, top=3):
+    """Texto con los tipos de hecho más frecuentes de cada celda."""
+    if not tipos:
+        return None
+    matriz = celdas[tipos].to_numpy()
+    orden = np.argsort(-matriz, axis=1)[:, :top]
+    return [
+        "<br>".join(f"{tipos[j]}: {fila[j]}" for j in idx if fila[j] > 0)
+        for fila, idx in zip(matriz, orden)
+    ]
+
+
+@medido("maps.capa_celdas", "mapa")
+def _capa_celdas(celdas, tipos, como_circulos):
+    """
+    Una sola capa GeoJSON con una feature por celda: cuadrados coloreados
+    (modo Puntos) o círculos proporcionales a la cantidad (modo Clúster).
+    """
+    import folium
+    from branca.colormap import LinearColormap
+
+    maximo = max(int(celdas["hechos"].max()), 1) if len(celdas) else 1
+    escala = LinearColormap(["#ffffb2", "#fd8d3c", "#bd0026"], vmin=0, vmax=np.log1p(maximo))
+    detalle = _detalle(celdas, tipos)
+
+    features = []
+    for i, c in enumerate(celdas.itertuples(index=False)):
+        if como_circulos:
+            geometria = {"type": "Point", "coordinates": [round(c.lon, 6), round(c.lat, 6)]}
+        else:
+            geometria = _rectangulo(c)
+        propiedades = {
+            "hechos": int(c.hechos),
+            "color": escala(np.log1p(c.hechos)),
+            "radio": round(4 + 16 * np.sqrt(c.hechos / maximo), 1),
+        }
+        if detalle is not None:
+            propiedades["detalle"] = detalle[i]
+        features.append({"type": "Feature", "geometry": geometria, "properties": propiedades})
+
+    campos = ["hechos", "detalle"] if detalle is not None else ["hechos"]
+    alias = ["Hechos:", "Tipos más frecuentes:"] if detalle is not None else ["Hechos:"]
+    return folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        name="Hechos agregados",
+        marker=folium.CircleMarker(fill=True) if como_circulos else None,
+        style_function=lambda f: {
+            "fillColor": f["properties"]["color"],
+            "color": f["properties"]["color"],
+            "weight": 1 if como_circulos else 0,
+            "fillOpacity": 0.7,
+            "radius": f["properties"]["radio"],
+        },
+        tooltip=folium.features.GeoJsonTooltip(fields=campos, aliases=alias),
+    )
+
+
+def _conteo_distritos(df, columna, años=None):
+    """Hechos por `columna` (distrito): del backend o del rollup año × distrito; si no hay, de las filas."""
+    from app.utils.cube import contar
+    from app.utils.loader import load_agregado, load_backend, load_cubo
+
+    if años is not None:
+        if load_backend() is not None:
+            return contar(load_agregado((columna,), tuple(años)), columna)
+        fuente = load_cubo([columna], años=tuple(años))
+        if fuente is not None:
+            return contar(fuente, columna)
+    return contar(df, columna)
+
+
+def page_mapa(df, clave=None, años=None):
+    """
+    `clave`: identifica los filtros con los que se armó `df` (p. ej. los años
+    elegidos) y habilita las cachés: la grilla agregada por filtros y zoom, y
+    el HTML de los mapas de calor en disco.
+    `años`: años con los que se filtró `df`; si se pasan, los conteos por
+    distrito salen de los rollups (o del backend SQL) y no de las filas.
+    """
     st.title("Exploración de Mapas")
 
     opcion = st.radio(
@@ -22,99 +285,135 @@ def page_mapa(df):
     if "fecha" in df.columns:
         df["fecha"] = pd.to_datetime(df["fecha"], errors="coerce")
 
-    BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-
     # ----------------------
     # FOLIUM INTERACTIVO
     # ----------------------
     if opcion == "Folium interactivo":
         subopcion = st.selectbox(
             "Modo de visualización",
-            ["Puntos", "Clúster", "Mapa de calor", "Mapa de calor temporal"]
+            ["Puntos", "Clúster", "Mapa de calor", "Mapa de calor temporal", MODO_HOTSPOTS]
         )
 
-        m = folium.Map(location=[-31.4, -64.2], zoom_start=12)
+        # Último zoom/centro del mapa (los devuelve st_folium en cada interacción)
+        estado = st.session_state.get("mapa_folium") or {}
+        zoom = int(estado.get("zoom") or ZOOM_INICIAL)
+        centro = estado.get("center")
+        centro = [centro["lat"], centro["lng"]] if centro else CENTRO_CORDOBA
 
-        muestra = df[["lat", "lon"]].dropna()
-        if len(muestra) > 3000:
-            muestra = muestra.sample(3000, random_state=42)
+        if subopcion == MODO_HOTSPOTS:
+            # Estadísticas sobre todos los hechos (no una muestra), en una grilla fija
+            from app.utils.hotspots import ANCHO_BANDA_M, CELDA_M
+
+            capa = st.radio("Capa", CAPAS_HOTSPOTS, horizontal=True)
+            col1, col2 = st.columns(2)
+            celda = col1.select_slider("Tamaño de celda (m)", [100, 150, 250, 500, 1000], value=CELDA_M)
+            ancho_banda = col2.select_slider(
+                "Ancho de banda / vecindad (m)", [250, 500, 750, 1000, 1500, 2000], value=ANCHO_BANDA_M
+            )
+            st.caption(
+                "KDE gaussiana y z de Getis-Ord Gi* (vecinos a menos del ancho de banda) "
+                "sobre una grilla que cubre los distritos."
+            )
 
-        if subopcion == "Puntos":
-            for _, row in muestra.iterrows():
-                folium.CircleMarker(
-                    location=[row["lat"], row["lon"]],
-                    radius=2,
-                    color="red",
-                    fill=True,
-                    fill_opacity=0.6
-                ).add_to(m)
-
-        elif subopcion == "Clúster":
-            cluster = MarkerCluster().add_to(m)
-            for _, row in muestra.iterrows():
-                folium.Marker(
-                    location=[row["lat"], row["lon"]],
-                    popup=f"{row.get('delito', '')} - {row.get('fecha', '')}"
-                ).add_to(cluster)
-
-        elif subopcion == "Mapa de calor":
-            heat_data = muestra[["lat", "lon"]].values.tolist()
-            HeatMap(heat_data, radius=10, blur=8).add_to(m)
-
-        elif subopcion == "Mapa de calor temporal":
-            if "fecha" in df.columns:
-                df["dia"] = df["fecha"].dt.date
-                heat_data = [
-                    datos[["lat", "lon"]].dropna().values.tolist()
-                    for _, datos in df.groupby("dia")
-                ]
-                HeatMapWithTime(
-                    heat_data,
-                    radius=10,
-                    auto_play=True,
-                    max_opacity=0.8
-                ).add_to(m)
+            def construir():
+                if clave is not None:
+                    celdas = _hotspots_cacheados(df, version_datos(), clave, ancho_banda, celda)
+                else:
+                    celdas = _hotspots(df, ancho_banda, celda)
+                m = _mapa_hotspots(celdas, capa)
+                with medir("maps.serializar_html", "render"):
+                    return m.get_root().render()
+
+            if clave is not None:
+                html = html_cacheado(
+                    (version_datos(), version_distritos(), "mapa", clave, subopcion, capa, ancho_banda, celda), construir
+                )
             else:
-                st.warning("No hay columna 'fecha' disponible para mapa temporal.")
-
-        # Cargar distritos (GeoJSON)
-        shp_path = os.path.join(BASE_DIR, "../data", "distritos_policiales.geojson")
-        if os.path.exists(shp_path):
-            gdf = gpd.read_file(shp_path)
-            folium.GeoJson(
-                gdf,
-                name="Distritos",
-                style_function=lambda feature: {
-                    "fillColor": "blue",
-                    "color": "black",
-                    "weight": 1,
-                    "fillOpacity": 0.2
-                },
-                tooltip=folium.features.GeoJsonTooltip(fields=["nombre"], aliases=["Distrito:"]),
-                popup=folium.GeoJsonPopup(
-                    fields=["nombre", "sup_km2", "pob_est_20"],
-                    aliases=["Distrito", "Superficie km²", "Población estimada 2020"]
+                html = construir()
+            import streamlit.components.v1 as components
+            components.html(html, height=600)
+
+        elif subopcion in MODOS_CALOR:
+            # Los mapas de calor no dependen de la vista: el HTML completo se
+            # guarda en la caché en disco por (datos, filtros, modo)
+            granularidad = None
+            if subopcion == "Mapa de calor temporal":
+                if _columna_fecha(df) is None:
+                    st.warning("No hay columna 'fecha' disponible para mapa temporal.")
+                granularidad = st.radio(
+                    "Agrupar por", list(GRANULARIDADES), index=2, horizontal=True
                 )
-            ).add_to(m)
+                st.caption(f"Cada cuadro muestra como máximo {MAX_PUNTOS_FRAME} celdas.")
 
-        # Cargar etiquetas de distritos
-        geojson_path = os.path.join(BASE_DIR, "../data", "distritos_policiales_monbre.geojson")
-        if os.path.exists(geojson_path):
-            gdf_labels = gpd.read_file(geojson_path)
-            transformer = Transformer.from_crs("EPSG:22174", "EPSG:4326", always_xy=True)
-            gdf_labels["lon"], gdf_labels["lat"] = transformer.transform(
-                gdf_labels.geometry.x.values, gdf_labels.geometry.y.values
-            )
-            for _, row in gdf_labels.iterrows():
-                folium.Marker(
-                    location=[row["lat"], row["lon"]],
-                    icon=folium.DivIcon(
-                        html=f'<div style="font-size:10pt; font-weight:bold; color:blue; white-space:nowrap">{row["nombre"]}</div>'
-                    )
-                ).add_to(m)
+            def construir():
+                m = _mapa_calor(df, subopcion, granularidad)
+                with medir("maps.serializar_html", "render"):
+                    return m.get_root().render()
 
-        folium.LayerControl().add_to(m)
-        st_folium(m, use_container_width=True, height=600)
+            if clave is not None:
+                html = html_cacheado(
+                    (version_datos(), version_distritos(), "mapa", clave, subopcion, granularidad), construir
+                )
+            else:
+                html = construir()
+            import streamlit.components.v1 as components
+            components.html(html, height=600)
+
+        else:
+            import folium
+            from folium.plugins import MarkerCluster
+            from streamlit_folium import st_folium
+
+            m = folium.Map(location=centro, zoom_start=zoom)
+            bounds = estado.get("bounds")
+            if zoom >= ZOOM_PUNTOS and bounds:
+                # Zoom alto: hechos individuales, sólo los visibles (con tope)
+                visibles = (
+                    (bounds["_southWest"]["lat"], bounds["_southWest"]["lng"]),
+                    (bounds["_northEast"]["lat"], bounds["_northEast"]["lng"]),
+                )
+                filas = puntos_visibles(df["lat"].to_numpy(), df["lon"].to_numpy(), visibles)
+                puntos = df.iloc[filas]
+                st.caption(f"Mostrando {len(puntos):,} hechos individuales del área visible.")
+                if subopcion == "Puntos":
+                    for row in puntos.itertuples(index=False):
+                        folium.CircleMarker(
+                            location=[row.lat, row.lon],
+                            radius=2,
+                            color="red",
+                            fill=True,
+                            fill_opacity=0.6
+                        ).add_to(m)
+                else:
+                    cluster = MarkerCluster().add_to(m)
+                    for row in puntos.itertuples(index=False):
+                        folium.Marker(
+                            location=[row.lat, row.lon],
+                            popup=f"{getattr(row, 'delito', '')} - {getattr(row, 'fecha', '')}"
+                        ).add_to(cluster)
+            else:
+                # Zoom bajo/medio: todos los hechos agregados en celdas
+                desglose = st.checkbox("Desglose por tipo de hecho", value=False)
+                if clave is not None:
+                    celdas = _celdas_cacheadas(df, version_datos(), clave, zoom, desglose)
+                else:
+                    celdas = _celdas(df, zoom, desglose)
+                tipos = [c for c in celdas.columns if c not in
+                         ("lat", "lon", "lat_min", "lat_max", "lon_min", "lon_max", "hechos")]
+                _capa_celdas(celdas, tipos, como_circulos=(subopcion == "Clúster")).add_to(m)
+                st.caption(
+                    f"{int(celdas['hechos'].sum()):,} hechos en {len(celdas):,} celdas. "
+                    f"Acercá el mapa (zoom {ZOOM_PUNTOS}+) para ver hechos individuales."
+                )
+
+            _capas_distritos(m, zoom)
+            folium.LayerControl().add_to(m)
+            # st_folium serializa el mapa completo a HTML en cada corrida
+            with medir("maps.st_folium", "render"):
+                st_folium(
+                    m, use_container_width=True, height=600,
+                    key="mapa_folium", returned_objects=["zoom", "center", "bounds"]
+                )
 
     # ----------------------
     # PLOTLY
@@ -124,44 +423,65 @@ def page_mapa(df):
         subopcion = st.selectbox("Modo de visualización", ["Scatter", "Mapa de densidad"])
 
         if subopcion == "Scatter":
-            fig = px.scatter_mapbox(
-                df,
-                lat="lat", lon="lon",
-                color="delito" if "delito" in df.columns else None,
-                hover_data=["fecha"] if "fecha" in df.columns else None,
-                zoom=11,
-                height=600
-            )
-            fig.update_layout(mapbox_style="carto-positron")
-            st.plotly_chart(fig, use_container_width=True)
+            with medir("maps.plotly_scatter", "figura", len(df)):
+                fig = px.scatter_mapbox(
+                    df,
+                    lat="lat", lon="lon",
+                    color="delito" if "delito" in df.columns else None,
+                    hover_data=["fecha"] if "fecha" in df.columns else None,
+                    zoom=11,
+                    height=600
+                )
+                fig.update_layout(mapbox_style="carto-positron")
+            with medir("maps.plotly_chart", "render"):
+                st.plotly_chart(fig, use_container_width=True)
 
         elif subopcion == "Mapa de densidad":
-            fig = px.density_mapbox(
-                df,
-                lat="lat", lon="lon",
-                z=None,
-                radius=15,
-                hover_data=["fecha", "delito"] if "delito" in df.columns else None,
-                zoom=11,
-                height=600
-            )
-            fig.update_layout(mapbox_style="stamen-terrain")
-            st.plotly_chart(fig, use_container_width=True)
+            with medir("maps.plotly_densidad", "figura", len(df)):
+                fig = px.density_mapbox(
+                    df,
+                    lat="lat", lon="lon",
+                    z=None,
+                    radius=15,
+                    hover_data=[c for c in ("fecha", "delito") if c in df.columns] or None,
+                    zoom=11,
+                    height=600
+                )
+                fig.update_layout(mapbox_style="stamen-terrain")
+            with medir("maps.plotly_chart", "render"):
+                st.plotly_chart(fig, use_container_width=True)
 
     # ----------------------
     # GEOPANDAS
     # ----------------------
     elif opcion == "GeoPandas estático":
+        import geopandas as gpd
         import matplotlib.pyplot as plt
         st.subheader("Delitos por distrito (estático)")
 
-        if "distrito" in df.columns:
-            conteo = df.groupby("distrito")["id"].count().reset_index()
-            shp_path = os.path.join(BASE_DIR, "../data", "distritos_policiales.geojson")
-            if os.path.exists(shp_path):
-                gdf = gpd.read_file(shp_path)
-                gdf = gdf.merge(conteo, on="distrito", how="left").fillna(0)
+        # figura de ~800 px para toda la ciudad: alcanza el detalle del zoom inicial
+        distritos = distritos_nivel(nivel_para_zoom(ZOOM_INICIAL))
+        if distritos is None:
+            st.error("Archivo de distritos no encontrado.")
+        elif "distrito" in df.columns:
+            from app.utils.rates import MEDIDAS, aplicar_medida
+
+            medida = st.radio("Medida", list(MEDIDAS), horizontal=True)
+            # los polígonos se llaman como distrito_geo ("DISTRITO 12 A"); si no está, por distrito
+            columna = "distrito_geo" if "distrito_geo" in df.columns else "distrito"
+            gdf = gpd.GeoDataFrame.from_features(distritos["features"], crs="EPSG:4326")
+            conteo = _conteo_distritos(df, columna, años)
+            conteo.index = conteo.index.astype(str)
+            if columna == "distrito":
+                # cada polígono toma el valor de su distrito base ("DISTRITO 12 A" -> "DISTRITO 12")
+                from app.utils.spatial import distrito_base
+                claves = gdf["nombre"].map(distrito_base)
+            else:
+                claves = gdf["nombre"]
+            conteo = conteo.reindex(pd.Index(claves.unique(), name=columna), fill_value=0)
+            gdf["id"] = claves.map(aplicar_medida(conteo, medida, columna)).fillna(0)
 
+            with medir("maps.geopandas_plot", "figura", len(gdf)):
                 fig, ax = plt.subplots(figsize=(8, 8))
                 gdf.plot(
                     column="id",
@@ -171,7 +491,6 @@ def page_mapa(df):
                     legend=True,
                     ax=ax
                 )
-                plt.title("Cantidad de hechos por distrito")
+                plt.title(f"{medida} por distrito")
+            with medir("maps.pyplot", "render"):
                 st.pyplot(fig)
-            else:
-                st.error("Archivo de distritos no encontrado.")
@@ -0,0 +1,150 @@
+# app/utils/normalize.py
+"""
+Normalización de texto compartida por preprocess y extract_mapping.
+
+Las columnas de texto tienen pocos cientos de valores distintos repetidos en
+millones de filas, así que todo se hace sobre el vocabulario: se factoriza la
+columna, se normaliza cada valor distinto una sola vez y el resultado se
+expande a las filas con los códigos.
+
+Canonicalización opcional: variantes de un mismo nombre que sólo difieren en
+espacios, tildes o puntuación ("GENERALBUSTOS", "VILLA  GENERAL SAVIO (VE)",
+"GUINAZU") se unifican en una forma canónica. Con `fuzzy=True`, los valores
+que no coinciden con ninguna clave del vocabulario se buscan por similitud
+(difflib) exigiendo los mismos números ("NUESTRO HOGAR 2" nunca se une con
+"NUESTRO HOGAR 3"). Lo resuelto queda en una tabla de alias en caché.
+
+Con `cerrado=True` el vocabulario es un conjunto de claves válidas (p. ej.
+las del mapping de comisarías): un valor que ya es clave no se toca, y los
+demás sólo se reescriben a una clave existente; si no hay ninguna, quedan
+como estaban.
+"""
+
+import difflib
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+VALORES_NULOS = ["", "s/d", "SIN DATOS", "-"]
+UMBRAL_FUZZY = 0.92
+
+_NO_ALFANUMERICO = re.compile(r"[^A-Z0-9]")
+_DIGITOS = re.compile(r"\d+")
+
+
+def normalize_text(s):
+    if pd.isna(s):
+        return None
+    s = str(s).strip()
+    if s in VALORES_NULOS:
+        return None
+    return s.upper()
+
+
+def normalizar_columna(serie, funcion=normalize_text):
+    """
+    Aplica `funcion` a cada valor distinto de `serie` y expande el resultado
+    a todas las filas (Series de tipo object, mismos índices).
+    """
+    codigos, unicos = pd.factorize(serie)
+    # el código -1 (nulo) toma el último elemento, que es None
+    normalizados = np.array([funcion(v) for v in unicos] + [None], dtype=object)
+    return pd.Series(normalizados[codigos], index=serie.index, name=serie.name)
+
+
+def sin_tildes(valor):
+    return unicodedata.normalize("NFKD", valor).encode("ascii", "ignore").decode("ascii")
+
+
+def clave(valor):
+    """Clave de comparación: sin tildes, sin espacios ni puntuación."""
+    return _NO_ALFANUMERICO.sub("", sin_tildes(valor.upper()))
+
+
+def forma_limpia(valor):
+    """Espacios repetidos colapsados (y sin espacios al borde)."""
+    return " ".join(valor.split())
+
+
+def _preferencia(valor):
+    # más palabras (GENERAL BUSTOS > GENERALBUSTOS), con tildes/Ñ, menos puntuación, más corta
+    return (
+        -len(valor.split()),
+        -sum(ord(c) > 127 for c in valor),
+        sum(not c.isalnum() and not c.isspace() for c in valor),
+        len(valor),
+        valor,
+    )
+
+
+class Canonizador:
+    """
+    Resuelve cada valor a la forma canónica de su grupo dentro de `vocabulario`.
+    Los resultados se guardan en `alias` (valor -> canónico), así que cada
+    valor distinto se resuelve una sola vez por proceso.
+    """
+
+    def __init__(self, vocabulario, fuzzy=False, umbral=UMBRAL_FUZZY, cerrado=False):
+        grupos = {}
+        for valor in vocabulario:
+            if valor:
+                grupos.setdefault(clave(valor), []).append(valor)
+        # cerrado: el canónico es una clave tal cual está en el vocabulario
+        limpiar = (lambda v: v) if cerrado else forma_limpia
+        self.por_clave = {k: limpiar(min(g, key=_preferencia)) for k, g in grupos.items()}
+        self.claves = sorted(self.por_clave)
+        self.vocabulario = set(vocabulario) if cerrado else None
+        self.fuzzy = fuzzy
+        self.umbral = umbral
+        self.alias = {}
+
+    def _buscar(self, valor):
+        if self.vocabulario is not None and valor in self.vocabulario:
+            return valor
+        k = clave(valor)
+        canonico = self.por_clave.get(k)
+        if canonico is None and self.fuzzy and k:
+            for candidato in difflib.get_close_matches(k, self.claves, n=3, cutoff=self.umbral):
+                if _DIGITOS.findall(candidato) == _DIGITOS.findall(k):
+                    canonico = self.por_clave[candidato]
+                    break
+        if canonico is None:
+            return valor if self.vocabulario is not None else forma_limpia(valor)
+        return canonico
+
+    def __call__(self, valor):
+        if valor is None:
+            return None
+        canonico = self.alias.get(valor)
+        if canonico is None:
+            canonico = self.alias[valor] = self._buscar(valor)
+        return canonico
+
+    def variantes(self):
+        """Tabla de alias resueltos hasta ahora, sólo los que cambian de forma."""
+        return {v: c for v, c in self.alias.items() if v != c}
+
+
+@lru_cache(maxsize=16)
+def canonizador(vocabulario, fuzzy=False, umbral=UMBRAL_FUZZY, cerrado=False):
+    """Canonizador en caché por vocabulario (tupla), con su tabla de alias."""
+    return Canonizador(vocabulario, fuzzy=fuzzy, umbral=umbral, cerrado=cerrado)
+
+
+def canonicalizar_columna(serie, vocabulario=None, fuzzy=False, umbral=UMBRAL_FUZZY, cerrado=False):
+    """
+    Unifica las variantes de `serie` (ya normalizada). Sin `vocabulario`, los
+    grupos se arman con los propios valores de la columna; con `cerrado`, sólo
+    se reescriben los valores que no son claves del vocabulario, y siempre a
+    una clave.
+    Devuelve (serie, variantes) con la tabla {variante: canónico} aplicada.
+    """
+    if vocabulario is None:
+        vocabulario = tuple(sorted(v for v in pd.unique(serie.dropna())))
+    resolver = canonizador(tuple(vocabulario), fuzzy, umbral, cerrado)
+    resultado = normalizar_columna(serie, resolver)
+    presentes = set(pd.unique(serie.dropna()))
+    return resultado, {v: c for v, c in resolver.variantes().items() if v in presentes}
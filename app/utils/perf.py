@@ -0,0 +1,358 @@
+# app/utils/perf.py
+"""
+Instrumentación de rendimiento del dashboard.
+
+Cada punto medido (`@medido` en funciones, `with medir(...)` en bloques)
+registra tiempo, filas de entrada/salida y memoria. Las mediciones se anidan
+(p. ej. `load_filas` contiene `load_data` y `apply_filters`): se guarda el
+tiempo total y el propio (sin las mediciones hijas), así el desglose por
+categoría no cuenta dos veces.
+
+`with rerun("Página")` agrupa todo lo medido durante una corrida de una
+página; si la sesión lo pidió desde el panel (pages/Configuracion.py), la
+corrida se perfila con cProfile.
+
+Memoria: por defecto, la variación del RSS del proceso (barato); con
+`configurar(memoria="tracemalloc")`, el pico de allocations de Python/numpy
+durante la medición. Ambas son del proceso completo: con varias sesiones en
+paralelo son aproximadas.
+
+Exportación (directorio DELITOS_PERF_DIR, por defecto data/.cache/perf):
+- perf.log: una línea JSON por medición y por corrida (log rotativo);
+- metrics.prom: acumulados en formato de texto de Prometheus (para el
+  textfile collector de node_exporter), reescrito como mucho cada
+  INTERVALO_EXPORTACION segundos.
+
+Se desactiva con DELITOS_PERF=0.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+PERF_DIR = Path(os.environ.get("DELITOS_PERF_DIR", "data/.cache/perf"))
+LOG_BYTES = 5 * 1024 * 1024
+LOG_COPIAS = 3
+MAX_RERUNS = 200
+MAX_PERFILES = 20
+MUESTRAS_POR_NOMBRE = 500
+INTERVALO_EXPORTACION = 5.0
+CATEGORIAS = ["carga", "filtro", "agregacion", "figura", "mapa", "render"]
+
+MODOS_MEMORIA = ("rss", "tracemalloc")
+
+_config = {"activo": os.environ.get("DELITOS_PERF", "1") != "0", "memoria": "rss"}
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def configurar(activo=None, memoria=None):
+    """Activa/desactiva la instrumentación o cambia el modo de memoria (MODOS_MEMORIA), para todo el proceso."""
+    if activo is not None:
+        _config["activo"] = bool(activo)
+    if memoria is not None:
+        if memoria not in MODOS_MEMORIA:
+            raise ValueError(f"Modo de memoria desconocido: {memoria} ({', '.join(MODOS_MEMORIA)})")
+        _config["memoria"] = memoria
+        if memoria == "tracemalloc" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif memoria != "tracemalloc" and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return dict(_config)
+
+
+def _rss():
+    """RSS actual del proceso en bytes (Linux); None si no se puede leer."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _filas(objeto):
+    """Filas de un DataFrame/Series/array; None para cualquier otra cosa."""
+    if hasattr(objeto, "shape") and getattr(objeto, "shape", None):
+        return int(objeto.shape[0])
+    return None
+
+
+def _pila():
+    pila = getattr(_local, "pila", None)
+    if pila is None:
+        pila = _local.pila = []
+    return pila
+
+
+def _marcar_pico(pila):
+    """Lleva el pico de tracemalloc desde el último reset a todas las mediciones abiertas."""
+    pico = tracemalloc.get_traced_memory()[1]
+    for m in pila:
+        m["_pico"] = max(m["_pico"], pico)
+    tracemalloc.reset_peak()
+
+
+class Registro:
+    """Mediciones del proceso: últimas corridas por página y acumulados por nombre."""
+
+    def __init__(self):
+        self.reruns = deque(maxlen=MAX_RERUNS)
+        self.acumulados = {}
+        self._ultima_exportacion = 0.0
+
+    def agregar(self, medicion):
+        with _lock:
+            a = self.acumulados.get(medicion["nombre"])
+            if a is None:
+                a = self.acumulados[medicion["nombre"]] = {
+                    "categoria": medicion["categoria"], "llamadas": 0, "segundos": 0.0, "propio": 0.0,
+                    "max": 0.0, "filas_salida": 0, "memoria_max": None,
+                    "muestras": deque(maxlen=MUESTRAS_POR_NOMBRE),
+                }
+            a["llamadas"] += 1
+            a["segundos"] += medicion["segundos"]
+            a["propio"] += medicion["propio"]
+            a["max"] = max(a["max"], medicion["segundos"])
+            a["filas_salida"] += medicion["filas_salida"] or 0
+            if medicion["memoria"] is not None:
+                a["memoria_max"] = max(a["memoria_max"] or 0, medicion["memoria"])
+            a["muestras"].append(medicion["segundos"])
+        _log().info(json.dumps({"tipo": "medicion", **medicion}, ensure_ascii=False, default=str))
+
+    def agregar_rerun(self, corrida):
+        with _lock:
+            self.reruns.append(corrida)
+        resumen = {k: v for k, v in corrida.items() if k not in ("mediciones", "perfil")}
+        _log().info(json.dumps({"tipo": "rerun", **resumen}, ensure_ascii=False, default=str))
+        self.exportar()
+
+    def instantanea(self):
+        """Copia de las corridas (más nuevas primero) y de los acumulados, para mostrar."""
+        with _lock:
+            reruns = list(reversed(self.reruns))
+            acumulados = {n: {**a, "muestras": list(a["muestras"])} for n, a in self.acumulados.items()}
+        return reruns, acumulados
+
+    def vaciar(self):
+        with _lock:
+            self.reruns.clear()
+            self.acumulados.clear()
+
+    def exportar(self, forzar=False):
+        """Reescribe metrics.prom si pasó INTERVALO_EXPORTACION desde la última vez (o si `forzar`)."""
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultima_exportacion < INTERVALO_EXPORTACION:
+            return None
+        self._ultima_exportacion = ahora
+        path = PERF_DIR / "metrics.prom"
+        try:
+            PERF_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(self.prometheus(), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            return None
+        return path
+
+    def prometheus(self):
+        """Acumulados en formato de texto de Prometheus."""
+        with _lock:
+            acumulados = {n: dict(a) for n, a in self.acumulados.items()}
+            por_pagina = {}
+            for r in self.reruns:
+                p = por_pagina.setdefault(r["pagina"], [0, 0.0])
+                p[0] += 1
+                p[1] += r["segundos"]
+
+        def etiqueta(nombre, a):
+            return f'{{nombre="{nombre}",categoria="{a["categoria"]}"}}'
+
+        metricas = [
+            ("delitos_perf_llamadas_total", "counter", "Llamadas medidas.", "llamadas"),
+            ("delitos_perf_segundos_total", "counter", "Segundos acumulados (incluye mediciones anidadas).", "segundos"),
+            ("delitos_perf_segundos_propios_total", "counter", "Segundos acumulados sin las mediciones anidadas.", "propio"),
+            ("delitos_perf_segundos_max", "gauge", "Llamada más lenta, en segundos.", "max"),
+            ("delitos_perf_filas_salida_total", "counter", "Filas devueltas acumuladas.", "filas_salida"),
+            ("delitos_perf_memoria_bytes_max", "gauge", "Mayor memoria medida en una llamada, en bytes.", "memoria_max"),
+        ]
+        lineas = []
+        for nombre, tipo, ayuda, campo in metricas:
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+            lineas += [f"{nombre}{etiqueta(n, a)} {a[campo]:.10g}" for n, a in acumulados.items() if a[campo] is not None]
+        lineas += ["# HELP delitos_perf_reruns_recientes Corridas medidas por página (últimas en memoria).",
+                   "# TYPE delitos_perf_reruns_recientes gauge"]
+        lineas += [f'delitos_perf_reruns_recientes{{pagina="{p}"}} {n}' for p, (n, _) in por_pagina.items()]
+        lineas += ["# HELP delitos_perf_rerun_segundos_recientes Segundos de las corridas por página (últimas en memoria).",
+                   "# TYPE delitos_perf_rerun_segundos_recientes gauge"]
+        lineas += [f'delitos_perf_rerun_segundos_recientes{{pagina="{p}"}} {s:.10g}' for p, (_, s) in por_pagina.items()]
+        return "\n".join(lineas) + "\n"
+
+
+@lru_cache(maxsize=None)
+def registro():
+    return Registro()
+
+
+@lru_cache(maxsize=None)
+def _log():
+    """Logger del log rotativo (sin handler si no se puede crear el directorio)."""
+    logger = logging.getLogger("delitos.perf")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    try:
+        PERF_DIR.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(PERF_DIR / "perf.log", maxBytes=LOG_BYTES,
+                                      backupCount=LOG_COPIAS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    except OSError:
+        logger.addHandler(logging.NullHandler())
+    return logger
+
+
+@contextmanager
+def medir(nombre, categoria=None, filas_entrada=None):
+    """
+    Mide un bloque. Devuelve un dict donde se puede anotar `filas_salida`
+    (o `filas_entrada`) antes de salir.
+    """
+    if not _config["activo"]:
+        yield {}
+        return
+    pila = _pila()
+    usar_tracemalloc = _config["memoria"] == "tracemalloc" and tracemalloc.is_tracing()
+    if usar_tracemalloc:
+        _marcar_pico(pila)
+    m = {
+        "nombre": nombre, "categoria": categoria, "filas_entrada": filas_entrada, "filas_salida": None,
+        "nivel": len(pila), "_hijos": 0.0,
+        "_memoria": tracemalloc.get_traced_memory()[0] if usar_tracemalloc else _rss(),
+    }
+    m["_pico"] = m["_memoria"] if usar_tracemalloc else 0
+    pila.append(m)
+    inicio = time.perf_counter()
+    try:
+        yield m
+    finally:
+        segundos = time.perf_counter() - inicio
+        if usar_tracemalloc:
+            _marcar_pico(pila)
+            memoria = m["_pico"] - m["_memoria"]
+        else:
+            rss = _rss()
+            memoria = rss - m["_memoria"] if rss is not None and m["_memoria"] is not None else None
+        pila.pop()
+        if pila:
+            pila[-1]["_hijos"] += segundos
+        medicion = {
+            "nombre": nombre, "categoria": categoria, "nivel": m["nivel"],
+            "inicio": time.time() - segundos, "segundos": segundos,
+            "propio": max(segundos - m["_hijos"], 0.0),
+            "filas_entrada": m["filas_entrada"], "filas_salida": m["filas_salida"],
+            "memoria": memoria, "memoria_tipo": "tracemalloc" if usar_tracemalloc else "rss",
+        }
+        corrida = getattr(_local, "corrida", None)
+        if corrida is not None:
+            corrida["mediciones"].append(medicion)
+        registro().agregar(medicion)
+
+
+def medido(nombre, categoria=None):
+    """
+    Decorador de `medir`: filas de entrada = las del primer argumento,
+    filas de salida = las del resultado (si son DataFrames/Series/arrays).
+
+    Con st.cache_data/st.cache_resource va debajo del decorador de caché:
+    mide sólo las llamadas que no salen de la caché.
+    """
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _config["activo"]:
+                return funcion(*args, **kwargs)
+            with medir(nombre, categoria, _filas(args[0]) if args else None) as m:
+                resultado = funcion(*args, **kwargs)
+                m["filas_salida"] = _filas(resultado)
+                return resultado
+        return envoltura
+    return decorador
+
+
+def _contexto_streamlit():
+    """Contexto de la corrida de Streamlit del hilo actual (None fuera de Streamlit)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        return get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        return None
+
+
+def _perfilar_sesion(ctx):
+    """True si la sesión pidió cProfile desde el panel."""
+    if ctx is None:
+        return False
+    import streamlit as st
+
+    return bool(st.session_state.get("perf_cprofile"))
+
+
+def _guardar_perfil(perfil, pagina, inicio):
+    """Guarda el .prof (para snakeviz / pstats) y borra los más viejos; devuelve la ruta."""
+    try:
+        PERF_DIR.mkdir(parents=True, exist_ok=True)
+        path = PERF_DIR / f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(inicio))}_{pagina}.prof"
+        perfil.dump_stats(path)
+        for viejo in sorted(PERF_DIR.glob("*.prof"))[:-MAX_PERFILES]:
+            viejo.unlink(missing_ok=True)
+        return path
+    except OSError:
+        return None
+
+
+@contextmanager
+def rerun(pagina, perfilar=None):
+    """
+    Agrupa las mediciones de una corrida de `pagina`. Con `perfilar` (por
+    defecto, lo que pidió la sesión en el panel) la corrida corre bajo
+    cProfile y se guardan las funciones más costosas.
+    """
+    if not _config["activo"] or getattr(_local, "corrida", None) is not None:
+        yield
+        return
+    ctx = _contexto_streamlit()
+    corrida = _local.corrida = {
+        "pagina": pagina, "sesion": ctx.session_id if ctx is not None else None,
+        "inicio": time.time(), "segundos": 0.0, "mediciones": [], "perfil": None, "perfil_path": None,
+    }
+    perfil = None
+    if perfilar if perfilar is not None else _perfilar_sesion(ctx):
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:  # otro perfilador activo en el proceso
+            perfil = None
+    inicio = time.perf_counter()
+    try:
+        yield corrida
+    finally:
+        corrida["segundos"] = time.perf_counter() - inicio
+        if perfil is not None:
+            perfil.disable()
+            texto = io.StringIO()
+            pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(40)
+            corrida["perfil"] = texto.getvalue()
+            corrida["perfil_path"] = _guardar_perfil(perfil, pagina, corrida["inicio"])
+        _local.corrida = None
+        registro().agregar_rerun(corrida)
@@ -2,12 +2,33 @@
 #!/usr/bin/env python3
 """
 Limpia y guarda un dataset optimizado (parquet / csv.gz) desde el CSV consolidado.
-Ejecutar: python app/utils/preprocess.py
+Ejecutar: python -m app.utils.preprocess
+Modo streaming (memoria acotada): python -m app.utils.preprocess --chunksize 200000
+Unificar variantes de barrio con el mapping de comisarías: --canonicalizar-barrios
 """
 
+import argparse
 import pandas as pd 
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path 
-import json 
+
+from app.utils.coords import completar_latlon, marcar_fuera_de_cordoba
+from app.utils.geodata import construir_faltantes
+from app.utils.normalize import canonicalizar_columna, normalizar_columna
+from app.utils.cube import OUT_CUBOS, acumular_rollups, construir_rollups
+from app.utils.reglas import reglas_desde_mapping, reglas_distrito
+from app.utils.spatial import asignar_distrito_espacial, imprimir_reporte_espacial
+from app.utils.schema import aplicar_esquema, bytes_por_columna, imprimir_reporte_memoria
+from app.utils.hierarchy import (
+    NIVELES_BARRIO,
+    backfill_jerarquia,
+    cargar_lookup,
+    cargar_mapping,
+    imprimir_reporte,
+    posiciones_en_lookup,
+    rellenar_desde_lookup,
+)
 
 INPUT = Path("data/delitos_cordoba_2019_2023.csv") 
 OUT_PARQUET = Path("data/delitos_cordoba_2019_2023_clean.parquet") 
@@ -16,27 +37,28 @@ MAPPING_JSON = Path("data/delitos_mapping.json")
 MAPPING_JSON_COMISARIA = Path("data/comisarias_mapping.json")
 MAPPING_JSON_DISTRITO = Path("data/distritos_mapping.json")
 
-def normalize_text(s):
-    if pd.isna(s):
-        return None
-    s = str(s).strip()
-    if s in ["", "s/d", "SIN DATOS", "-"]:
-        return None
-    return s.upper()
-
-def main():
-    if not INPUT.exists():
-        raise FileNotFoundError(f"No existe {INPUT}. Coloca el CSV en data/ y vuelve a intentar.")
-
-    print("Leyendo CSV (low_memory=False)...")
-    df = pd.read_csv(INPUT, low_memory=False, dtype=str)  # todo string primero
-    print("Filas leídas:", len(df))
-
+def limpiar(df, verbose=True, canonicalizar_barrios=False):
+    """
+    Aplica toda la limpieza a un DataFrame leído con dtype=str.
+    Sirve tanto para el CSV completo como para cada chunk del modo streaming:
+    no depende de otras filas, salvo la eliminación de columnas totalmente
+    nulas, que se hace al final sobre el resultado completo.
+
+    Con `canonicalizar_barrios`, los barrios que no son claves del mapping de
+    comisarías se reescriben a la clave de la que son variante (espacios,
+    tildes, puntuación); los que ya son claves no se tocan.
+    """
     # Convertir columnas numéricas clave
     for c in ["latitud", "longitud", "X", "Y"]:
         if c in df.columns:
             df[c] = pd.to_numeric(df[c], errors="coerce")
 
+    # Completar lat/lon desde X/Y (POSGAR) en un solo lote y marcar las que caen fuera de Córdoba
+    completadas = completar_latlon(df)
+    fuera = marcar_fuera_de_cordoba(df)
+    if verbose:
+        print(f"📍 Coordenadas completadas desde X/Y: {completadas}; fuera de Córdoba: {fuera}")
+
     # Normalizar fecha/hora
     if "fecha_hora" in df.columns:
         df["fecha_hora"] = pd.to_datetime(df["fecha_hora"], errors="coerce")
@@ -47,71 +69,113 @@ def main():
                 errors="coerce"
             )
 
-    # Normalizar el distrito (algunos tienen "DISTRITO X")
+    # Normalizar el distrito (algunos tienen "DISTRITO X"):
+    # "DISTRITO (numeros romanos)" por valor numérico, en una sola pasada por valor distinto
     if "distrito" in df.columns:
-        # cambiar "DISTRITO (numeros romanos)" por valor numérico
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO XIII", "DISTRITO 13", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO XII", "DISTRITO 12", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO XI", "DISTRITO 11", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO X", "DISTRITO 10", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO IX", "DISTRITO 9", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO VIII", "DISTRITO 8", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO VII", "DISTRITO 7", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO VI", "DISTRITO 6", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO V", "DISTRITO 5", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO IV", "DISTRITO 4", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO III", "DISTRITO 3", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO II", "DISTRITO 2", case=False, regex=True)
-        df["distrito"] = df["distrito"].str.replace(r"DISTRITO I", "DISTRITO 1", case=False, regex=True)
-        
+        df["distrito"] = reglas_distrito().aplicar(df["distrito"])
 
     # Extraer componentes temporales
-    df["año"] = df["fecha_hora"].dt.year
-    df["mes"] = df["fecha_hora"].dt.month
-    df["dia"] = df["fecha_hora"].dt.day
-    df["hora"] = df["fecha_hora"].dt.hour
-    df["weekday"] = df["fecha_hora"].dt.dayofweek  # 0 = lunes
-
-    # Normalizar texto
+    # (float64 siempre, para que todos los chunks tengan el mismo tipo aunque no tengan NaT)
+    df["año"] = df["fecha_hora"].dt.year.astype("float64")
+    df["mes"] = df["fecha_hora"].dt.month.astype("float64")
+    df["dia"] = df["fecha_hora"].dt.day.astype("float64")
+    df["hora"] = df["fecha_hora"].dt.hour.astype("float64")
+    df["weekday"] = df["fecha_hora"].dt.dayofweek.astype("float64")  # 0 = lunes
+
+    # Normalizar texto (una vez por valor distinto, no por fila)
     for col in ["barrio", "comisaria", "prevenible", "distrito", "zona", "calle", "cuadrantes"]:
         if col in df.columns:
-            df[col] = df[col].apply(normalize_text)
+            df[col] = normalizar_columna(df[col])
 
-    # IDs únicos por año
+    # Opcional: unificar variantes de barrio (espacios, tildes, puntuación) con las claves del mapping
+    barrios = cargar_lookup(MAPPING_JSON_COMISARIA) if canonicalizar_barrios else None
+    if barrios is not None and len(barrios) and "barrio" in df.columns:
+        df["barrio"], variantes = canonicalizar_columna(df["barrio"], tuple(barrios.index), cerrado=True)
+        if verbose and variantes:
+            print(f"🔤 Variantes de barrio unificadas: {len(variantes)}")
+
+    # IDs únicos por año (año entero: "2022_123", no "2022.0_123"; sin fecha, "nan_123" como siempre)
     if "id" in df.columns and "año" in df.columns:
-        df["id"] = df["año"].astype(str) + "_" + df["id"].astype(str)
+        año = df["año"].astype("Int64").astype(str).where(df["año"].notna(), "nan")
+        df["id"] = año + "_" + df["id"].astype(str)
 
     # --- 🔹 LIMPIEZA DE COLUMNAS ---
     # Eliminar duplicadas (Latitud/Longitud en string, ya tenemos numéricas)
     df = df.drop(columns=["Latitud", "Longitud"], errors="ignore")
 
+    # Eliminar columnas redundantes
+    redundantes = ["fecha", "fecha_hech", "hora_hecho"]  # ya tenemos fecha_hora
+    df = df.drop(columns=redundantes, errors="ignore")
+
+    # limpieza de delitos
+    df = aplicar_mapping(df, MAPPING_JSON, column="prevenible", verbose=verbose)
+
+    # Completar comisaria/distrito/zona desde barrio y zona desde distrito; el
+    # mapping de barrios también trae distritos con numerales romanos: se
+    # normalizan al cargarlo, antes de completar la zona desde el distrito
+    df, reporte = backfill_jerarquia(df, MAPPING_JSON_COMISARIA, MAPPING_JSON_DISTRITO,
+                                     normalizar_distrito=reglas_distrito().aplicar)
+    if verbose:
+        imprimir_reporte(reporte, len(df))
+
+    # Distrito por coordenadas (point-in-polygon) y conflictos con el del texto
+    df, reporte_espacial = asignar_distrito_espacial(df, MAPPING_JSON_DISTRITO)
+    if verbose:
+        imprimir_reporte_espacial(reporte_espacial)
+
+    # Tipos compactos (category / enteros chicos)
+    antes = bytes_por_columna(df) if verbose else None
+    df = aplicar_esquema(df)
+    if verbose:
+        imprimir_reporte_memoria(antes, bytes_por_columna(df))
+
+    return df
+
+def esquema_arrow(df):
+    """
+    Esquema Arrow estable para el dataset limpio: las columnas de texto son
+    siempre string, aunque en un chunk vengan vacías, y las categóricas son
+    diccionarios con índice int32 sin importar cuántas categorías tenga el chunk.
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(schema):
+        if df[field.name].dtype == object:
+            schema = schema.set(i, field.with_type(pa.string()))
+        elif pa.types.is_dictionary(field.type):
+            schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), pa.string())))
+    return schema
+
+def main(chunksize=None, canonicalizar_barrios=False):
+    if not INPUT.exists():
+        raise FileNotFoundError(f"No existe {INPUT}. Coloca el CSV en data/ y vuelve a intentar.")
+
+    # geometrías de distritos en WGS84: se regeneran acá, nunca al atender una página
+    construir_faltantes()
+
+    if chunksize:
+        procesar_en_chunks(INPUT, OUT_PARQUET, chunksize, canonicalizar_barrios)
+        return
+
+    print("Leyendo CSV (low_memory=False)...")
+    df = pd.read_csv(INPUT, low_memory=False, dtype=str)  # todo string primero
+    print("Filas leídas:", len(df))
+
+    df = limpiar(df, canonicalizar_barrios=canonicalizar_barrios)
+
     # Eliminar columnas totalmente nulas
     nunique_valid = df.notna().sum()
     to_drop_nulls = nunique_valid[nunique_valid == 0].index.tolist()
     df = df.drop(columns=to_drop_nulls, errors="ignore")
 
-    # Eliminar columnas redundantes
-    redundantes = ["fecha", "fecha_hech", "hora_hecho"]  # ya tenemos fecha_hora
-    df = df.drop(columns=redundantes, errors="ignore")
-
     # Contar coordenadas faltantes
     total = len(df)
     faltan_coords = df[["latitud", "longitud"]].isna().any(axis=1).sum()
     print(f"Registros totales: {total}; sin coordenadas: {faltan_coords}")
 
-    # limpieza de delitos
-    df = aplicar_mapping(df, MAPPING_JSON, column="prevenible")
-
-    # Completar comisaria/distrito/zona desde barrio
-    df = aplicar_mapping_lugar(df, MAPPING_JSON_COMISARIA)
-
-    # Completar zona desde distrito
-    df = fill_zona_from_distrito(df, MAPPING_JSON_DISTRITO)
-
     # Guardar dataset limpio
     print("Guardando dataset limpio...")
     try:
-        df.to_parquet(OUT_PARQUET, index=False)
+        df.to_parquet(OUT_PARQUET, index=False, schema=esquema_arrow(df))
         print("✅ Parquet guardado en:", OUT_PARQUET)
     except Exception as e:
         print("⚠️ No se pudo guardar parquet:", e)
@@ -119,38 +183,119 @@ def main():
         df.to_csv(OUT_CSV_GZ, index=False, compression="gzip")
         print("✅ CSV comprimido guardado.")
 
+    guardar_cubos(construir_rollups(df), OUT_CUBOS)
+
     print("Preprocesamiento finalizado.")
     print(df.info())
     print("Valores nulos por columna:\n", df.isna().sum())
     print("Columnas finales:", df.columns.tolist())
 
+def procesar_en_chunks(input_path, out_parquet, chunksize, canonicalizar_barrios=False):
+    """
+    Modo streaming: lee el CSV de a `chunksize` filas, limpia cada chunk y lo
+    escribe como row group de un único Parquet. Los conteos de cada chunk se
+    suman enseguida a los rollups acumulados. La memoria queda acotada por el
+    tamaño del chunk (y el de los rollups), no por el del archivo.
+
+    Las columnas totalmente nulas sólo se conocen al final: se escribe primero
+    un Parquet temporal con todas las columnas y, si hace falta, se reescribe
+    proyectando las columnas que quedan (de a un row group por vez).
+    """
+    out_parquet = Path(out_parquet)
+    tmp_parquet = out_parquet.with_suffix(".tmp.parquet")
+
+    print(f"Leyendo CSV en chunks de {chunksize} filas...")
+    writer = None
+    schema = None
+    plantilla = None
+    no_nulos = None
+    cubos = None
+    total = 0
+    faltan_coords = 0
+    try:
+        for i, chunk in enumerate(pd.read_csv(input_path, dtype=str, chunksize=chunksize)):
+            chunk = limpiar(chunk, verbose=(i == 0), canonicalizar_barrios=canonicalizar_barrios)
+            if writer is None:
+                plantilla = chunk.iloc[:0]
+                schema = esquema_arrow(chunk)
+                writer = pq.ParquetWriter(tmp_parquet, schema)
+                no_nulos = chunk.notna().sum()
+            else:
+                no_nulos = no_nulos.add(chunk.notna().sum(), fill_value=0)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            cubos = acumular_rollups(cubos, chunk)
+            total += len(chunk)
+            faltan_coords += chunk[["latitud", "longitud"]].isna().any(axis=1).sum()
+            print(f"  chunk {i + 1}: {total} filas procesadas")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        raise ValueError(f"{input_path} no tiene filas.")
+    print(f"Registros totales: {total}; sin coordenadas: {faltan_coords}")
+
+    # Eliminar columnas totalmente nulas
+    to_drop_nulls = no_nulos[no_nulos == 0].index.tolist()
+    if to_drop_nulls:
+        print("Eliminando columnas totalmente nulas:", to_drop_nulls)
+        schema_final = esquema_arrow(plantilla.drop(columns=to_drop_nulls))
+        origen = pq.ParquetFile(tmp_parquet)
+        with pq.ParquetWriter(out_parquet, schema_final) as final:
+            for rg in range(origen.num_row_groups):
+                tabla = origen.read_row_group(rg, columns=schema_final.names)
+                final.write_table(tabla.replace_schema_metadata(schema_final.metadata))
+        tmp_parquet.unlink()
+    else:
+        tmp_parquet.replace(out_parquet)
 
+    print("✅ Parquet guardado en:", out_parquet)
+    guardar_cubos(cubos, OUT_CUBOS)
+    print("Preprocesamiento finalizado.")
+    print("Valores nulos por columna:\n", (total - no_nulos.drop(to_drop_nulls)).astype(int))
+    print("Columnas finales:", pq.ParquetFile(out_parquet).schema_arrow.names)
+
+
+
+def guardar_cubos(cubos, directorio):
+    """Guarda los rollups de conteos ({nombre: cubo}) junto al dataset limpio, uno por archivo."""
+    directorio = Path(directorio)
+    try:
+        directorio.mkdir(parents=True, exist_ok=True)
+        for nombre, cubo in cubos.items():
+            cubo.to_parquet(directorio / f"{nombre}.parquet", index=False)
+        celdas = ", ".join(f"{nombre} {len(cubo)}" for nombre, cubo in cubos.items())
+        print(f"✅ Cubos de conteos guardados en: {directorio} ({celdas} celdas)")
+    except Exception as e:
+        print("⚠️ No se pudieron guardar los cubos:", e)
 
-def aplicar_mapping(df, mapping_path, column="prevenible"):
+def aplicar_mapping(df, mapping_path, column="prevenible", verbose=True):
     """
     Aplica un diccionario de reemplazo desde archivo JSON sobre una columna del DataFrame.
     Si la clave existe en el mapping, se reemplaza por el valor.
     """
-    mapping = {}
-    if not mapping_path.exists():
+    # 1) Cargar mapping (en caché, se lee una sola vez por proceso)
+    mapping = cargar_mapping(mapping_path)
+    if mapping is None:
         print(f"⚠️ No se encontró mapping en {mapping_path}, no se aplican reemplazos.")
         return df
 
-    # 1) Cargar mapping
-    with open(mapping_path, "r", encoding="utf-8") as f:
-        mapping = json.load(f)
-    print(f"✅ Mapping cargado con {len(mapping)} claves desde {mapping_path}")
-
     # 2) Asegurar columna
     if column not in df.columns:
         df[column] = None
 
+    reglas = reglas_desde_mapping(mapping_path)
+    if not verbose:
+        df[column] = reglas.aplicar(df[column])
+        return df
+    print(f"✅ Mapping cargado con {len(mapping)} claves desde {mapping_path}")
+
     # 3) Mostrar valores únicos antes
     originales = set(df[column].dropna().unique())
     print(f"🔎 Valores únicos en '{column}' antes de reemplazo: {len(originales)}")
 
     # 4) Aplicar mapping
-    df[column] = df[column].replace(mapping)
+    df[column] = reglas.aplicar(df[column])
 
     # 5) Mostrar valores no mapeados
     restantes = set(df[column].dropna().unique())
@@ -166,27 +311,20 @@ def aplicar_mapping(df, mapping_path, column="prevenible"):
     return df
 
 def aplicar_mapping_lugar(df, mapping_path):
-    mapping = {}
-    if not mapping_path.exists():
+    """
+    Completa comisaria/distrito/zona desde barrio usando el motor columnar de hierarchy.
+    """
+    tabla = cargar_lookup(mapping_path)
+    if tabla is None:
         print(f"⚠️ No se encontró mapping en {mapping_path}, no se aplican reemplazos.")
         return df
+    print(f"✅ Mapping cargado con {len(tabla)} claves desde {mapping_path}")
 
-    with open(mapping_path, "r", encoding="utf-8") as f:
-        mapping = json.load(f)
-    print(f"✅ Mapping cargado con {len(mapping)} claves desde {mapping_path}")
-
-    cols = ["comisaria", "distrito", "zona"]
-
-    def fill_row(row):
-        barrio = row.get("barrio")
-        if not barrio or barrio not in mapping:
-            return row  # no hay mapping, devuelve igual
-        for col in cols:
-            if pd.isna(row[col]) and col in mapping[barrio]:
-                row[col] = mapping[barrio][col]
-        return row
-
-    df = df.apply(fill_row, axis=1)
+    if "barrio" not in df.columns:
+        return df
+    posiciones = posiciones_en_lookup(df["barrio"], tabla)
+    for col in NIVELES_BARRIO:
+        rellenar_desde_lookup(df, col, posiciones, tabla)
     return df
 
 def fill_zona_from_distrito(df, mapping_path):
@@ -196,28 +334,31 @@ def fill_zona_from_distrito(df, mapping_path):
     distritos_mapping: dict con estructura
         { "DISTRITO X": {"zona": "ZONA Y"} }
     """
-    mapping = {}
-    if not mapping_path.exists():
+    tabla = cargar_lookup(mapping_path)
+    if tabla is None:
         print(f"⚠️ No se encontró mapping en {mapping_path}, no se aplican reemplazos.")
         return df
+    print(f"✅ Mapping cargado con {len(tabla)} claves desde {mapping_path}")
 
-    with open(mapping_path, "r", encoding="utf-8") as f:
-        mapping = json.load(f)
-    print(f"✅ Mapping cargado con {len(mapping)} claves desde {mapping_path}")
-
-
-    def get_zona(row):
-        if pd.isna(row["zona"]) and row["distrito"] in mapping:
-            return mapping[row["distrito"]]["zona"]
-        return row["zona"]
-
-    df["zona"] = df.apply(get_zona, axis=1)
+    posiciones = posiciones_en_lookup(df["distrito"], tabla)
+    rellenar_desde_lookup(df, "zona", posiciones, tabla)
     return df
 
 
 
 
 
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Limpia el CSV consolidado de delitos.")
+    parser.add_argument(
+        "--chunksize", type=int, default=None,
+        help="Procesar el CSV en chunks de N filas (memoria acotada). Por defecto lee todo en memoria."
+    )
+    parser.add_argument(
+        "--canonicalizar-barrios", action="store_true",
+        help="Reescribir los barrios que no son claves del mapping de comisarías a la clave de la que son variante."
+    )
+    args = parser.parse_args()
+    main(chunksize=args.chunksize, canonicalizar_barrios=args.canonicalizar_barrios)
 
@@ -0,0 +1,135 @@
+# app/utils/queries.py
+"""
+Capa de consultas compartida por el dashboard y la API (app/api/main.py).
+
+Funciones puras sobre una fuente ya filtrada (filas crudas o cubo de
+conteos): no dependen de Streamlit ni de Plotly y devuelven DataFrames
+chicos listos para graficar o serializar.
+
+`Consultas` junta un dataset cargado una sola vez por proceso (filas, índice
+de filtros y rollups de conteos) y resuelve cada consulta con la fuente más
+barata: el rollup más chico que tiene los filtros y las dimensiones, las
+filas si ninguno alcanza.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.utils.coords import BBOX_CORDOBA
+from app.utils.cube import COLUMNA_CONTEO, ROLLUPS, contar, es_cubo, rollup_para
+from app.utils.filters import IndiceFiltros, apply_filters
+from app.utils.grid import agregar_grilla
+from app.utils.rates import aplicar_medida
+
+MEDIDA_CONTEO = "Cantidad de hechos"
+COLUMNAS_FILTRO = ["año", "barrio", "zona", "distrito", "prevenible"]
+
+
+def tabla_conteos(conteos, medida=MEDIDA_CONTEO, dimension=None):
+    """Conteos de `contar` (o tasas según `medida`) como DataFrame con la columna `id`."""
+    return aplicar_medida(conteos, medida, dimension).round(1).reset_index(name="id")
+
+
+def conteo_por(fuente, dimension, medida=MEDIDA_CONTEO):
+    """Hechos (o tasa) por `dimension`, de mayor a menor."""
+    return (
+        tabla_conteos(contar(fuente, dimension), medida, dimension)
+        .rename(columns={"id": COLUMNA_CONTEO})
+        .sort_values(COLUMNA_CONTEO, ascending=False, kind="stable", ignore_index=True)
+    )
+
+
+def top_barrios(fuente, n=10):
+    """Los `n` barrios con más hechos (empates en el orden del conteo)."""
+    top = contar(fuente, "barrio").sort_values(ascending=False, kind="stable").head(n)
+    return top.rename(COLUMNA_CONTEO).reset_index()
+
+
+def serie_mensual(fuente):
+    """Hechos por año y mes."""
+    return contar(fuente, ["año", "mes"]).reset_index(name=COLUMNA_CONTEO)
+
+
+def serie_diaria(filas, grupo=None):
+    """Hechos por día (con días sin hechos en 0), total o por `grupo`; requiere filas con fecha_hora."""
+    from app.utils.trends import conteos_diarios
+
+    diarios = conteos_diarios(filas["fecha_hora"], filas[grupo] if grupo else None)
+    diarios.index = diarios.index.strftime("%Y-%m-%d")
+    return diarios.rename_axis("fecha").reset_index()
+
+
+def grilla_calor(filas, zoom, desglose=False, bbox=BBOX_CORDOBA):
+    """
+    Celdas de la grilla agregada (app/utils/grid.py) para un nivel de zoom,
+    dentro de `bbox` (lat_min, lat_max, lon_min, lon_max).
+    """
+    lat = filas["lat"] if "lat" in filas.columns else filas["latitud"]
+    lon = filas["lon"] if "lon" in filas.columns else filas["longitud"]
+    categorias = filas["prevenible"] if desglose and "prevenible" in filas.columns else None
+    return agregar_grilla(lat.to_numpy(), lon.to_numpy(), zoom, categorias, bbox)
+
+
+class Consultas:
+    """
+    Dataset en memoria (una copia por proceso) con su índice de filtros y
+    los rollups de conteos que existan ({nombre: cubo}).
+
+    Los filtros son {columna: [valores]} sobre COLUMNAS_FILTRO; None o
+    ausente significa "sin filtro".
+    """
+
+    def __init__(self, filas, cubos=None, version=None):
+        self.filas = filas
+        self.cubos = cubos or {}
+        self.version = version
+        self.indice = IndiceFiltros.desde_dataframe(filas, COLUMNAS_FILTRO)
+
+    @classmethod
+    def cargar(cls, path=None):
+        """Carga la fuente limpia sin pasar por las cachés de Streamlit."""
+        from app.utils.loader import leer_rollup, load_data, version_datos
+
+        cubos = {nombre: leer_rollup(nombre, path) for nombre in ROLLUPS}
+        cubos = {nombre: cubo for nombre, cubo in cubos.items() if cubo is not None}
+        return cls(load_data.__wrapped__(path), cubos, version_datos(path))
+
+    def fuente(self, filtros, columnas=()):
+        """Rollup filtrado si alguno alcanza para `columnas` y los filtros; si no, filas filtradas."""
+        filtros = {c: v for c, v in (filtros or {}).items() if v is not None}
+        nombre = rollup_para(list(columnas) + list(filtros))
+        if nombre in self.cubos:
+            return apply_filters(self.cubos[nombre], filtros)
+        return apply_filters(self.filas, filtros, indice=self.indice)
+
+    def valores(self, columna):
+        """Valores distintos de una columna filtrable."""
+        indice = self.indice.columnas.get(columna)
+        return [] if indice is None else [v.item() if isinstance(v, np.generic) else v for v in indice.posicion]
+
+    def conteos(self, dimension, filtros=None, medida=MEDIDA_CONTEO):
+        return conteo_por(self.fuente(filtros, [dimension]), dimension, medida)
+
+    def top_barrios(self, n=10, filtros=None):
+        return top_barrios(self.fuente(filtros, ["barrio"]), n)
+
+    def serie(self, frecuencia="mes", filtros=None, grupo=None):
+        if frecuencia == "dia":
+            return serie_diaria(self.fuente(filtros, ["fecha_hora"]), grupo)
+        return serie_mensual(self.fuente(filtros, ["año", "mes"]))
+
+    def grilla(self, zoom, filtros=None, desglose=False, bbox=BBOX_CORDOBA):
+        return grilla_calor(self.fuente(filtros, ["latitud", "longitud"]), zoom, desglose, bbox)
+
+    def total(self, filtros=None):
+        fuente = self.fuente(filtros)
+        return int(fuente[COLUMNA_CONTEO].sum()) if es_cubo(fuente) else len(fuente)
+
+
+def a_registros(df):
+    """DataFrame -> lista de dicts serializable a JSON (NaN -> None, tipos de numpy -> Python)."""
+    df = df.astype(object).where(pd.notna(df), None)
+    return [
+        {k: (v.item() if isinstance(v, np.generic) else v) for k, v in fila.items()}
+        for fila in df.to_dict(orient="records")
+    ]
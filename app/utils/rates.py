@@ -0,0 +1,113 @@
+# app/utils/rates.py
+"""
+Tasas de hechos cada 100.000 habitantes y por km².
+
+La población (`pob_est_20`) y la superficie (`sup_km2`) vienen de los
+polígonos de data/distritos_policiales_wgs84.geojson, que se llaman por
+`nombre` ("DISTRITO 12 A", "DISTRITO 3 BIS"). Se arma una sola tabla de
+atributos indexada por todas las claves con las que se cuenta:
+
+- el nombre del polígono (columna `distrito_geo`);
+- el distrito base (columna `distrito`): suma de sus polígonos;
+- la zona (columna `zona`, vía data/distritos_mapping.json): suma de sus
+  distritos, sólo si todos tienen polígono (si no, la tasa queda sin dato);
+- `TOTAL`, la ciudad completa, para dimensiones no espaciales (año, tipo de hecho).
+
+Las tasas se calculan sobre conteos ya agregados (`contar` sobre el cubo):
+es una división vectorizada con `get_indexer` sobre la tabla, sin volver a
+agrupar filas.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from app.utils.geodata import DISTRITOS_WGS84, distritos_wgs84
+from app.utils.hierarchy import cargar_lookup
+from app.utils.schema import MAPPING_JSON_DISTRITO
+from app.utils.spatial import distrito_base
+
+POR_HABITANTES = 100_000
+TOTAL = "TOTAL"
+DIMENSIONES_ESPACIALES = ("distrito_geo", "distrito", "zona")
+
+# etiqueta -> (columna de atributos, factor); None = conteo absoluto
+MEDIDAS = {
+    "Cantidad de hechos": None,
+    "Tasa cada 100.000 hab.": ("poblacion", POR_HABITANTES),
+    "Hechos por km²": ("superficie_km2", 1),
+}
+
+
+@lru_cache(maxsize=None)
+def _tabla(mtime_distritos, mtime_mapping):
+    poligonos = pd.DataFrame([
+        {
+            "nombre": f["properties"]["nombre"],
+            "poblacion": f["properties"].get("pob_est_20"),
+            "superficie_km2": f["properties"].get("sup_km2"),
+        }
+        for f in distritos_wgs84()["features"]
+    ])
+    poligonos["distrito"] = poligonos["nombre"].map(distrito_base)
+    columnas = ["poblacion", "superficie_km2"]
+
+    por_distrito = poligonos.groupby("distrito")[columnas].sum(min_count=1)
+    partes = [por_distrito, poligonos.set_index("nombre")[columnas]]
+
+    mapping = cargar_lookup(MAPPING_JSON_DISTRITO)
+    if mapping is not None and "zona" in mapping.columns:
+        zonas = mapping["zona"].dropna()
+        # zonas con algún distrito sin polígono quedan en NaN
+        por_zona = por_distrito.reindex(zonas.index).groupby(zonas.to_numpy()).sum(min_count=1)
+        completas = por_distrito.reindex(zonas.index).notna().all(axis=1).groupby(zonas.to_numpy()).all()
+        partes.append(por_zona.where(completas, np.nan))
+
+    partes.append(pd.DataFrame([por_distrito.sum()], index=[TOTAL]))
+    tabla = pd.concat(partes)
+    return tabla[~tabla.index.duplicated()]
+
+
+def atributos():
+    """
+    Tabla (población, superficie_km2) indexada por polígono, distrito base,
+    zona y TOTAL. None si no hay polígonos de distritos.
+    """
+    if distritos_wgs84() is None:
+        return None
+    mtime_mapping = MAPPING_JSON_DISTRITO.stat().st_mtime_ns if MAPPING_JSON_DISTRITO.exists() else 0
+    return _tabla(DISTRITOS_WGS84.stat().st_mtime_ns, mtime_mapping)
+
+
+def denominadores(claves, dimension, columna):
+    """
+    Denominador de cada clave: atributo de la propia clave para dimensiones
+    espaciales, o de la ciudad completa (TOTAL) para las demás.
+    """
+    tabla = atributos()
+    if tabla is None or columna not in tabla.columns:
+        return np.full(len(claves), np.nan)
+    valores = tabla[columna].to_numpy(dtype="float64")
+    if dimension in DIMENSIONES_ESPACIALES:
+        posiciones = tabla.index.get_indexer(pd.Index(claves, dtype=object).astype(str))
+    else:
+        posiciones = np.full(len(claves), tabla.index.get_loc(TOTAL))
+    return np.where(posiciones >= 0, valores[np.maximum(posiciones, 0)], np.nan)
+
+
+def aplicar_medida(conteos, medida, dimension=None):
+    """
+    Convierte `conteos` (Series de `contar`, indexada por una dimensión o por
+    varias con la espacial en el nivel `dimension`) a la `medida` elegida.
+    Las claves sin población/superficie conocida quedan en NaN.
+    """
+    definicion = MEDIDAS[medida]
+    if definicion is None:
+        return conteos
+    columna, factor = definicion
+    if dimension is None:
+        dimension = conteos.index.names[0]
+    claves = conteos.index.get_level_values(dimension) if dimension in conteos.index.names else conteos.index
+    tasas = conteos.to_numpy(dtype="float64") * factor / denominadores(claves, dimension, columna)
+    return pd.Series(tasas, index=conteos.index, name=conteos.name)
@@ -0,0 +1,143 @@
+# app/utils/reglas.py
+"""
+Canonicalización de columnas con tablas de reglas declarativas.
+
+Una `TablaReglas` junta:
+- reglas exactas {valor: reemplazo} (p. ej. los alias de delitos_mapping.json),
+  que reemplazan el valor completo;
+- reglas regex [(patrón, reemplazo)] (p. ej. los numerales romanos de los
+  distritos), que reemplazan cada aparición dentro del valor.
+
+Las reglas regex se compilan en una sola alternancia con los patrones más
+largos primero ("DISTRITO XIII" antes que "DISTRITO XII" antes que
+"DISTRITO I"), así el resultado no depende del orden en que se escriban.
+La tabla se aplica una vez por valor distinto de la columna
+(ver `normalizar_columna`) y se expande a las filas con los códigos.
+
+Verificar que coincide con las 13 pasadas de `str.replace` de antes:
+python -m app.utils.reglas
+"""
+
+import itertools
+import re
+import sys
+from functools import lru_cache
+
+import pandas as pd
+
+from app.utils.hierarchy import cargar_mapping
+from app.utils.normalize import normalizar_columna
+
+# "DISTRITO (número romano)" -> "DISTRITO (número)"
+REGLAS_DISTRITO = [
+    (r"DISTRITO I", "DISTRITO 1"),
+    (r"DISTRITO II", "DISTRITO 2"),
+    (r"DISTRITO III", "DISTRITO 3"),
+    (r"DISTRITO IV", "DISTRITO 4"),
+    (r"DISTRITO V", "DISTRITO 5"),
+    (r"DISTRITO VI", "DISTRITO 6"),
+    (r"DISTRITO VII", "DISTRITO 7"),
+    (r"DISTRITO VIII", "DISTRITO 8"),
+    (r"DISTRITO IX", "DISTRITO 9"),
+    (r"DISTRITO X", "DISTRITO 10"),
+    (r"DISTRITO XI", "DISTRITO 11"),
+    (r"DISTRITO XII", "DISTRITO 12"),
+    (r"DISTRITO XIII", "DISTRITO 13"),
+]
+
+
+class TablaReglas:
+    """
+    exactas: {valor: reemplazo}, se comparan contra el valor completo.
+    regex: [(patrón, reemplazo)], el reemplazo es texto literal.
+    """
+
+    def __init__(self, exactas=None, regex=(), ignorar_mayusculas=True):
+        self.exactas = dict(exactas or {})
+        self.reemplazos = []
+        self.patron = None
+        if regex:
+            reglas = sorted(regex, key=lambda r: len(r[0]), reverse=True)
+            self.reemplazos = [reemplazo for _, reemplazo in reglas]
+            alternativas = "|".join(f"(?P<r{i}>{patron})" for i, (patron, _) in enumerate(reglas))
+            self.patron = re.compile(alternativas, re.IGNORECASE if ignorar_mayusculas else 0)
+
+    def _reemplazo(self, m):
+        return self.reemplazos[int(m.lastgroup[1:])]
+
+    def traducir(self, valor):
+        """Aplica las reglas a un valor (None queda None)."""
+        if valor is None or valor != valor:
+            return None
+        if valor in self.exactas:
+            return self.exactas[valor]
+        if self.patron is not None:
+            return self.patron.sub(self._reemplazo, valor)
+        return valor
+
+    def aplicar(self, serie):
+        """Aplica las reglas sobre los valores distintos de `serie` y expande a las filas."""
+        return normalizar_columna(serie, self.traducir)
+
+
+@lru_cache(maxsize=None)
+def reglas_distrito():
+    return TablaReglas(regex=REGLAS_DISTRITO)
+
+
+def reglas_desde_mapping(mapping_path):
+    """Tabla de reglas exactas desde un mapping JSON {alias: valor}. None si no existe."""
+    mapping = cargar_mapping(mapping_path)
+    if mapping is None:
+        return None
+    return TablaReglas(exactas=mapping)
+
+
+# casos borde: prefijos ("DISTRITO I" dentro de "DISTRITO II"/"DISTRITO III"),
+# minúsculas, numerales fuera de rango, dos distritos en un valor, ya numéricos y nulos
+BORDES_DISTRITO = ["distrito xiii", "Distrito Iv", "DISTRITO XIV", "DISTRITO II / DISTRITO XII",
+                   "DISTRITO 7", "DISTRITO XIIBIS", "DISTRITO 12 A", "SIN DISTRITO", "", None]
+
+
+def pasadas_legacy(serie):
+    """Corrección como estaba en preprocess: una pasada de `str.replace` por numeral, de XIII a I."""
+    for patron, reemplazo in reversed(REGLAS_DISTRITO):
+        serie = serie.str.replace(patron, reemplazo, case=False, regex=True)
+    return serie
+
+
+def casos_distrito(largo_max=4):
+    """Todos los "DISTRITO " + combinaciones de I/V/X hasta `largo_max` letras (y en minúsculas) + bordes."""
+    combinaciones = [
+        "".join(letras)
+        for largo in range(1, largo_max + 1)
+        for letras in itertools.product("IVX", repeat=largo)
+    ]
+    casos = [f"DISTRITO {c}" for c in combinaciones]
+    return casos + [c.lower() for c in casos] + BORDES_DISTRITO
+
+
+def diferencias_distrito(valores=None):
+    """
+    Valores en los que `reglas_distrito()` no da lo mismo que las 13 pasadas:
+    {valor: (esperado, obtenido)}; vacío si son equivalentes.
+    """
+    serie = pd.Series(casos_distrito() if valores is None else list(valores), dtype=object)
+    esperado = pasadas_legacy(serie)
+    esperado = esperado.where(esperado.notna(), None)
+    obtenido = reglas_distrito().aplicar(serie)
+    return {
+        v: (e, o)
+        for v, e, o in zip(serie, esperado, obtenido)
+        if e != o
+    }
+
+
+if __name__ == "__main__":
+    casos = casos_distrito()
+    distintos = diferencias_distrito(casos)
+    if distintos:
+        for valor, (esperado, obtenido) in distintos.items():
+            print(f"❌ {valor!r}: pasadas {esperado!r}, tabla {obtenido!r}")
+        sys.exit(1)
+    print(f"✅ Tabla de reglas de distrito equivalente a las 13 pasadas ({len(casos)} casos)")
@@ -0,0 +1,118 @@
+# app/utils/render_cache.py
+"""
+Caché en disco de gráficos y mapas ya renderizados.
+
+Cada entrada es un archivo direccionado por contenido: el nombre es el
+SHA-256 de (versión del dataset, página, valores de los filtros, modo), y el
+contenido es la figura de Plotly serializada (JSON) o el HTML del mapa. Al
+estar en disco la comparten todas las sesiones y todos los procesos, y
+sobrevive a un reinicio: las vistas más pedidas ("todos los años, todos los
+barrios") vuelven a salir sin recalcular nada.
+
+Desalojo LRU con tope de tamaño: cada lectura actualiza el mtime del archivo
+y, al escribir, si el directorio supera `max_bytes` se borran los archivos
+menos usados hasta bajar al 90 % del tope.
+
+Variables de entorno: DELITOS_CACHE_DIR (directorio) y DELITOS_CACHE_MB (tope).
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get("DELITOS_CACHE_DIR", "data/.cache/render"))
+MAX_BYTES = int(os.environ.get("DELITOS_CACHE_MB", "256")) * 1024 * 1024
+
+
+def clave_render(*partes):
+    """Clave estable para cualquier combinación de valores (tuplas, listas, números, texto)."""
+    texto = json.dumps(partes, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class CacheRender:
+    def __init__(self, directorio=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directorio = Path(directorio)
+        self.max_bytes = max_bytes
+
+    def _path(self, clave, ext):
+        return self.directorio / clave[:2] / f"{clave}.{ext}"
+
+    def leer(self, clave, ext):
+        """Contenido (bytes) de la entrada o None; marca la entrada como recién usada."""
+        path = self._path(clave, ext)
+        try:
+            contenido = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return contenido
+
+    def escribir(self, clave, ext, contenido):
+        """Escritura atómica (archivo temporal + rename), segura entre procesos."""
+        path = self._path(clave, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_bytes(contenido)
+        os.replace(tmp, path)
+        self.podar()
+
+    def podar(self):
+        """Borra las entradas menos usadas si el directorio supera el tope."""
+        entradas = []
+        total = 0
+        for path in self.directorio.glob("*/*"):
+            try:
+                info = path.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, path))
+            total += info.st_size
+        if total <= self.max_bytes:
+            return 0
+        borradas = 0
+        for _, tamaño, path in sorted(entradas):
+            if total <= 0.9 * self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= tamaño
+            borradas += 1
+        return borradas
+
+    def obtener(self, clave, ext, crear):
+        """Devuelve la entrada; si no existe la genera con `crear()` (bytes) y la guarda."""
+        contenido = self.leer(clave, ext)
+        if contenido is None:
+            contenido = crear()
+            self.escribir(clave, ext, contenido)
+        return contenido
+
+
+@lru_cache(maxsize=None)
+def cache_render():
+    return CacheRender()
+
+
+def figura_cacheada(partes, construir):
+    """
+    Figura de Plotly como dict (listo para st.plotly_chart) desde la caché;
+    si no está, la construye con `construir()` y guarda su JSON.
+    """
+    contenido = cache_render().obtener(
+        clave_render("figura", *partes), "json", lambda: construir().to_json().encode("utf-8")
+    )
+    return json.loads(contenido)
+
+
+def html_cacheado(partes, construir):
+    """HTML (str) desde la caché; si no está, lo genera con `construir()` y lo guarda."""
+    contenido = cache_render().obtener(
+        clave_render("html", *partes), "html", lambda: construir().encode("utf-8")
+    )
+    return contenido.decode("utf-8")
@@ -0,0 +1,138 @@
+# app/utils/schema.py
+#!/usr/bin/env python3
+"""
+Esquema compacto del DataFrame de hechos.
+
+- Texto repetitivo (barrio, comisaria, distrito, zona, prevenible, calle,
+  cuadrantes) como `category`. Donde hay un vocabulario conocido (los mappings
+  de data/*.json) las categorías se fijan en ese orden; los valores que no
+  estén en el vocabulario se agregan al final, ordenados, para no perder datos.
+- Componentes temporales como enteros chicos con nulos (Int16 / Int8).
+
+Se aplica al final de la limpieza (y por lo tanto queda escrito en el
+Parquet) y otra vez al cargar, para que todas las fuentes (parquet único,
+dataset particionado, CSV) den exactamente los mismos tipos.
+
+Reporte de memoria: python -m app.utils.schema [ruta.parquet]
+"""
+
+import argparse
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from app.utils.hierarchy import cargar_lookup, cargar_mapping
+
+MAPPING_JSON = Path("data/delitos_mapping.json")
+MAPPING_JSON_COMISARIA = Path("data/comisarias_mapping.json")
+MAPPING_JSON_DISTRITO = Path("data/distritos_mapping.json")
+
+TIPOS_ENTEROS = {
+    "año": "Int16",
+    "mes": "Int8",
+    "dia": "Int8",
+    "hora": "Int8",
+    "weekday": "Int8",
+}
+
+COLUMNAS_CATEGORICAS = [
+    "barrio", "comisaria", "distrito", "distrito_geo", "zona", "prevenible", "calle", "cuadrantes"
+]
+
+
+@lru_cache(maxsize=None)
+def _vocabularios(mtimes):
+    barrios = cargar_lookup(MAPPING_JSON_COMISARIA)
+    if barrios is None:
+        barrios = pd.DataFrame(columns=["comisaria", "zona"])
+    distritos = cargar_mapping(MAPPING_JSON_DISTRITO) or {}
+    delitos = cargar_mapping(MAPPING_JSON) or {}
+    return {
+        "barrio": tuple(sorted(barrios.index)),
+        "comisaria": tuple(sorted(set(barrios["comisaria"].dropna()) - {""})),
+        "distrito": tuple(sorted(distritos, key=lambda d: (len(d), d))),
+        "zona": tuple(sorted(
+            {v["zona"] for v in distritos.values() if v.get("zona")}
+            | (set(barrios["zona"].dropna()) - {""})
+        )),
+        "prevenible": tuple(sorted(set(delitos.values()))),
+    }
+
+
+def vocabularios():
+    """Vocabularios fijos por columna, tomados de los mappings JSON (en caché)."""
+    mtimes = tuple(
+        p.stat().st_mtime_ns if p.exists() else 0
+        for p in (MAPPING_JSON, MAPPING_JSON_COMISARIA, MAPPING_JSON_DISTRITO,
+                  MAPPING_JSON_COMISARIA.with_suffix(".arrow"))
+    )
+    return _vocabularios(mtimes)
+
+
+def a_categoria(serie, vocabulario=()):
+    """Convierte a category con el vocabulario fijo primero y los valores extra al final."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        presentes = serie.cat.remove_unused_categories().cat.categories
+    else:
+        presentes = pd.Index(pd.unique(serie.dropna()))
+    conocidos = set(vocabulario)
+    extras = sorted(v for v in presentes if v not in conocidos)
+    categorias = list(vocabulario) + extras
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.set_categories(categorias)
+    return pd.Series(pd.Categorical(serie, categories=categorias), index=serie.index, name=serie.name)
+
+
+def aplicar_esquema(df):
+    """Aplica los tipos compactos a las columnas presentes."""
+    for col, tipo in TIPOS_ENTEROS.items():
+        if col in df.columns and df[col].dtype != tipo:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(tipo)
+    vocab = vocabularios()
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = a_categoria(df[col], vocab.get(col, ()))
+    return df
+
+
+def bytes_por_columna(df):
+    return df.memory_usage(deep=True, index=False)
+
+
+def reporte_memoria(antes, despues):
+    """
+    Tabla de bytes por columna antes/después de aplicar el esquema.
+    `antes` y `despues` son Series como las de `bytes_por_columna`.
+    """
+    reporte = pd.DataFrame({"antes": antes, "despues": despues}).fillna(0).astype("int64")
+    reporte.loc["TOTAL"] = reporte.sum()
+    reporte["ahorro_%"] = (100 * (1 - reporte["despues"] / reporte["antes"].where(reporte["antes"] > 0))).round(1)
+    return reporte
+
+
+def imprimir_reporte_memoria(antes, despues):
+    reporte = reporte_memoria(antes, despues)
+    print("💾 Memoria por columna (bytes):")
+    print(reporte.to_string())
+    return reporte
+
+
+def main(path):
+    df = pd.read_parquet(path)
+    # versión "sin esquema": texto como object y enteros como float64, como antes
+    sin_esquema = df.copy()
+    for col in COLUMNAS_CATEGORICAS:
+        if col in sin_esquema.columns:
+            sin_esquema[col] = sin_esquema[col].astype(object).where(sin_esquema[col].notna(), None)
+    for col in TIPOS_ENTEROS:
+        if col in sin_esquema.columns:
+            sin_esquema[col] = sin_esquema[col].astype("float64")
+    imprimir_reporte_memoria(bytes_por_columna(sin_esquema), bytes_por_columna(aplicar_esquema(df)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reporte de memoria por columna del dataset limpio.")
+    parser.add_argument("path", nargs="?", default="data/delitos_cordoba_2019_2023_clean.parquet")
+    args = parser.parse_args()
+    main(args.path)
@@ -0,0 +1,117 @@
+# app/utils/shared.py
+#!/usr/bin/env python3
+"""
+Dataset compartido entre sesiones: un archivo Arrow IPC (Feather v2, sin
+compresión) mapeado en memoria una vez por proceso.
+
+Los buffers de la tabla apuntan directamente al archivo mapeado, así que
+todas las sesiones de Streamlit (y todos los procesos de la réplica, vía la
+page cache del sistema operativo) comparten la misma copia de los datos.
+Los filtros se resuelven con el índice de bitmaps de app/utils/filters.py
+(construido una vez por proceso) y devuelven arrays de índices de fila;
+recién al pedir un DataFrame se materializan las filas y columnas
+seleccionadas.
+
+Construir el archivo: python -m app.utils.shared
+"""
+
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.utils.filters import IndiceFiltros
+
+ARROW_PATH = Path("data/delitos_clean.arrow")
+
+
+def exportar_arrow(df, path=ARROW_PATH):
+    """
+    Escribe el DataFrame limpio como Arrow IPC sin compresión (apto para memory-map).
+    Las filas quedan ordenadas por año: la selección de años contiguos es un slice.
+    """
+    path = Path(path)
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    if "año" in tabla.column_names:
+        tabla = tabla.take(pc.sort_indices(tabla["año"], null_placement="at_end"))
+    tabla = tabla.combine_chunks().unify_dictionaries()
+    tmp = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+    tmp.replace(path)
+    print(f"✅ Arrow IPC guardado en: {path} ({path.stat().st_size / 1e6:.1f} MB)")
+    return path
+
+
+class DatasetCompartido:
+    """
+    Vista de sólo lectura sobre la tabla mapeada en memoria.
+
+    - `filas(...)` resuelve filtros a índices de fila (np.ndarray) o None (todas).
+    - `a_pandas(filas, columnas)` materializa sólo lo pedido.
+    """
+
+    def __init__(self, path=ARROW_PATH):
+        self.path = Path(path)
+        self._mmap = pa.memory_map(str(self.path), "r")
+        self.tabla = pa.ipc.open_file(self._mmap).read_all()
+        self._indice = None
+
+    def __len__(self):
+        return self.tabla.num_rows
+
+    @property
+    def columns(self):
+        return self.tabla.column_names
+
+    @property
+    def indice(self):
+        """Índice de filtros (bitmaps / listas de ids), construido la primera vez que se usa."""
+        if self._indice is None:
+            self._indice = IndiceFiltros.desde_tabla(self.tabla)
+        return self._indice
+
+    def filas(self, años=None, barrios=None, **filtros):
+        """Índices de las filas que cumplen los filtros (None si no hay filtros)."""
+        return self.indice.resolver({"año": años, "barrio": barrios or None, **filtros})
+
+    def valores(self, columna, filas=None):
+        """Valores distintos (no nulos) de una columna, opcionalmente sólo en `filas`."""
+        col = self.tabla[columna]
+        if filas is not None:
+            col = col.take(filas)
+        return pc.unique(col.combine_chunks()).drop_null().to_pylist() if len(col) else []
+
+    def a_pandas(self, filas=None, columnas=None):
+        """
+        DataFrame con las `columnas` pedidas de las `filas` seleccionadas.
+        Sin `filas`, o si son un rango contiguo (p. ej. años consecutivos), se
+        toma un slice de la tabla: las columnas numéricas sin nulos se entregan
+        sin copia (arrays de sólo lectura sobre el archivo mapeado).
+        """
+        tabla = self.tabla.select(columnas) if columnas else self.tabla
+        if filas is not None:
+            if len(filas) and filas[-1] - filas[0] + 1 == len(filas):
+                tabla = tabla.slice(int(filas[0]), len(filas))
+            else:
+                tabla = tabla.take(pa.array(filas))
+        return tabla.to_pandas(split_blocks=True)
+
+
+def abrir_compartido(origen_mtime, path=ARROW_PATH, cargar=None):
+    """
+    Abre el archivo Arrow mapeado; si no existe o es más viejo que la fuente
+    (`origen_mtime`), lo reconstruye primero con `cargar()` (un DataFrame).
+    """
+    path = Path(path)
+    if cargar is not None and (not path.exists() or path.stat().st_mtime < origen_mtime):
+        print(f"Construyendo {path} ...")
+        exportar_arrow(cargar(), path)
+    return DatasetCompartido(path)
+
+
+if __name__ == "__main__":
+    from app.utils.loader import load_data
+
+    exportar_arrow(load_data.__wrapped__())
@@ -0,0 +1,146 @@
+# app/utils/spatial.py
+"""
+Asignación de distrito por coordenadas (point-in-polygon).
+
+Los polígonos de data/distritos_policiales_wgs84.geojson se indexan una vez
+por proceso en un STRtree de shapely. Los hechos se consultan por lotes con
+`STRtree.query(puntos, predicate="within")`, que filtra por caja con el
+árbol y evalúa el predicado exacto de forma vectorizada, sin un loop de
+`contains` por fila.
+
+Los polígonos subdividen algunos distritos ("DISTRITO 12 A", "DISTRITO 3 BIS");
+para comparar con el distrito que viene en el texto (o desde el barrio) se
+usa el distrito base ("DISTRITO 12", "DISTRITO 3").
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from app.utils.geodata import DISTRITOS_WGS84, distritos_wgs84
+from app.utils.hierarchy import cargar_lookup, posiciones_en_lookup, rellenar_desde_lookup
+
+COLUMNA_GEO = "distrito_geo"
+TAMAÑO_LOTE = 500_000
+
+_BASE = re.compile(r"^(DISTRITO \d+)\b")
+
+
+def distrito_base(nombre):
+    """'DISTRITO 12 A' -> 'DISTRITO 12'; otros valores quedan igual."""
+    if nombre is None or pd.isna(nombre):
+        return None
+    m = _BASE.match(nombre)
+    return m.group(1) if m else nombre
+
+
+@lru_cache(maxsize=None)
+def _arbol(mtime):
+    from shapely import STRtree
+    from shapely.geometry import shape
+
+    coleccion = distritos_wgs84()
+    poligonos = [shape(f["geometry"]) for f in coleccion["features"]]
+    nombres = np.array([f["properties"]["nombre"] for f in coleccion["features"]], dtype=object)
+    return STRtree(poligonos), nombres
+
+
+def arbol_distritos():
+    """(STRtree, nombres) de los polígonos de distritos, construido una vez por proceso."""
+    if distritos_wgs84() is None:
+        return None
+    return _arbol(DISTRITOS_WGS84.stat().st_mtime_ns)
+
+
+def distrito_por_coordenadas(lat, lon, tamaño_lote=TAMAÑO_LOTE):
+    """
+    Nombre del polígono de distrito que contiene cada punto (None si no cae
+    en ninguno o no tiene coordenadas). Si un punto cae en un borde
+    compartido, gana el primer polígono del archivo.
+    """
+    import shapely
+
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    resultado = np.full(len(lat), None, dtype=object)
+    arbol = arbol_distritos()
+    if arbol is None:
+        return resultado
+    arbol, nombres = arbol
+
+    validos = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+    for inicio in range(0, len(validos), tamaño_lote):
+        filas = validos[inicio:inicio + tamaño_lote]
+        puntos = shapely.points(lon[filas], lat[filas])
+        idx_punto, idx_poligono = arbol.query(puntos, predicate="within")
+        # query devuelve los pares ordenados por punto: quedarse con el primer polígono de cada uno
+        orden = np.lexsort((idx_poligono, idx_punto))
+        idx_punto, idx_poligono = idx_punto[orden], idx_poligono[orden]
+        primero = np.r_[True, idx_punto[1:] != idx_punto[:-1]]
+        resultado[filas[idx_punto[primero]]] = nombres[idx_poligono[primero]]
+    return resultado
+
+
+def asignar_distrito_espacial(df, distritos_path=None):
+    """
+    Agrega `distrito_geo` (polígono que contiene al hecho), completa los
+    `distrito` nulos con el distrito base del polígono y, si se pasa el
+    mapping de distritos, la `zona` de las filas completadas.
+
+    Devuelve (df, reporte) con los conteos y los pares en conflicto
+    (distrito del texto distinto del de la geometría).
+    """
+    reporte = {}
+    if not {"latitud", "longitud"} <= set(df.columns):
+        return df, reporte
+
+    geo = distrito_por_coordenadas(df["latitud"].to_numpy(), df["longitud"].to_numpy())
+    df[COLUMNA_GEO] = geo
+    # distrito base sólo sobre los nombres distintos (pocos polígonos), no fila por fila
+    bases = {n: distrito_base(n) for n in pd.unique(geo[pd.notna(geo)])}
+    base_geo = pd.Series(geo, index=df.index).map(bases)
+
+    reporte["con coordenadas"] = int((df["latitud"].notna() & df["longitud"].notna()).sum())
+    reporte["dentro de un distrito"] = int(base_geo.notna().sum())
+
+    if "distrito" not in df.columns:
+        df["distrito"] = None
+    texto = df["distrito"].astype(object)
+    conflicto = texto.notna() & base_geo.notna() & (texto != base_geo)
+    reporte["conflictos"] = int(conflicto.sum())
+    reporte["pares en conflicto"] = (
+        pd.DataFrame({"texto": texto[conflicto], "geometria": base_geo[conflicto]})
+        .value_counts()
+        .head(10)
+    )
+
+    completar = texto.isna() & base_geo.notna()
+    reporte["distrito (desde coordenadas)"] = int(completar.sum())
+    if completar.any():
+        columna = texto.to_numpy(dtype=object, copy=True)
+        columna[completar.to_numpy()] = base_geo[completar].to_numpy(dtype=object)
+        df["distrito"] = columna
+
+        tabla_distritos = cargar_lookup(distritos_path) if distritos_path is not None else None
+        if tabla_distritos is not None:
+            posiciones = posiciones_en_lookup(df["distrito"], tabla_distritos)
+            posiciones[~completar.to_numpy()] = -1
+            reporte["zona (desde coordenadas)"] = rellenar_desde_lookup(df, "zona", posiciones, tabla_distritos)
+
+    return df, reporte
+
+
+def imprimir_reporte_espacial(reporte):
+    if not reporte:
+        return
+    pares = reporte.get("pares en conflicto")
+    print("🗺️ Asignación de distrito por coordenadas:")
+    for clave, n in reporte.items():
+        if clave != "pares en conflicto":
+            print(f"   {clave}: {n}")
+    if pares is not None and len(pares):
+        print("   pares más frecuentes (texto -> geometría):")
+        for (texto, geometria), n in pares.items():
+            print(f"     {texto} -> {geometria}: {n}")
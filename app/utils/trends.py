@@ -0,0 +1,197 @@
+# app/utils/trends.py
+"""
+Motor de tendencias temporales para la página Tendencias.
+
+Todo se calcula con `np.bincount` sobre claves enteras (hora*7 + día de
+semana, grupo*días + día, ...) en lugar de un `groupby` por consulta:
+
+- `matriz_hora_dia`: hechos por hora del día x día de semana (24 x 7);
+- `conteos_diarios`: serie diaria continua (un día sin hechos cuenta 0),
+  total o por grupo (zona, distrito, prevenible);
+- `ventana_movil`: sumas móviles de 7/30 días (con sumas acumuladas);
+- `mensual` / `variacion_interanual`: conteos por mes y diferencia contra el
+  mismo mes del año anterior;
+- `descomposicion`: descomposición estacional aditiva clásica de la serie
+  mensual (tendencia por media móvil centrada 2x12, estacionalidad como
+  promedio por mes del año, residuo).
+
+Las funciones aceptan filas crudas o el cubo de conteos (columna `hechos`,
+ver app/utils/cube.py) cuando no necesitan la fecha exacta.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.utils.cube import COLUMNA_CONTEO, es_cubo
+
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+VENTANAS = (7, 30)
+
+
+def _pesos(fuente):
+    return fuente[COLUMNA_CONTEO].to_numpy(dtype="int64") if es_cubo(fuente) else None
+
+
+def _codigos(serie):
+    """(códigos enteros con -1 para nulos, valores) de una columna categórica o no."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(dtype="int64"), list(serie.cat.categories)
+    codigos, valores = pd.factorize(serie, sort=True)
+    return codigos.astype("int64"), list(valores)
+
+
+def _enteros(serie):
+    """Columna numérica con nulos como array int64 (nulos -> -1)."""
+    return pd.to_numeric(serie, errors="coerce").fillna(-1).to_numpy(dtype="int64")
+
+
+def matriz_hora_dia(fuente):
+    """Hechos por hora (filas 0-23) y día de semana (columnas Lunes-Domingo)."""
+    hora = _enteros(fuente["hora"])
+    dia = _enteros(fuente["weekday"])
+    validos = (hora >= 0) & (hora < 24) & (dia >= 0) & (dia < 7)
+    pesos = _pesos(fuente)
+    conteos = np.bincount(
+        hora[validos] * 7 + dia[validos],
+        weights=pesos[validos] if pesos is not None else None,
+        minlength=24 * 7,
+    )
+    return pd.DataFrame(conteos.reshape(24, 7).astype("int64"), index=pd.RangeIndex(24, name="hora"),
+                        columns=DIAS_SEMANA)
+
+
+def conteos_diarios(fechas, grupos=None):
+    """
+    Hechos por día (índice continuo de fechas, de la primera a la última).
+    Con `grupos` (Series alineada con `fechas`), una columna por grupo;
+    sin grupos, una sola columna `hechos`.
+    """
+    dias = pd.to_datetime(fechas, errors="coerce").to_numpy(dtype="datetime64[D]")
+    validos = ~np.isnat(dias)
+    dias = dias[validos].astype("int64")
+    if not len(dias):
+        return pd.DataFrame(columns=[COLUMNA_CONTEO] if grupos is None else [])
+    inicio, fin = dias.min(), dias.max()
+    n_dias = int(fin - inicio) + 1
+    indice = pd.DatetimeIndex(np.arange(inicio, fin + 1).astype("datetime64[D]"), name="fecha")
+
+    if grupos is None:
+        return pd.DataFrame({COLUMNA_CONTEO: np.bincount(dias - inicio, minlength=n_dias)}, index=indice)
+
+    codigos, valores = _codigos(grupos)
+    codigos = codigos[validos]
+    con_grupo = codigos >= 0
+    matriz = np.bincount(
+        codigos[con_grupo] * n_dias + (dias[con_grupo] - inicio),
+        minlength=len(valores) * n_dias,
+    ).reshape(len(valores), n_dias)
+    presentes = matriz.sum(axis=1) > 0
+    return pd.DataFrame(matriz[presentes].T, index=indice,
+                        columns=[v for v, p in zip(valores, presentes) if p])
+
+
+def ventana_movil(diarios, dias):
+    """Suma móvil de `dias` días (los primeros días suman lo disponible)."""
+    valores = diarios.to_numpy(dtype="int64")
+    acumulado = np.vstack([np.zeros((1, valores.shape[1]), dtype="int64"), np.cumsum(valores, axis=0)])
+    desde = np.maximum(np.arange(1, len(valores) + 1) - dias, 0)
+    movil = acumulado[1:] - acumulado[desde]
+    return pd.DataFrame(movil, index=diarios.index, columns=diarios.columns)
+
+
+def mensual(fuente):
+    """
+    Hechos por mes (índice PeriodIndex mensual continuo). Acepta filas o cubo
+    (usa año y mes) o el resultado de `conteos_diarios`.
+    """
+    if isinstance(fuente.index, pd.DatetimeIndex):
+        meses = fuente.index.year.to_numpy() * 12 + fuente.index.month.to_numpy() - 1
+        inicio = meses.min()
+        n = meses.max() - inicio + 1
+        matriz = np.stack([
+            np.bincount(meses - inicio, weights=fuente[c].to_numpy(), minlength=n) for c in fuente.columns
+        ], axis=1)
+        columnas = list(fuente.columns)
+    else:
+        año = _enteros(fuente["año"])
+        mes = _enteros(fuente["mes"])
+        validos = (año > 0) & (mes >= 1) & (mes <= 12)
+        meses = año[validos] * 12 + mes[validos] - 1
+        if not len(meses):
+            return pd.DataFrame(columns=[COLUMNA_CONTEO])
+        inicio = meses.min()
+        n = meses.max() - inicio + 1
+        pesos = _pesos(fuente)
+        matriz = np.bincount(
+            meses - inicio, weights=pesos[validos] if pesos is not None else None, minlength=n
+        )[:, None]
+        columnas = [COLUMNA_CONTEO]
+    indice = pd.period_range(
+        pd.Period(year=int(inicio // 12), month=int(inicio % 12) + 1, freq="M"), periods=n, name="mes"
+    )
+    return pd.DataFrame(matriz.astype("int64"), index=indice, columns=columnas)
+
+
+def variacion_interanual(mensuales):
+    """Diferencia (absoluta y %) de cada mes contra el mismo mes del año anterior."""
+    serie = mensuales.iloc[:, 0]
+    anterior = serie.shift(12)
+    return pd.DataFrame({
+        "hechos": serie,
+        "año_anterior": anterior,
+        "diferencia": serie - anterior,
+        "variacion_%": (100 * (serie - anterior) / anterior.where(anterior > 0)).round(1),
+    })
+
+
+def descomposicion(mensuales, periodo=12):
+    """
+    Descomposición aditiva clásica: observado = tendencia + estacional + residuo.
+    La tendencia es la media móvil centrada 2x`periodo` (NaN en los extremos);
+    con menos de dos ciclos completos sólo se devuelve la serie observada.
+    """
+    observado = mensuales.iloc[:, 0].astype("float64")
+    resultado = pd.DataFrame({"observado": observado})
+    if len(observado) < 2 * periodo:
+        return resultado
+
+    # media móvil centrada 2x12: pesos 1/24 en los extremos y 1/12 en el medio
+    pesos = np.r_[0.5, np.ones(periodo - 1), 0.5] / periodo
+    tendencia = np.full(len(observado), np.nan)
+    mitad = periodo // 2
+    tendencia[mitad:len(observado) - mitad] = np.convolve(observado.to_numpy(), pesos, mode="valid")
+
+    sin_tendencia = observado.to_numpy() - tendencia
+    posicion = np.arange(len(observado)) % periodo
+    validos = ~np.isnan(sin_tendencia)
+    suma = np.bincount(posicion[validos], weights=sin_tendencia[validos], minlength=periodo)
+    cantidad = np.bincount(posicion[validos], minlength=periodo)
+    promedio = suma / np.maximum(cantidad, 1)
+    estacional = (promedio - promedio.mean())[posicion]
+
+    resultado["tendencia"] = tendencia
+    resultado["estacional"] = estacional
+    resultado["residuo"] = observado.to_numpy() - tendencia - estacional
+    return resultado
+
+
+def tendencias(filas, dimension=None):
+    """
+    Todos los resultados de la página a partir de las filas ya filtradas:
+    matriz hora x día, sumas móviles (total y por `dimension`), variación
+    interanual y descomposición de la serie mensual total.
+    """
+    diarios = conteos_diarios(filas["fecha_hora"])
+    por_grupo = (
+        conteos_diarios(filas["fecha_hora"], filas[dimension])
+        if dimension is not None and dimension in filas.columns else None
+    )
+    mensuales = mensual(diarios) if len(diarios) else pd.DataFrame(columns=[COLUMNA_CONTEO])
+    return {
+        "hora_dia": matriz_hora_dia(filas),
+        "diarios": diarios,
+        "moviles": {v: ventana_movil(diarios, v) for v in VENTANAS} if len(diarios) else {},
+        "moviles_por_grupo": ventana_movil(por_grupo, VENTANAS[-1]) if por_grupo is not None and len(por_grupo) else None,
+        "interanual": variacion_interanual(mensuales) if len(mensuales) else None,
+        "descomposicion": descomposicion(mensuales) if len(mensuales) else None,
+    }
@@ -0,0 +1,100 @@
+# benchmarks/bench_api.py
+"""
+Prueba de carga de la API de consultas (app/api/main.py): N clientes
+concurrentes piden una mezcla de endpoints y filtros y se reporta la
+latencia p50/p99 por endpoint y el throughput total.
+
+Con --etag cada cliente repite el ETag de su última respuesta
+(If-None-Match), como haría un cliente con caché HTTP.
+
+Levantar la API: uvicorn app.api.main:app --port 8000
+Ejecutar: python -m benchmarks.bench_api --url http://localhost:8000 --clientes 16 --peticiones 2000
+"""
+
+import argparse
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import numpy as np
+
+AÑOS = [2019, 2020, 2021, 2022, 2023]
+ZONAS = ["ZONA CENTRO", "ZONA ESTE", "ZONA NORTE", "ZONA OESTE", "ZONA SUR"]
+
+
+def consultas_de_prueba(rng):
+    """(endpoint, ruta con parámetros) al azar, con filtros repetidos como en el dashboard."""
+    años = sorted(rng.sample(AÑOS, rng.randint(1, len(AÑOS))))
+    filtros = [("año", a) for a in años]
+    if rng.random() < 0.3:
+        filtros.append(("zona", rng.choice(ZONAS)))
+    opciones = [
+        ("/conteos", f"/conteos/{rng.choice(['zona', 'distrito', 'prevenible', 'hora'])}"),
+        ("/serie", "/serie"),
+        ("/serie?dia", "/serie?" + urlencode({"frecuencia": "dia"}) + "&"),
+        ("/barrios/top", "/barrios/top"),
+        ("/grilla", "/grilla?" + urlencode({"zoom": rng.choice([11, 12, 13])}) + "&"),
+    ]
+    nombre, ruta = rng.choice(opciones)
+    separador = "" if ruta.endswith("&") else "?"
+    return nombre, ruta + separador + urlencode(filtros)
+
+
+def cliente(url, peticiones, usar_etag, seed):
+    rng = random.Random(seed)
+    etags = {}
+    resultados = []
+    for _ in range(peticiones):
+        nombre, ruta = consultas_de_prueba(rng)
+        pedido = urllib.request.Request(url + ruta)
+        if usar_etag and ruta in etags:
+            pedido.add_header("If-None-Match", etags[ruta])
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(pedido) as r:
+                r.read()
+                etags[ruta] = r.headers.get("ETag")
+                estado = r.status
+        except urllib.error.HTTPError as e:
+            estado = e.code
+        resultados.append((nombre, estado, time.perf_counter() - t0))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--peticiones", type=int, default=2000, help="total, repartidas entre los clientes")
+    parser.add_argument("--etag", action="store_true", help="enviar If-None-Match con el último ETag")
+    args = parser.parse_args()
+
+    # el primer pedido carga el dataset en la API: fuera de la medición
+    urllib.request.urlopen(args.url + "/salud").read()
+
+    por_cliente = max(args.peticiones // args.clientes, 1)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.clientes) as pool:
+        partes = list(pool.map(
+            lambda i: cliente(args.url, por_cliente, args.etag, i), range(args.clientes)
+        ))
+    total = time.perf_counter() - t0
+    resultados = [r for parte in partes for r in parte]
+
+    print(f"{len(resultados):,} pedidos, {args.clientes} clientes, {total:.1f} s "
+          f"({len(resultados) / total:,.0f} pedidos/s)")
+    print(f"{'endpoint':<15}{'n':>7}{'p50 ms':>10}{'p99 ms':>10}{'304':>7}{'error':>7}")
+    for nombre in sorted({r[0] for r in resultados}) + ["total"]:
+        filas = [r for r in resultados if nombre in ("total", r[0])]
+        latencias = np.array([r[2] for r in filas]) * 1000
+        n_304 = sum(r[1] == 304 for r in filas)
+        errores = sum(r[1] >= 400 for r in filas)
+        print(f"{nombre:<15}{len(filas):>7}{np.percentile(latencias, 50):>10.1f}"
+              f"{np.percentile(latencias, 99):>10.1f}{n_304:>7}{errores:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_backfill.py
+"""
+Compara el relleno fila por fila (apply axis=1) contra el motor columnar de
+app/utils/hierarchy.py sobre un DataFrame sintético, y verifica que ambos
+produzcan exactamente la misma salida.
+
+Ejecutar: python -m benchmarks.bench_backfill --filas 2000000
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.hierarchy import backfill_jerarquia
+from app.utils.preprocess import MAPPING_JSON_COMISARIA, MAPPING_JSON_DISTRITO
+
+
+def _legacy_aplicar_mapping_lugar(df, mapping):
+    cols = ["comisaria", "distrito", "zona"]
+
+    def fill_row(row):
+        barrio = row.get("barrio")
+        if not barrio or barrio not in mapping:
+            return row
+        for col in cols:
+            if pd.isna(row[col]) and col in mapping[barrio]:
+                row[col] = mapping[barrio][col]
+        return row
+
+    return df.apply(fill_row, axis=1)
+
+
+def _legacy_fill_zona_from_distrito(df, mapping):
+    def get_zona(row):
+        if pd.isna(row["zona"]) and row["distrito"] in mapping:
+            return mapping[row["distrito"]]["zona"]
+        return row["zona"]
+
+    df["zona"] = df.apply(get_zona, axis=1)
+    return df
+
+
+def generar_frame(filas, seed=42):
+    """DataFrame con barrios reales y desconocidos y ~30% de nulos en cada nivel."""
+    rng = np.random.default_rng(seed)
+    with open(MAPPING_JSON_COMISARIA, "r", encoding="utf-8") as f:
+        barrios = list(json.load(f))
+    with open(MAPPING_JSON_DISTRITO, "r", encoding="utf-8") as f:
+        distritos = list(json.load(f))
+    barrios_vocab = np.array(barrios + ["BARRIO DESCONOCIDO", None], dtype=object)
+
+    def con_nulos(valores):
+        valores = valores.astype(object)
+        valores[rng.random(filas) < 0.3] = None
+        return valores
+
+    return pd.DataFrame({
+        "id": np.arange(filas).astype(str),
+        "barrio": barrios_vocab[rng.integers(0, len(barrios_vocab), filas)],
+        "comisaria": con_nulos(rng.choice(["COMISARIA 1", "COMISARIA 2"], filas)),
+        "distrito": con_nulos(rng.choice(distritos + ["DISTRITO 99"], filas)),
+        "zona": con_nulos(rng.choice(["ZONA CENTRO", "ZONA SUR"], filas)),
+        "latitud": rng.uniform(-31.5, -31.3, filas),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    print(f"Generando DataFrame sintético de {args.filas:,} filas...")
+    base = generar_frame(args.filas)
+    with open(MAPPING_JSON_COMISARIA, "r", encoding="utf-8") as f:
+        mapping_barrios = json.load(f)
+    with open(MAPPING_JSON_DISTRITO, "r", encoding="utf-8") as f:
+        mapping_distritos = json.load(f)
+
+    t0 = time.perf_counter()
+    esperado = _legacy_aplicar_mapping_lugar(base.copy(), mapping_barrios)
+    esperado = _legacy_fill_zona_from_distrito(esperado, mapping_distritos)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    obtenido, reporte = backfill_jerarquia(base.copy(), MAPPING_JSON_COMISARIA, MAPPING_JSON_DISTRITO)
+    t_columnar = time.perf_counter() - t0
+
+    pd.testing.assert_frame_equal(obtenido, esperado)
+    print("✅ Salidas idénticas")
+    print("Filas completadas:", reporte)
+    print(f"apply fila por fila: {t_legacy:8.2f} s")
+    print(f"motor columnar:      {t_columnar:8.2f} s  (x{t_legacy / t_columnar:.0f})")
+
+
+if __name__ == "__main__":
+    main()
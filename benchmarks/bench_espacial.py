@@ -0,0 +1,76 @@
+# benchmarks/bench_espacial.py
+"""
+Micro-benchmark de la asignación de distrito por coordenadas
+(app/utils/spatial.py) contra un loop de `contains` por fila y polígono,
+sobre puntos sintéticos dentro de la caja de Córdoba. Verifica que ambos
+asignen el mismo distrito.
+
+Ejecutar: python -m benchmarks.bench_espacial --filas 2000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.coords import BBOX_CORDOBA
+from app.utils.spatial import arbol_distritos, distrito_por_coordenadas
+
+
+def generar_puntos(filas, seed=42):
+    rng = np.random.default_rng(seed)
+    lat_min, lat_max, lon_min, lon_max = BBOX_CORDOBA
+    lat = rng.uniform(lat_min, lat_max, filas)
+    lon = rng.uniform(lon_min, lon_max, filas)
+    lat[rng.random(filas) < 0.05] = np.nan  # hechos sin coordenadas
+    return lat, lon
+
+
+def por_fila(lat, lon):
+    """Asignación ingenua: cada punto contra cada polígono."""
+    from shapely.geometry import Point
+
+    arbol, nombres = arbol_distritos()
+    poligonos = list(arbol.geometries)
+    resultado = []
+    for la, lo in zip(lat, lon):
+        nombre = None
+        if not (np.isnan(la) or np.isnan(lo)):
+            punto = Point(lo, la)
+            for poligono, n in zip(poligonos, nombres):
+                if poligono.contains(punto):
+                    nombre = n
+                    break
+        resultado.append(nombre)
+    return np.array(resultado, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=2_000_000)
+    parser.add_argument("--filas-loop", type=int, default=20_000,
+                        help="filas para el loop por fila (se extrapola al total)")
+    args = parser.parse_args()
+
+    lat, lon = generar_puntos(args.filas)
+    arbol_distritos()  # construir el árbol fuera de la medición
+
+    t0 = time.perf_counter()
+    asignados = distrito_por_coordenadas(lat, lon)
+    t_arbol = time.perf_counter() - t0
+
+    n = min(args.filas_loop, args.filas)
+    t0 = time.perf_counter()
+    esperados = por_fila(lat[:n], lon[:n])
+    t_loop = (time.perf_counter() - t0) * args.filas / n
+
+    assert (asignados[:n] == esperados).all(), "El STRtree y el loop asignan distritos distintos"
+    print(f"Puntos: {args.filas:,}; dentro de algún distrito: {int(pd.notna(asignados).sum()):,}")
+    print(f"  STRtree por lotes:  {t_arbol:8.2f} s")
+    print(f"  loop por fila:      {t_loop:8.2f} s (extrapolado desde {n:,} filas)")
+    print(f"  aceleración:        {t_loop / t_arbol:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_filtros.py
+"""
+Micro-benchmark del índice de filtros (app/utils/filters.py) contra el
+filtrado con máscaras `isin` que usaban el sidebar y las páginas, sobre un
+DataFrame sintético con el esquema compacto. Verifica que ambos devuelvan
+exactamente las mismas filas.
+
+Ejecutar: python -m benchmarks.bench_filtros --filas 5000000
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.filters import IndiceFiltros, apply_filters
+from app.utils.preprocess import MAPPING_JSON_COMISARIA
+from app.utils.schema import aplicar_esquema
+
+AÑOS = [2019, 2020, 2021, 2022, 2023]
+ZONAS = ["ZONA CENTRO", "ZONA ESTE", "ZONA NORTE", "ZONA OESTE", "ZONA SUR"]
+TIPOS = ["ROBO Y HURTO VIA PUBLICA", "ROBO Y HURTO DOMICILIARIO", "ASALTO VIA PUBLICA"]
+
+
+def generar_frame(filas, seed=42):
+    rng = np.random.default_rng(seed)
+    with open(MAPPING_JSON_COMISARIA, "r", encoding="utf-8") as f:
+        barrios = np.array(list(json.load(f)), dtype=object)
+    df = pd.DataFrame({
+        "año": rng.choice(AÑOS, filas),
+        "barrio": barrios[rng.integers(0, len(barrios), filas)],
+        "zona": rng.choice(ZONAS, filas),
+        "distrito": rng.choice([f"DISTRITO {i}" for i in range(1, 14)], filas),
+        "prevenible": rng.choice(TIPOS, filas),
+    })
+    return aplicar_esquema(df), list(barrios)
+
+
+def mascaras(df, filtros):
+    """Filtrado como estaba copiado en cada página."""
+    filtro = df
+    for col, valores in filtros.items():
+        filtro = filtro[filtro[col].isin(valores)]
+    return filtro
+
+
+def medir(funcion, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    print(f"Generando DataFrame sintético de {args.filas:,} filas...")
+    df, barrios = generar_frame(args.filas)
+
+    t0 = time.perf_counter()
+    indice = IndiceFiltros.desde_dataframe(df)
+    print(f"Construcción del índice: {time.perf_counter() - t0:.2f} s (una vez por carga)")
+
+    casos = {
+        "todos los años": {"año": AÑOS},
+        "1 año": {"año": [2023]},
+        "2 años + 3 barrios": {"año": [2022, 2023], "barrio": barrios[:3]},
+        "3 años + 50 barrios": {"año": AÑOS[:3], "barrio": barrios[:50]},
+        "1 año + zona + tipo": {"año": [2021], "zona": ZONAS[:2], "prevenible": TIPOS[:1]},
+        "todos los filtros": {
+            "año": [2020, 2023], "barrio": barrios[:200], "zona": ZONAS[1:],
+            "distrito": ["DISTRITO 1", "DISTRITO 7"], "prevenible": TIPOS[:2],
+        },
+    }
+
+    print(f"{'caso':<24}{'máscaras':>12}{'índice':>12}{'speedup':>10}{'filas':>12}")
+    for nombre, filtros in casos.items():
+        t_mascara, esperado = medir(lambda: mascaras(df, filtros))
+        t_indice, filas = medir(lambda: indice.resolver(filtros))
+        obtenido = apply_filters(df, filtros, indice=indice)
+        np.testing.assert_array_equal(obtenido.index.to_numpy(), esperado.index.to_numpy())
+        print(
+            f"{nombre:<24}{t_mascara * 1e3:>10.1f}ms{t_indice * 1e3:>10.1f}ms"
+            f"{t_mascara / t_indice:>9.1f}x{len(obtenido):>12,}"
+        )
+    print("✅ Mismas filas en todos los casos")
+
+
+if __name__ == "__main__":
+    main()
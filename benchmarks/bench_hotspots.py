@@ -0,0 +1,79 @@
+# benchmarks/bench_hotspots.py
+"""
+Micro-benchmark de las zonas calientes (app/utils/hotspots.py): KDE y Gi*
+por grilla + FFT sobre puntos sintéticos agrupados alrededor del centro de
+Córdoba. Verifica el z de Gi* contra el cálculo directo (suma sobre las
+celdas vecinas) en una muestra de celdas.
+
+Ejecutar: python -m benchmarks.bench_hotspots --filas 3000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.hotspots import (
+    ANCHO_BANDA_M,
+    CELDA_M,
+    calcular_hotspots,
+    contar_en_grilla,
+    getis_ord,
+    grilla,
+    mascara_distritos,
+)
+
+
+def generar_puntos(filas, seed=42):
+    rng = np.random.default_rng(seed)
+    lat = rng.normal(-31.42, 0.05, filas)
+    lon = rng.normal(-64.19, 0.05, filas)
+    return lat, lon
+
+
+def gi_directo(conteos, mascara, distancia_m, celda_m, celdas):
+    """Gi* de cada celda pedida sumando explícitamente sus vecinos."""
+    ys, xs = np.nonzero(mascara)
+    x = conteos[mascara]
+    n = len(x)
+    media = x.mean()
+    s = np.sqrt((x ** 2).mean() - media ** 2)
+    resultado = []
+    for iy, ix in celdas:
+        w = ((ys - iy) ** 2 + (xs - ix) ** 2) * celda_m ** 2 <= distancia_m ** 2
+        sw = w.sum()
+        resultado.append((x[w].sum() - media * sw) / (s * np.sqrt((n * sw - sw ** 2) / (n - 1))))
+    return np.array(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=3_000_000)
+    parser.add_argument("--celda", type=int, default=CELDA_M)
+    parser.add_argument("--ancho-banda", type=int, default=ANCHO_BANDA_M)
+    args = parser.parse_args()
+
+    lat, lon = generar_puntos(args.filas)
+    g = grilla(args.celda)
+    mascara = mascara_distritos(g)  # también construye el árbol de distritos
+
+    t0 = time.perf_counter()
+    celdas = calcular_hotspots(lat, lon, args.ancho_banda, args.celda)
+    t_total = time.perf_counter() - t0
+
+    conteos = contar_en_grilla(lat, lon, g)
+    z = getis_ord(conteos, args.ancho_banda, args.celda, mascara)
+    rng = np.random.default_rng(0)
+    muestra = [tuple(c) for c in np.argwhere(mascara)[rng.choice(int(mascara.sum()), 200, replace=False)]]
+    esperado = gi_directo(conteos, mascara, args.ancho_banda, args.celda, muestra)
+    assert np.allclose([z[c] for c in muestra], esperado), "Gi* por FFT y directo no coinciden"
+
+    print(f"Puntos: {args.filas:,}; grilla {g['forma'][0]}x{g['forma'][1]} de {args.celda} m; "
+          f"{len(celdas):,} celdas en los distritos")
+    print(f"  KDE + Gi*:          {t_total:8.2f} s")
+    print(f"  Gi* por FFT verificado contra el cálculo directo en {len(muestra)} celdas")
+    print(celdas["nivel"].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
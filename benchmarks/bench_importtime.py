@@ -0,0 +1,96 @@
+# benchmarks/bench_importtime.py
+"""
+Tiempo de arranque de los módulos y páginas del dashboard.
+
+1. Importación (`python -X importtime`): para cada módulo, el tiempo
+   acumulado de importarlo en un proceso nuevo donde streamlit, pandas y
+   numpy ya están cargados (como en el servidor), más las dependencias que
+   más pesan.
+2. Primer render de cada página (opcional, --paginas): un proceso nuevo por
+   página corre el script con el AppTest de streamlit, en frío. Necesita los
+   datos limpios en data/ del directorio actual.
+
+Ejecutar: python -m benchmarks.bench_importtime [--paginas] [--salida importtime.json]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+MODULOS = [
+    "app.utils.loader",
+    "app.dashboard.sidebar",
+    "app.dashboard.charts",
+    "app.utils.maps",
+    "app.dashboard.main",
+]
+PAGINAS = ["main.py", "pages/1_Evolución.py", "pages/2_Barrios.py", "pages/3_Mapa.py", "pages/4_Comparación.py"]
+PRECARGA = "import streamlit, pandas, numpy"
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def tiempos_importacion(modulo):
+    """(acumulado del módulo en s, [(dependencia, s)] más pesadas) en un proceso nuevo."""
+    salida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{PRECARGA}; import {modulo}"],
+        capture_output=True, text=True, cwd=RAIZ, check=True,
+    ).stderr
+    # las líneas de la precarga van primero: sólo cuenta lo que viene después de ellas
+    lineas = [linea for linea in salida.splitlines() if linea.startswith("import time:")][1:]
+    inicio = max(i for i, linea in enumerate(lineas) if linea.split("|")[2].strip() in ("streamlit", "numpy", "pandas"))
+    registros = []
+    for linea in lineas[inicio + 1:]:
+        propio, acumulado, nombre = linea.split(":", 1)[1].split("|")
+        registros.append((nombre.rstrip(), int(propio) / 1e6, int(acumulado) / 1e6))
+    total = next(acum for nombre, _, acum in registros if nombre.strip() == modulo)
+    # dependencias directas del módulo (un nivel de indentación)
+    directas = [(n.strip(), a) for n, _, a in registros if n.startswith("   ") and not n.startswith("     ")]
+    pesadas = sorted(directas, key=lambda r: -r[1])[:5]
+    return total, pesadas
+
+
+def primer_render(pagina):
+    """Segundos del primer `AppTest.run()` de la página en un proceso nuevo."""
+    codigo = (
+        "import sys, time; sys.path.insert(0, %r)\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        "t = time.perf_counter()\n"
+        "at = AppTest.from_file(%r, default_timeout=300).run()\n"
+        "print(time.perf_counter() - t, len(at.exception))\n"
+    ) % (str(RAIZ), str(RAIZ / pagina))
+    salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True).stdout
+    segundos, errores = salida.split()[-2:]
+    return float(segundos), int(errores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paginas", action="store_true", help="Medir también el primer render de cada página.")
+    parser.add_argument("--salida", default=None, help="Guardar los resultados en este JSON.")
+    args = parser.parse_args()
+
+    resultados = {"importacion": {}, "primer_render": {}}
+    print(f"Importación (con '{PRECARGA}' ya cargado):")
+    for modulo in MODULOS:
+        total, pesadas = tiempos_importacion(modulo)
+        resultados["importacion"][modulo] = {"segundos": round(total, 4), "mas_pesadas": dict(pesadas)}
+        detalle = ", ".join(f"{n} {s:.3f}" for n, s in pesadas[:3])
+        print(f"  {modulo:28} {total:7.3f} s   ({detalle})")
+
+    if args.paginas:
+        print("Primer render (proceso nuevo por página):")
+        for pagina in PAGINAS:
+            segundos, errores = primer_render(pagina)
+            resultados["primer_render"][pagina] = {"segundos": round(segundos, 3), "excepciones": errores}
+            print(f"  {pagina:28} {segundos:7.3f} s" + (f"   ⚠️ {errores} excepciones" if errores else ""))
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"✅ Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
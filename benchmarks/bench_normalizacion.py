@@ -0,0 +1,103 @@
+# benchmarks/bench_normalizacion.py
+"""
+Micro-benchmark de la normalización de texto (app/utils/normalize.py):
+
+1. `.apply(normalize_text)` por celda contra `normalizar_columna` (una vez
+   por valor distinto) sobre una columna de barrios sintética. Verifica que
+   den el mismo resultado.
+2. Canonicalización con y sin fuzzy de variantes ruidosas de los barrios
+   del mapping (espacios, tildes, letras cambiadas), contra el vocabulario
+   del mapping: tiempo y aciertos.
+
+Ejecutar: python -m benchmarks.bench_normalizacion --filas 5000000
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.normalize import (
+    Canonizador,
+    forma_limpia,
+    normalize_text,
+    normalizar_columna,
+    sin_tildes,
+)
+from app.utils.preprocess import MAPPING_JSON_COMISARIA
+
+
+def leer_barrios():
+    with open(MAPPING_JSON_COMISARIA, "r", encoding="utf-8") as f:
+        return list(json.load(f))
+
+
+def ensuciar(valor, rng):
+    """Variante ruidosa: minúsculas/espacios, sin tildes, sin espacios o una letra cambiada."""
+    tipo = rng.integers(4)
+    if tipo == 0:
+        return f"  {valor.lower()} "
+    if tipo == 1:
+        return sin_tildes(valor).replace(" ", "  ")
+    if tipo == 2:
+        return valor.replace(" ", "")
+    letras = [i for i, c in enumerate(valor) if c.isalpha()]
+    if len(letras) < 8:
+        return valor
+    i = letras[rng.integers(len(letras))]
+    return valor[:i] + ("A" if valor[i] != "A" else "E") + valor[i + 1:]
+
+
+def medir(funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=5_000_000)
+    parser.add_argument("--variantes", type=int, default=2000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+
+    barrios = leer_barrios()
+    crudos = np.array(
+        [f" {b.lower()} " for b in barrios] + ["s/d", "-", ""], dtype=object
+    )
+    serie = pd.Series(crudos[rng.integers(0, len(crudos), args.filas)])
+
+    t_apply, esperado = medir(lambda: serie.apply(normalize_text), 1)
+    t_vocab, obtenido = medir(lambda: normalizar_columna(serie))
+    assert esperado.equals(obtenido), "normalizar_columna no coincide con apply(normalize_text)"
+    print(f"Normalización de {args.filas:,} filas ({len(crudos)} valores distintos):")
+    print(f"  apply por celda:       {t_apply:8.3f} s")
+    print(f"  por vocabulario:       {t_vocab:8.3f} s ({t_apply / t_vocab:.0f}x)")
+
+    # canonicalización: cada variante debería volver a la forma canónica de su barrio
+    originales = [barrios[i] for i in rng.integers(0, len(barrios), args.variantes)]
+    variantes = [normalize_text(ensuciar(b, rng)) for b in originales]
+    vocabulario = tuple(barrios)
+    for fuzzy in (False, True):
+        referencia = Canonizador(vocabulario)
+        canonizador = Canonizador(vocabulario, fuzzy=fuzzy)
+        t0 = time.perf_counter()
+        resueltos = [canonizador(v) for v in variantes]
+        t = time.perf_counter() - t0
+        aciertos = sum(r == referencia(o) for r, o in zip(resueltos, originales))
+        errores = sum(
+            r != referencia(o) and r != forma_limpia(v)
+            for r, o, v in zip(resueltos, originales, variantes)
+        )
+        print(f"Canonicalización de {args.variantes:,} variantes (fuzzy={fuzzy}):")
+        print(f"  tiempo: {t:.3f} s; aciertos: {aciertos / len(variantes):.1%}; "
+              f"unidas a otro barrio: {errores}")
+
+
+if __name__ == "__main__":
+    main()
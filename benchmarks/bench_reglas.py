@@ -0,0 +1,50 @@
+# benchmarks/bench_reglas.py
+"""
+Micro-benchmark de la tabla de reglas (app/utils/reglas.py) contra las 13
+pasadas de `str.replace` con las que se corregían los numerales romanos de
+los distritos. Verifica que ambos den exactamente el mismo resultado,
+incluidos casos borde (minúsculas, "DISTRITO XIV", dos distritos en el
+mismo valor, valores ya numéricos y nulos). La verificación exhaustiva de
+equivalencia está en `python -m app.utils.reglas`.
+
+Ejecutar: python -m benchmarks.bench_reglas --filas 5000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.reglas import BORDES_DISTRITO as BORDES, REGLAS_DISTRITO, pasadas_legacy, reglas_distrito
+
+ROMANOS = [patron.split()[-1] for patron, _ in REGLAS_DISTRITO]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=5_000_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+
+    valores = np.array([f"DISTRITO {r}" for r in ROMANOS] + BORDES, dtype=object)
+    serie = pd.Series(valores[rng.integers(0, len(valores), args.filas)])
+
+    t0 = time.perf_counter()
+    esperado = pasadas_legacy(serie)
+    t_pasadas = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    obtenido = reglas_distrito().aplicar(serie)
+    t_tabla = time.perf_counter() - t0
+
+    assert esperado.where(esperado.notna(), None).equals(obtenido), "La tabla de reglas no coincide"
+    for v in BORDES:
+        print(f"  {v!r:32} -> {reglas_distrito().traducir(v)!r}")
+    print(f"Distritos ({args.filas:,} filas, {len(valores)} valores distintos):")
+    print(f"  13 pasadas str.replace: {t_pasadas:8.3f} s")
+    print(f"  tabla de reglas:        {t_tabla:8.3f} s ({t_pasadas / t_tabla:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
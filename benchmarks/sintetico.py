@@ -0,0 +1,258 @@
+# benchmarks/sintetico.py
+"""
+Generador reproducible de hechos sintéticos con la forma del CSV crudo
+(data/delitos_cordoba_2019_2023.csv), para medir el pipeline completo sin
+los datos reales.
+
+- Vocabularios reales: barrios con su comisaría/distrito/zona de
+  data/comisarias_mapping.json y tipos de hecho (sus alias crudos) de
+  data/delitos_mapping.json.
+- Coordenadas dentro de data/distritos_policiales.geojson: cada barrio
+  tiene un centro dentro de un polígono de su distrito y sus hechos se
+  reparten alrededor (X/Y en POSGAR, EPSG:22174, como el CSV original).
+- Distribuciones parecidas a las reales: pocos barrios concentran muchos
+  hechos, más hechos de tarde/noche y en verano, algo de tendencia entre años.
+- Ruido como el de la fuente: jerarquía incompleta, distritos con numerales
+  romanos, texto en minúsculas o con espacios de más, filas sólo con X/Y y
+  filas sin coordenadas.
+
+Con la misma semilla y la misma cantidad de filas la salida es idéntica:
+cada bloque usa su propio generador derivado de (semilla, nº de bloque).
+
+Ejecutar: python -m benchmarks.sintetico --filas 1M --salida /tmp/delitos.csv
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from app.utils.coords import a_wgs84
+from app.utils.geodata import DISTRITOS_GEOJSON
+from app.utils.preprocess import MAPPING_JSON, MAPPING_JSON_COMISARIA
+from app.utils.reglas import reglas_distrito
+from app.utils.spatial import distrito_base
+
+TAMAÑOS = {"100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+AÑOS = [2019, 2020, 2021, 2022, 2023]
+FILAS_POR_BLOQUE = 500_000
+DISPERSION_M = 400  # desvío de los hechos alrededor del centro de su barrio
+
+# pesos relativos por hora (0-23) y mes (1-12)
+PESO_HORA = np.array([5, 4, 3, 2, 2, 2, 3, 5, 7, 8, 8, 8, 9, 9, 9, 9, 10, 11, 12, 12, 11, 10, 8, 6], dtype=float)
+PESO_MES = np.array([11, 10, 9, 8, 8, 7, 8, 8, 8, 9, 10, 11], dtype=float)
+PESO_AÑO = np.array([1.0, 0.8, 0.9, 1.05, 1.1])
+PESO_DIA_SEMANA = np.array([1.0, 1.0, 1.0, 1.05, 1.15, 1.2, 1.0])  # lunes a domingo
+
+DELITOS = ["ROBO", "HURTO", "ROBO CALIFICADO", "HURTO AGRAVADO", "TENTATIVA DE ROBO"]
+CALLES = ["AV COLON", "SAN MARTIN", "AV VELEZ SARSFIELD", "BV SAN JUAN", "AV SABATTINI",
+          "AV DONATO ALVAREZ", "RIVERA INDARTE", "AV FUERZA AEREA", "AV LA VOZ DEL INTERIOR", "AV MONSEÑOR PABLO CABRERA"]
+ROMANOS = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII", "XIII"]
+
+COLUMNAS = ["id", "fecha_hech", "hora_hecho", "barrio", "comisaria", "distrito", "zona", "prevenible",
+            "delito", "calle", "cuadrantes", "latitud", "longitud", "X", "Y", "Latitud", "Longitud"]
+ESQUEMA = pa.schema([
+    (c, pa.float64() if c in ("latitud", "longitud", "X", "Y") else pa.string()) for c in COLUMNAS
+])
+
+
+def parsear_filas(valor):
+    """'100k', '1M', '10M' o un entero."""
+    return TAMAÑOS.get(valor) or int(str(valor).replace("_", ""))
+
+
+def _poligonos():
+    """{distrito base: [polígonos shapely]} en POSGAR, desde el GeoJSON original."""
+    from shapely.geometry import shape
+
+    with open(DISTRITOS_GEOJSON, "r", encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    por_distrito = {}
+    for feature in features:
+        poligono = shape(feature["geometry"])
+        por_distrito.setdefault(distrito_base(feature["properties"]["nombre"]), []).append(poligono)
+    return por_distrito
+
+
+def _puntos_en(poligono, n, rng):
+    """`n` puntos uniformes dentro de `poligono` (rechazo sobre su caja)."""
+    import shapely
+
+    x_min, y_min, x_max, y_max = poligono.bounds
+    xs, ys = [], []
+    faltan = n
+    while faltan > 0:
+        x = rng.uniform(x_min, x_max, faltan * 3)
+        y = rng.uniform(y_min, y_max, faltan * 3)
+        dentro = shapely.contains_xy(poligono, x, y)
+        xs.append(x[dentro][:faltan])
+        ys.append(y[dentro][:faltan])
+        faltan -= len(xs[-1])
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def catalogo(seed=42):
+    """
+    Barrios con su jerarquía, peso (tipo Zipf) y centro X/Y dentro de su
+    distrito, y tipos de hecho crudos con sus pesos. Depende sólo de `seed`.
+    """
+    rng = np.random.default_rng([seed, 0])
+    with open(MAPPING_JSON_COMISARIA, "r", encoding="utf-8") as f:
+        mapping = json.load(f)
+    barrios = pd.DataFrame.from_dict(mapping, orient="index").rename_axis("barrio").reset_index()
+    barrios = barrios.dropna(subset=["distrito"]).reset_index(drop=True)
+    barrios["peso"] = 1.0 / np.arange(1, len(barrios) + 1) ** 0.8
+    barrios["peso"] = rng.permutation(barrios["peso"].to_numpy())
+    barrios["peso"] /= barrios["peso"].sum()
+
+    # centro de cada barrio dentro de un polígono de su distrito (o de cualquiera si no tiene)
+    poligonos = _poligonos()
+    todos = [p for lista in poligonos.values() for p in lista]
+    base = reglas_distrito().aplicar(barrios["distrito"]).map(distrito_base)
+    cx = np.empty(len(barrios))
+    cy = np.empty(len(barrios))
+    for distrito, filas in base.groupby(base, dropna=False).groups.items():
+        candidatos = poligonos.get(distrito, todos)
+        areas = np.array([p.area for p in candidatos])
+        elegidos = rng.choice(len(candidatos), len(filas), p=areas / areas.sum())
+        for i in np.unique(elegidos):
+            destino = np.asarray(filas)[elegidos == i]
+            cx[destino], cy[destino] = _puntos_en(candidatos[i], len(destino), rng)
+    barrios["cx"], barrios["cy"] = cx, cy
+
+    with open(MAPPING_JSON, "r", encoding="utf-8") as f:
+        tipos = np.array(list(json.load(f)), dtype=object)
+    peso_tipos = rng.dirichlet(np.ones(len(tipos)) * 2)
+    return barrios, tipos, peso_tipos
+
+
+def _dias():
+    """Días del período con su peso (año, mes y día de la semana)."""
+    dias = pd.date_range(f"{AÑOS[0]}-01-01", f"{AÑOS[-1]}-12-31", freq="D")
+    peso = (PESO_AÑO[dias.year - AÑOS[0]] * PESO_MES[dias.month - 1] * PESO_DIA_SEMANA[dias.dayofweek])
+    return dias, peso / peso.sum()
+
+
+def _ensuciar(valores, rng, proporcion):
+    """Pasa a minúsculas o agrega espacios en una `proporcion` de los valores."""
+    valores = valores.copy()
+    sucios = np.flatnonzero(rng.random(len(valores)) < proporcion)
+    for i in sucios:
+        v = valores[i]
+        if isinstance(v, str):
+            valores[i] = f" {v.lower()}" if i % 2 else v.replace(" ", "  ")
+    return valores
+
+
+def _con_nulos(valores, rng, proporcion):
+    valores = np.asarray(valores, dtype=object).copy()
+    valores[rng.random(len(valores)) < proporcion] = None
+    return valores
+
+
+def bloque(inicio, filas, seed, barrios, tipos, peso_tipos, dias, peso_dias):
+    """DataFrame con `filas` hechos crudos; ids desde `inicio`."""
+    rng = np.random.default_rng([seed, 1, inicio])
+
+    b = rng.choice(len(barrios), filas, p=barrios["peso"].to_numpy())
+    fila = barrios.iloc[b]
+
+    fechas = dias[rng.choice(len(dias), filas, p=peso_dias)]
+    horas = rng.choice(24, filas, p=PESO_HORA / PESO_HORA.sum())
+    minutos = rng.integers(0, 60, filas)
+    hora_hecho = pd.Series(horas).astype(str).str.zfill(2) + ":" + pd.Series(minutos).astype(str).str.zfill(2) + ":00"
+
+    x = fila["cx"].to_numpy() + rng.normal(0, DISPERSION_M, filas)
+    y = fila["cy"].to_numpy() + rng.normal(0, DISPERSION_M, filas)
+    lat, lon = a_wgs84(x, y)
+    lat, lon = lat.round(6), lon.round(6)
+    # ~12% sólo con X/Y (el preprocesamiento reproyecta) y ~3% sin coordenadas
+    sin_latlon = rng.random(filas) < 0.12
+    lat[sin_latlon] = np.nan
+    lon[sin_latlon] = np.nan
+    sin_coords = rng.random(filas) < 0.03
+    for v in (lat, lon, x, y):
+        v[sin_coords] = np.nan
+
+    # distritos escritos con numerales romanos en parte de las filas
+    distrito = fila["distrito"].to_numpy(dtype=object).copy()
+    romano = rng.random(filas) < 0.25
+    numeros = pd.Series(distrito[romano]).str.extract(r"^DISTRITO (\d+)$")[0]
+    convertibles = numeros.notna().to_numpy()
+    distrito[np.flatnonzero(romano)[convertibles]] = [
+        f"DISTRITO {ROMANOS[int(n) - 1]}" if 1 <= int(n) <= len(ROMANOS) else f"DISTRITO {n}"
+        for n in numeros[convertibles]
+    ]
+
+    # columnas duplicadas en texto con coma decimal (el preprocesamiento las descarta)
+    latitud_txt, longitud_txt = (
+        pd.Series(v).astype(str).str.replace(".", ",", regex=False).where(~np.isnan(v), "")
+        for v in (lat, lon)
+    )
+
+    return pd.DataFrame({
+        "id": np.arange(inicio, inicio + filas).astype(str),
+        "fecha_hech": _con_nulos(fechas.strftime("%Y-%m-%d"), rng, 0.005),
+        "hora_hecho": _con_nulos(hora_hecho, rng, 0.01),
+        "barrio": _con_nulos(_ensuciar(fila["barrio"].to_numpy(dtype=object), rng, 0.05), rng, 0.02),
+        "comisaria": _con_nulos(fila["comisaria"], rng, 0.25),
+        "distrito": _con_nulos(distrito, rng, 0.25),
+        "zona": _con_nulos(fila["zona"], rng, 0.35),
+        "prevenible": _con_nulos(tipos[rng.choice(len(tipos), filas, p=peso_tipos)], rng, 0.01),
+        "delito": np.array(DELITOS, dtype=object)[rng.integers(0, len(DELITOS), filas)],
+        "calle": _ensuciar(np.array(CALLES, dtype=object)[rng.integers(0, len(CALLES), filas)], rng, 0.05),
+        "cuadrantes": ("C" + pd.Series(rng.integers(1, 400, filas)).astype(str)).to_numpy(dtype=object),
+        "latitud": lat,
+        "longitud": lon,
+        "X": x.round(3),
+        "Y": y.round(3),
+        "Latitud": latitud_txt.to_numpy(dtype=object),
+        "Longitud": longitud_txt.to_numpy(dtype=object),
+    })
+
+
+def generar(filas, seed=42, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Itera los bloques (DataFrames) de `filas` hechos sintéticos."""
+    barrios, tipos, peso_tipos = catalogo(seed)
+    dias, peso_dias = _dias()
+    for inicio in range(0, filas, filas_por_bloque):
+        yield bloque(inicio, min(filas_por_bloque, filas - inicio), seed,
+                     barrios, tipos, peso_tipos, dias, peso_dias)
+
+
+def escribir_csv(path, filas, seed=42, filas_por_bloque=FILAS_POR_BLOQUE, verbose=True):
+    """Escribe el CSV crudo sintético de a bloques (la memoria no depende de `filas`)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    t0 = time.perf_counter()
+    escritas = 0
+    with pacsv.CSVWriter(tmp, ESQUEMA) as writer:
+        for df in generar(filas, seed, filas_por_bloque):
+            writer.write_table(pa.Table.from_pandas(df, schema=ESQUEMA, preserve_index=False))
+            escritas += len(df)
+            if verbose:
+                print(f"   {escritas:,} filas")
+    tmp.replace(path)
+    if verbose:
+        print(f"✅ CSV sintético guardado en: {path} ({escritas:,} filas, "
+              f"{path.stat().st_size / 1e6:.0f} MB, {time.perf_counter() - t0:.1f} s)")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera hechos sintéticos con la forma del CSV crudo.")
+    parser.add_argument("--filas", default="100k", help="100k, 1M, 10M o un entero")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--salida", default="data/delitos_cordoba_2019_2023.csv")
+    args = parser.parse_args()
+    escribir_csv(args.salida, parsear_filas(args.filas), args.seed)
+
+
+if __name__ == "__main__":
+    main()
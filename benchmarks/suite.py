@@ -0,0 +1,411 @@
+# benchmarks/suite.py
+"""
+Suite reproducible de benchmarks del pipeline completo sobre datos
+sintéticos (benchmarks/sintetico.py), con resultados en JSON para comparar
+commits.
+
+Cada corrida arma un directorio de trabajo con los mappings y geometrías de
+data/ y un CSV crudo sintético de N filas (se reutiliza si ya existe con la
+misma semilla), y se ubica en él: los módulos usan rutas relativas a data/.
+Se mide:
+
+- preprocess: `preprocess.main()` en memoria y en chunks;
+- loader: `load_data` completo y de un año (sin la caché de Streamlit);
+- charts: `plot_barrios` / `plot_evolucion` sobre filas y sobre el rollup año x mes x barrio;
+- comparacion: conteos y figuras de pages/4_Comparación.py;
+- mapas: cada modo de `maps.page_mapa`, renderizado con el AppTest de
+  Streamlit (sin cachés: se mide la construcción completa);
+- geometria: la capa de distritos que viaja al navegador, a precisión
+  completa y en cada nivel de detalle, y el HTML de un mapa por zoom (con
+  los bytes de cada uno).
+
+Por caso: tiempo mínimo y mediana de `--repeticiones` corridas, y el pico de
+memoria de una corrida extra con tracemalloc (allocations de Python y numpy;
+los buffers de Arrow no se ven). Las corridas de mapas que terminan con
+excepciones quedan marcadas en `errores`.
+
+Ejecutar: python -m benchmarks.suite --filas 1M [--solo charts,mapas] [--salida resultados.json]
+Comparar: python -m benchmarks.suite --comparar base.json nuevo.json [--umbral 10]
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib.util
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+RESULTADOS = RAIZ / "benchmarks" / "resultados"
+GRUPOS = ["preprocess", "loader", "charts", "comparacion", "mapas", "geometria"]
+# lo que el pipeline lee de data/ además del CSV crudo
+ARCHIVOS_DATA = [
+    "*_mapping.json", "distritos_policiales*.geojson", "distritos_policiales*.topojson",
+    "distritos_etiquetas_wgs84.json",
+]
+MODOS_MAPA = [
+    ("Folium interactivo", "Puntos"),
+    ("Folium interactivo", "Clúster"),
+    ("Folium interactivo", "Mapa de calor"),
+    ("Folium interactivo", "Mapa de calor temporal"),
+    ("Folium interactivo", "Zonas calientes (KDE / Gi*)"),
+    ("Plotly XY", "Scatter"),
+    ("Plotly XY", "Mapa de densidad"),
+    ("GeoPandas estático", None),
+]
+MEDIDA_TASA = "Tasa cada 100.000 hab."
+
+# las filas llegan al script por session_state (AppTest corre en el mismo proceso)
+SCRIPT_MAPA = """
+import streamlit as st
+from app.utils import maps
+maps.page_mapa(st.session_state["filas_benchmark"])
+"""
+
+
+def _tamaño(salida):
+    """Filas de un DataFrame/Series (o un conteo ya calculado) o puntos de una figura de Plotly."""
+    if isinstance(getattr(salida, "data", None), tuple):
+        total = 0
+        for traza in salida.data:
+            valores = next((getattr(traza, c, None) for c in ("x", "values", "lat")
+                            if getattr(traza, c, None) is not None), ())
+            total += len(valores)
+        return total
+    if hasattr(salida, "shape"):
+        return len(salida)
+    return salida if isinstance(salida, int) else None
+
+
+def medir(funcion, repeticiones=3, memoria=True, silencioso=True):
+    """
+    Corre `funcion` `repeticiones` veces midiendo el tiempo y, con `memoria`,
+    una vez más con tracemalloc. Devuelve (métricas, salida de la última corrida).
+    """
+    salida_std = contextlib.redirect_stdout(io.StringIO()) if silencioso else contextlib.nullcontext()
+    tiempos = []
+    with salida_std:
+        for _ in range(repeticiones):
+            gc.collect()
+            t0 = time.perf_counter()
+            salida = funcion()
+            tiempos.append(time.perf_counter() - t0)
+        pico = None
+        if memoria:
+            gc.collect()
+            tracemalloc.start()
+            funcion()
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    metricas = {
+        "segundos": round(min(tiempos), 4),
+        "mediana": round(statistics.median(tiempos), 4),
+        "tiempos": [round(t, 4) for t in tiempos],
+        "pico_mb": round(pico / 1e6, 1) if pico is not None else None,
+    }
+    return metricas, salida
+
+
+def preparar_directorio(directorio, filas, seed):
+    """Directorio de trabajo con data/ (mappings, geometrías y CSV sintético)."""
+    from benchmarks.sintetico import escribir_csv
+    from app.utils.preprocess import INPUT
+
+    directorio = Path(directorio)
+    data = directorio / "data"
+    data.mkdir(parents=True, exist_ok=True)
+    for patron in ARCHIVOS_DATA:
+        for path in (RAIZ / "data").glob(patron):
+            shutil.copy2(path, data / path.name)  # conserva el mtime: el WGS84 sigue vigente
+
+    csv = directorio / INPUT
+    marca = data / "sintetico.json"
+    parametros = {"filas": filas, "seed": seed}
+    if not (csv.exists() and marca.exists() and json.loads(marca.read_text()) == parametros):
+        print(f"🧪 Generando {filas:,} hechos sintéticos (seed {seed})...")
+        escribir_csv(csv, filas, seed)
+        marca.write_text(json.dumps(parametros))
+    return directorio
+
+
+def _pagina_comparacion():
+    spec = importlib.util.spec_from_file_location("pagina_comparacion", RAIZ / "pages" / "4_Comparación.py")
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def casos_preprocess(filas):
+    import pyarrow.parquet as pq
+
+    from app.utils import preprocess
+
+    def correr(chunksize=None):
+        preprocess.main(chunksize=chunksize)
+        return pq.ParquetFile(preprocess.OUT_PARQUET).metadata.num_rows
+
+    # en chunks primero: la corrida en memoria deja el parquet y los cubos finales
+    yield "preprocess.main (chunks 200k)", filas, lambda: correr(200_000)
+    yield "preprocess.main", filas, correr
+
+
+def casos_loader(filas):
+    from app.utils.loader import load_data
+
+    ultimo = max(int(a) for a in load_data.__wrapped__()["año"].dropna().unique())
+    yield "loader.load_data", filas, lambda: load_data.__wrapped__()
+    yield f"loader.load_data (año {ultimo})", filas, lambda: load_data.__wrapped__(años=(ultimo,))
+
+
+def casos_charts(filas):
+    from app.utils.charts import plot_barrios, plot_evolucion
+    from app.utils.loader import leer_rollup, load_data
+
+    df = load_data.__wrapped__()
+    cubo = leer_rollup("año_mes_barrio")
+    yield "charts.plot_barrios (filas)", len(df), lambda: plot_barrios(df)
+    yield "charts.plot_evolucion (filas)", len(df), lambda: plot_evolucion(df)
+    if cubo is not None:
+        yield "charts.plot_barrios (cubo)", len(cubo), lambda: plot_barrios(cubo)
+        yield "charts.plot_evolucion (cubo)", len(cubo), lambda: plot_evolucion(cubo)
+
+
+def casos_comparacion(filas):
+    from app.utils.cube import contar, rollup_para
+    from app.utils.loader import leer_rollup, load_data
+
+    pagina = _pagina_comparacion()
+    figuras = [
+        ("zona", ["zona"], pagina.fig_zona),
+        ("distrito", ["distrito"], pagina.fig_distrito),
+        ("prevenible", ["prevenible"], pagina.fig_prevenible),
+        ("por_año", ["año", "prevenible"], pagina.fig_por_año),
+    ]
+    filas_df = None
+    for nombre, dims, fig in figuras:
+        # como la página: el rollup más chico que alcanza, o las filas si no hay cubos
+        fuente = leer_rollup(rollup_para(dims))
+        etiqueta = "cubo"
+        if fuente is None:
+            filas_df = load_data.__wrapped__() if filas_df is None else filas_df
+            fuente, etiqueta = filas_df, "filas"
+        yield (f"comparacion.conteos[{nombre}] ({etiqueta})", len(fuente),
+               lambda dims=dims, fuente=fuente: contar(fuente, dims))
+        conteos = contar(fuente, dims)
+        yield f"comparacion.fig_{nombre}", len(conteos), lambda fig=fig, conteos=conteos: fig(conteos)
+        if nombre == "distrito":
+            tasa = conteos
+    yield "comparacion.fig_distrito (tasa)", len(tasa), lambda: pagina.fig_distrito(tasa, MEDIDA_TASA)
+
+
+def casos_mapas(filas):
+    from streamlit.testing.v1 import AppTest
+
+    from app.utils.loader import load_data
+
+    df = load_data.__wrapped__()
+    at = AppTest.from_string(SCRIPT_MAPA, default_timeout=600)
+    at.session_state["filas_benchmark"] = df
+    at.run()
+    for opcion, subopcion in MODOS_MAPA:
+        next(r for r in at.radio if r.label == "Selecciona el tipo de mapa:").set_value(opcion)
+        at.run()
+        if subopcion is not None:
+            next(s for s in at.selectbox if s.label == "Modo de visualización").set_value(subopcion)
+            at.run()
+        nombre = f"maps.page_mapa[{opcion} / {subopcion}]" if subopcion else f"maps.page_mapa[{opcion}]"
+
+        def correr(at=at):
+            at.run()
+            return at
+
+        yield nombre, len(df), correr
+
+
+def casos_geometria(filas):
+    import folium
+
+    from app.utils import maps
+    from app.utils.geodata import NIVELES_DETALLE, construir_faltantes, distritos_nivel, distritos_wgs84
+
+    # las páginas sólo leen la geometría: se construye acá si falta
+    construir_faltantes()
+    completa = distritos_wgs84()
+    yield "geometria.distritos[completa]", len(completa["features"]), lambda: json.dumps(completa)
+    for nivel in NIVELES_DETALLE:
+        coleccion = distritos_nivel(nivel)
+        yield f"geometria.distritos[{nivel}]", len(coleccion["features"]), lambda c=coleccion: json.dumps(c)
+
+    for zoom in (11, 13, 15):
+        def mapa(zoom=zoom):
+            m = folium.Map(location=maps.CENTRO_CORDOBA, zoom_start=zoom)
+            maps._capas_distritos(m, zoom)
+            return m.get_root().render()
+
+        yield f"geometria.mapa_folium[zoom {zoom}]", len(completa["features"]), mapa
+
+
+CASOS = {
+    "preprocess": casos_preprocess,
+    "loader": casos_loader,
+    "charts": casos_charts,
+    "comparacion": casos_comparacion,
+    "mapas": casos_mapas,
+    "geometria": casos_geometria,
+}
+
+
+def _commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=RAIZ, check=True).stdout.strip()
+        sucio = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, cwd=RAIZ).stdout.strip())
+        return commit, sucio
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def _versiones():
+    versiones = {}
+    for paquete in ("pandas", "numpy", "pyarrow", "plotly", "folium", "streamlit", "shapely"):
+        try:
+            versiones[paquete] = __import__(paquete).__version__
+        except ImportError:
+            versiones[paquete] = None
+    return versiones
+
+
+def correr(filas, seed=42, grupos=GRUPOS, repeticiones=3, memoria=True, directorio=None, verbose=False):
+    """Corre los grupos pedidos y devuelve el dict de resultados (meta + un registro por caso)."""
+    import os
+
+    directorio = directorio or Path(tempfile.gettempdir()) / "delitos_bench" / f"{filas}_{seed}"
+    directorio = preparar_directorio(directorio, filas, seed)
+    sys.path.insert(0, str(RAIZ))
+    anterior = Path.cwd()
+    os.chdir(directorio)
+
+    commit, sucio = _commit()
+    resultados = {
+        "meta": {
+            "commit": commit,
+            "cambios_sin_commit": sucio,
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "filas": filas,
+            "seed": seed,
+            "repeticiones": repeticiones,
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "versiones": _versiones(),
+        },
+        "resultados": {},
+    }
+    try:
+        from app.utils.cube import OUT_CUBOS
+        from app.utils.preprocess import OUT_PARQUET, main as preprocesar
+
+        if "preprocess" not in grupos and not (OUT_PARQUET.exists() and OUT_CUBOS.exists()):
+            print("🧹 Preprocesando (fuera de la medición)...")
+            with contextlib.redirect_stdout(io.StringIO()):
+                preprocesar()
+
+        for grupo in grupos:
+            print(f"⏱️ {grupo}")
+            # el preprocesamiento es caro: una sola corrida
+            n = 1 if grupo == "preprocess" else repeticiones
+            for nombre, filas_entrada, funcion in CASOS[grupo](filas):
+                metricas, salida = medir(funcion, n, memoria, silencioso=not verbose)
+                registro = {"grupo": grupo, "filas_entrada": filas_entrada,
+                            "filas_salida": _tamaño(salida), **metricas}
+                if grupo == "mapas":
+                    registro["errores"] = [str(e.value)[:200] for e in salida.exception]
+                if grupo == "geometria":
+                    registro["filas_salida"] = None
+                    registro["bytes"] = len(salida.encode("utf-8"))
+                resultados["resultados"][nombre] = registro
+                pico = f"{metricas['pico_mb']:8.1f} MB" if metricas["pico_mb"] is not None else ""
+                peso = f"{registro['bytes'] / 1024:8.1f} kB" if "bytes" in registro else ""
+                aviso = "   ⚠️ con excepciones" if registro.get("errores") else ""
+                print(f"  {nombre:64} {metricas['segundos']:8.3f} s {pico}{peso}{aviso}")
+    finally:
+        os.chdir(anterior)
+    return resultados
+
+
+def comparar(base, nuevo, umbral=10.0):
+    """
+    Tabla de tiempos y memoria de `nuevo` contra `base` (dicts de resultados).
+    Devuelve los casos cuyo tiempo empeoró más de `umbral` %.
+    """
+    print(f"base:  {base['meta'].get('commit')} ({base['meta']['filas']:,} filas, {base['meta']['fecha']})")
+    print(f"nuevo: {nuevo['meta'].get('commit')} ({nuevo['meta']['filas']:,} filas, {nuevo['meta']['fecha']})")
+    if base["meta"]["filas"] != nuevo["meta"]["filas"] or base["meta"]["seed"] != nuevo["meta"]["seed"]:
+        print("⚠️ Las corridas usan datos distintos (filas/seed): la comparación es orientativa.")
+    print(f"{'caso':64}{'base s':>10}{'nuevo s':>10}{'Δ%':>8}{'Δ MB':>9}")
+    regresiones = []
+    for nombre, r in nuevo["resultados"].items():
+        b = base["resultados"].get(nombre)
+        if b is None:
+            print(f"{nombre:64}{'-':>10}{r['segundos']:>10.3f}   (nuevo)")
+            continue
+        delta = (r["segundos"] / b["segundos"] - 1) * 100 if b["segundos"] else 0.0
+        memoria = (f"{r['pico_mb'] - b['pico_mb']:>+9.1f}"
+                   if r.get("pico_mb") is not None and b.get("pico_mb") is not None else f"{'':>9}")
+        marca = "  ⚠️" if delta > umbral else ""
+        print(f"{nombre:64}{b['segundos']:>10.3f}{r['segundos']:>10.3f}{delta:>+8.0f}{memoria}{marca}")
+        if delta > umbral:
+            regresiones.append(nombre)
+    print(f"{len(regresiones)} casos más de {umbral:.0f}% más lentos.")
+    return regresiones
+
+
+def main():
+    from benchmarks.sintetico import parsear_filas
+
+    parser = argparse.ArgumentParser(description="Suite de benchmarks sobre datos sintéticos.")
+    parser.add_argument("--filas", default="100k", help="100k, 1M, 10M o un entero")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--solo", default=",".join(GRUPOS), help=f"grupos separados por coma ({', '.join(GRUPOS)})")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--sin-memoria", action="store_true", help="no hacer la corrida extra con tracemalloc")
+    parser.add_argument("--directorio", default=None, help="directorio de trabajo (por defecto, en el temporal del sistema)")
+    parser.add_argument("--salida", default=None, help="JSON de resultados (por defecto benchmarks/resultados/<commit>_<filas>.json)")
+    parser.add_argument("--verbose", action="store_true", help="mostrar la salida de las funciones medidas")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NUEVO"), help="comparar dos JSON de resultados")
+    parser.add_argument("--umbral", type=float, default=10.0, help="%% de tiempo a partir del cual se marca una regresión")
+    args = parser.parse_args()
+
+    if args.comparar:
+        base, nuevo = (json.loads(Path(p).read_text(encoding="utf-8")) for p in args.comparar)
+        sys.exit(1 if comparar(base, nuevo, args.umbral) else 0)
+
+    grupos = [g.strip() for g in args.solo.split(",") if g.strip()]
+    desconocidos = set(grupos) - set(GRUPOS)
+    if desconocidos:
+        parser.error(f"grupos desconocidos: {', '.join(sorted(desconocidos))}")
+    filas = parsear_filas(args.filas)
+
+    resultados = correr(filas, args.seed, grupos, args.repeticiones, not args.sin_memoria,
+                        args.directorio, args.verbose)
+
+    salida = Path(args.salida) if args.salida else (
+        RESULTADOS / f"{resultados['meta']['commit'] or 'sin_commit'}_{args.filas}.json"
+    )
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(resultados, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"✅ Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,12 @@
 import streamlit as st
-from app.utils.loader import load_data
-from app.dashboard import charts
+from app.dashboard import charts, sidebar
+from app.utils import perf
 
-st.title("🏘️ Comparación de Delitos por Barrios")
+with perf.rerun("Barrios"):
+    st.title("🏘️ Comparación de Delitos por Barrios")
 
-# Cargar datos
-df = load_data()
+    # Filtros + carga de datos (sólo los años elegidos; cubo de conteos si existe)
+    filtro, años, barrios = sidebar.render(agregado=True, dimensiones=["barrio"])
 
-# Filtros
-años = st.sidebar.multiselect("Año", sorted(df["año"].unique()), default=df["año"].unique())
-barrios = st.sidebar.multiselect("Barrio", df["barrio"].unique())
-
-# Filtrado
-filtro = df[df["año"].isin(años)]
-if barrios:
-    filtro = filtro[filtro["barrio"].isin(barrios)]
-
-# Gráfico
-charts.plot_barrios_chart(filtro)
+    # Gráfico
+    charts.plot_barrios_chart(filtro, clave=(tuple(años), tuple(barrios)))
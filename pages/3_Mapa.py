@@ -1,16 +1,16 @@
 import streamlit as st
-from app.utils.loader import load_data
-from app.utils import maps
+from app.utils.loader import load_filas
+from app.utils import maps, perf
+from app.dashboard import sidebar
 
-st.title("🗺️ Mapa de Delitos en Córdoba")
+with perf.rerun("Mapa"):
+    st.title("🗺️ Mapa de Delitos en Córdoba")
 
-# Cargar datos
-df = load_data()
+    # --- Filtros ---
+    años = sidebar.render_años("Filtros de Comparación")
 
-# --- Filtros ---
-st.sidebar.header("Filtros de Comparación")
-años = st.sidebar.multiselect("Año", sorted(df["año"].unique()), default=df["año"].unique())
-filtro = df[df["año"].isin(años)]
+    # Cargar datos (sólo los años elegidos)
+    filtro = load_filas(años)
 
-# Mostrar página de mapa
-maps.page_mapa(filtro)
+    # Mostrar página de mapa
+    maps.page_mapa(filtro, clave=tuple(años), años=años)
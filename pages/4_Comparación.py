@@ -1,48 +1,85 @@
 # pages/1_Comparacion.py
 import streamlit as st
 import pandas as pd
-from app.utils.loader import load_data
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from functools import cache
+from app.utils.loader import load_agregado, load_backend, load_cubo, load_filas
+from app.utils.cube import contar
+from app.utils.queries import tabla_conteos as valores
+from app.utils.perf import medido, rerun
+from app.utils.rates import MEDIDAS
+from app.dashboard import sidebar
+from app.dashboard.charts import mostrar_figura
 
+@rerun("Comparación")
 def run():
     st.title("📊 Comparación de Delitos")
 
-    # --- Cargar datos ---
-    df = load_data()
-
     # --- Filtros ---
-    st.sidebar.header("Filtros de Comparación")
-    años = st.sidebar.multiselect("Año", sorted(df["año"].unique()), default=df["año"].unique())
-    filtro = df[df["año"].isin(años)]
+    años = sidebar.render_años("Filtros de Comparación")
+    medida = st.sidebar.radio("Medida", list(MEDIDAS))
+
+    # --- Cargar datos (sólo los años elegidos): rollup de conteos, o filas si no hay cubos ---
+    # Se cargan recién si algún gráfico no está en la caché en disco
+    @cache
+    def filas():
+        return load_filas(años, columnas=["año", "zona", "distrito", "prevenible"])
+
+    # Conteos agregados, una vez por dimensión: cambiar de medida sólo los divide
+    @cache
+    def conteos(*dims):
+        if load_backend() is not None:
+            # backend SQL: la base filtra y agrupa, sólo vuelven los conteos
+            return contar(load_agregado(dims, tuple(años)), list(dims))
+        fuente = load_cubo(dims, años=tuple(años))
+        return contar(fuente if fuente is not None else filas(), list(dims))
+
+    clave = ("comparacion", tuple(años), medida)
 
     # --- Agrupación por zona ---
     st.subheader("Delitos por Zona")
-    if "zona" in filtro.columns:
-        zona_counts = filtro.groupby("zona")["id"].count().reset_index().sort_values("id", ascending=False)
-        fig_zona = px.bar(zona_counts, x="zona", y="id", text="id", labels={"id": "Cantidad de hechos"})
-        st.plotly_chart(fig_zona, use_container_width=True)
+    mostrar_figura(lambda: fig_zona(conteos("zona"), medida), (*clave, "zona"))
 
     # --- Agrupación por distrito ---
     st.subheader("Delitos por Distrito")
-    if "distrito" in filtro.columns:
-        distrito_counts = filtro.groupby("distrito")["id"].count().reset_index().sort_values("id", ascending=False)
-        fig_distrito = px.bar(distrito_counts, x="distrito", y="id", text="id", labels={"id": "Cantidad de hechos"})
-        st.plotly_chart(fig_distrito, use_container_width=True)
+    mostrar_figura(lambda: fig_distrito(conteos("distrito"), medida), (*clave, "distrito"))
 
     # --- Agrupación por tipo de hecho ---
     st.subheader("Delitos por Tipo de Hecho")
-    if "prevenible" in filtro.columns:
-        prevenible_counts = filtro.groupby("prevenible")["id"].count().reset_index().sort_values("id", ascending=True)
-        fig_prevenible = px.pie(prevenible_counts, names="prevenible", values="id", hole=0.4, hover_data=["id"])
-        st.plotly_chart(fig_prevenible, use_container_width=True)
+    mostrar_figura(lambda: fig_prevenible(conteos("prevenible"), medida), (*clave, "prevenible"))
 
     # --- Comparación temporal ---
     st.subheader("Comparación Temporal de Delitos")
+    mostrar_figura(lambda: fig_por_año(conteos("año", "prevenible"), medida), (*clave, "por_año"))
+
+@medido("comparacion.fig_zona", "figura")
+def fig_zona(conteos, medida="Cantidad de hechos"):
+    import plotly.express as px
+    zona_counts = valores(conteos, medida, "zona").sort_values("id", ascending=False)
+    return px.bar(zona_counts, x="zona", y="id", text="id", labels={"id": medida})
+
+@medido("comparacion.fig_distrito", "figura")
+def fig_distrito(conteos, medida="Cantidad de hechos"):
+    import plotly.express as px
+    distrito_counts = valores(conteos, medida, "distrito").sort_values("id", ascending=False)
+    return px.bar(distrito_counts, x="distrito", y="id", text="id", labels={"id": medida})
+
+@medido("comparacion.fig_prevenible", "figura")
+def fig_prevenible(conteos, medida="Cantidad de hechos"):
+    import plotly.express as px
+    prevenible_counts = valores(conteos, medida, "prevenible").sort_values("id", ascending=True)
+    return px.pie(prevenible_counts, names="prevenible", values="id", hole=0.4, hover_data=["id"],
+                  labels={"id": medida})
+
+@medido("comparacion.fig_por_año", "figura")
+def fig_por_año(conteos, medida="Cantidad de hechos"):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    # conteos por año y tipo (ya agregados), en la medida elegida
+    por_año = valores(conteos, medida, "año")
 
     # años únicos en el dataset filtrado
-    años = sorted(filtro["año"].unique())
+    años = sorted(por_año["año"].unique())
 
     # calculamos las filas y columnas para los subplots (ejemplo: 3 columnas)
     cols = 3
@@ -60,11 +97,8 @@ def run():
         row = i // cols + 1
         col = i % cols + 1
         
-        año_data = filtro[filtro["año"] == año]
         prevenible_counts = (
-            año_data.groupby("prevenible")["id"]
-            .count()
-            .reset_index()
+            por_año[por_año["año"] == año]
             .sort_values("id", ascending=False)
         )
         
@@ -79,8 +113,7 @@ def run():
         showlegend=False,
         height=400 * rows,  # escala el alto según cantidad de filas
     )
-
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 if __name__ == "__main__":
     run()
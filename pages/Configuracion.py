@@ -0,0 +1,149 @@
+# pages/Configuracion.py
+import time
+import numpy as np
+import pandas as pd
+import streamlit as st
+from app.utils import perf
+
+ETIQUETAS_MEMORIA = {"rss": "RSS del proceso (barato)", "tracemalloc": "tracemalloc (preciso, más lento)"}
+
+def run():
+    st.title("⚙️ Configuración y rendimiento")
+
+    # --- Instrumentación (vale para todo el proceso, no sólo esta sesión) ---
+    config = perf.configurar()
+    st.sidebar.header("Instrumentación")
+    activo = st.sidebar.toggle("Medir las páginas", value=config["activo"])
+    memoria = st.sidebar.radio(
+        "Memoria", perf.MODOS_MEMORIA, index=perf.MODOS_MEMORIA.index(config["memoria"]),
+        format_func=ETIQUETAS_MEMORIA.get,
+    )
+    perf.configurar(activo=activo, memoria=memoria)
+
+    # cProfile es por sesión; la clave no es de un widget para que sobreviva al cambiar de página
+    st.session_state["perf_cprofile"] = st.sidebar.checkbox(
+        "Perfilar cada corrida con cProfile", value=st.session_state.get("perf_cprofile", False)
+    )
+    en_vivo = st.sidebar.toggle("Actualizar en vivo (cada 2 s)", value=False)
+    if st.sidebar.button("Vaciar mediciones"):
+        perf.registro().vaciar()
+    if st.sidebar.button("Exportar métricas ahora"):
+        path = perf.registro().exportar(forzar=True)
+        if path is not None:
+            st.sidebar.success(f"Métricas escritas en {path}")
+
+    if en_vivo:
+        st.fragment(run_every="2s")(panel)()
+    else:
+        panel()
+
+def panel():
+    reruns, acumulados = perf.registro().instantanea()
+    if not reruns:
+        st.info("Todavía no hay corridas medidas: abrí alguna página del dashboard y volvé acá.")
+        return
+
+    # --- Últimas corridas ---
+    st.subheader("Últimas corridas")
+    st.dataframe(tabla_corridas(reruns), width="stretch", hide_index=True)
+
+    etiquetas = [
+        f"{time.strftime('%H:%M:%S', time.localtime(r['inicio']))} · {r['pagina']} · {r['segundos']:.2f} s"
+        for r in reruns
+    ]
+    elegida = reruns[st.selectbox("Corrida", range(len(reruns)), format_func=etiquetas.__getitem__)]
+
+    # --- Desglose de la corrida elegida ---
+    st.subheader(f"¿En qué se fue el tiempo? ({elegida['pagina']}, {elegida['segundos']:.2f} s)")
+    st.plotly_chart(fig_desglose(elegida), width="stretch")
+    st.dataframe(tabla_mediciones(elegida), width="stretch", hide_index=True)
+    st.caption(
+        "Propio: sin las mediciones anidadas. Memoria: variación del RSS del proceso o pico de "
+        "tracemalloc, según el modo elegido; con varias sesiones a la vez es aproximada."
+    )
+
+    if elegida["perfil"]:
+        with st.expander("cProfile de la corrida (40 funciones con más tiempo acumulado)"):
+            st.code(elegida["perfil"], language="text")
+            if elegida["perfil_path"] is not None and elegida["perfil_path"].exists():
+                st.download_button(
+                    "Descargar .prof (snakeviz / pstats)", elegida["perfil_path"].read_bytes(),
+                    file_name=elegida["perfil_path"].name,
+                )
+
+    # --- Acumulados del proceso ---
+    st.subheader("Acumulado por función (todas las sesiones)")
+    st.dataframe(tabla_acumulados(acumulados), width="stretch", hide_index=True)
+
+    st.caption(
+        f"Log rotativo: {perf.PERF_DIR / 'perf.log'} · "
+        f"Prometheus (textfile): {perf.PERF_DIR / 'metrics.prom'}"
+    )
+    with st.expander("Métricas en formato Prometheus"):
+        st.code(perf.registro().prometheus(), language="text")
+
+def tabla_corridas(reruns):
+    filas = []
+    for r in reruns:
+        por_categoria = desglose(r)
+        filas.append({
+            "hora": time.strftime("%H:%M:%S", time.localtime(r["inicio"])),
+            "página": r["pagina"],
+            "sesión": (r["sesion"] or "-")[:8],
+            "segundos": round(r["segundos"], 3),
+            "mayor parte": por_categoria.idxmax() if len(por_categoria) else "-",
+            "mediciones": len(r["mediciones"]),
+            "cProfile": "✓" if r["perfil"] else "",
+        })
+    return pd.DataFrame(filas)
+
+def desglose(corrida):
+    """Segundos propios por categoría; lo no medido (Streamlit, widgets) va a 'otros'."""
+    mediciones = pd.DataFrame(corrida["mediciones"], columns=["categoria", "propio"])
+    por_categoria = mediciones.groupby(mediciones["categoria"].fillna("otros"))["propio"].sum()
+    sin_medir = corrida["segundos"] - por_categoria.sum()
+    por_categoria["otros"] = por_categoria.get("otros", 0.0) + max(sin_medir, 0.0)
+    return por_categoria.sort_values(ascending=False)
+
+def tabla_mediciones(corrida):
+    filas = []
+    for m in sorted(corrida["mediciones"], key=lambda m: m["inicio"]):
+        filas.append({
+            "medición": "   " * m["nivel"] + m["nombre"],
+            "categoría": m["categoria"],
+            "segundos": round(m["segundos"], 4),
+            "propio": round(m["propio"], 4),
+            "% corrida": round(100 * m["propio"] / corrida["segundos"], 1) if corrida["segundos"] else None,
+            "filas entrada": m["filas_entrada"],
+            "filas salida": m["filas_salida"],
+            "memoria MB": round(m["memoria"] / 1e6, 2) if m["memoria"] is not None else None,
+        })
+    return pd.DataFrame(filas)
+
+def tabla_acumulados(acumulados):
+    filas = []
+    for nombre, a in acumulados.items():
+        muestras = np.array(a["muestras"]) * 1000
+        filas.append({
+            "medición": nombre,
+            "categoría": a["categoria"],
+            "llamadas": a["llamadas"],
+            "total s": round(a["segundos"], 3),
+            "propio s": round(a["propio"], 3),
+            "p50 ms": round(float(np.percentile(muestras, 50)), 1),
+            "p95 ms": round(float(np.percentile(muestras, 95)), 1),
+            "máx s": round(a["max"], 3),
+            "filas salida": a["filas_salida"],
+            "memoria máx MB": round(a["memoria_max"] / 1e6, 1) if a["memoria_max"] is not None else None,
+        })
+    return pd.DataFrame(filas).sort_values("total s", ascending=False)
+
+def fig_desglose(corrida):
+    import plotly.express as px
+    por_categoria = desglose(corrida).rename_axis("categoría").reset_index(name="segundos")
+    fig = px.bar(por_categoria, x="segundos", y="categoría", orientation="h", text_auto=".3f")
+    fig.update_layout(height=80 + 40 * len(por_categoria), yaxis={"categoryorder": "total ascending"})
+    return fig
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,126 @@
+# pages/Tendencias.py
+import streamlit as st
+from app.utils.filters import apply_filters
+from app.utils.loader import load_cubo, load_filas, version_datos
+from app.utils.perf import medido, rerun
+from app.utils.trends import DIAS_SEMANA, VENTANAS, tendencias
+from app.dashboard import sidebar
+
+COLUMNAS = ["fecha_hora", "hora", "weekday", "zona", "distrito", "prevenible"]
+DIMENSIONES = {"Zona": "zona", "Distrito": "distrito", "Tipo de hecho": "prevenible"}
+
+@st.cache_data(max_entries=64)
+def opciones(version, años, dimension):
+    """Valores de `dimension` en los años elegidos, del rollup año × dimensión (o de las filas si no hay)."""
+    fuente = load_cubo([dimension], años=años)
+    if fuente is None:
+        fuente = load_filas(list(años), columnas=[dimension])
+    return sorted(fuente[dimension].dropna().unique())
+
+@st.cache_data
+@medido("tendencias.calcular", "agregacion")
+def calcular(version, años, dimension, valores):
+    """Resultados del motor de tendencias, en caché por versión de los datos y combinación de filtros."""
+    filas = load_filas(list(años), columnas=COLUMNAS)
+    filas = apply_filters(filas, {dimension: list(valores) or None})
+    return tendencias(filas, dimension)
+
+@rerun("Tendencias")
+def run():
+    st.title("📈 Tendencias Temporales")
+
+    # --- Filtros ---
+    años = sidebar.render_años("Filtros de Tendencias")
+    etiqueta = st.sidebar.radio("Segmentar por", list(DIMENSIONES))
+    dimension = DIMENSIONES[etiqueta]
+    version = version_datos()
+    valores = st.sidebar.multiselect(etiqueta, opciones(version, tuple(años), dimension))
+
+    resultado = calcular(version, tuple(años), dimension, tuple(valores))
+    if not len(resultado["diarios"]):
+        st.info("No hay hechos con fecha para los filtros elegidos.")
+        return
+
+    # --- Hora del día x día de semana ---
+    st.subheader("Hechos por hora y día de semana")
+    st.plotly_chart(fig_hora_dia(resultado["hora_dia"]), use_container_width=True)
+
+    # --- Sumas móviles ---
+    st.subheader("Hechos en ventanas móviles")
+    st.plotly_chart(fig_moviles(resultado["moviles"]), use_container_width=True)
+    if resultado["moviles_por_grupo"] is not None:
+        st.subheader(f"Hechos en {VENTANAS[-1]} días por {etiqueta.lower()}")
+        st.plotly_chart(fig_por_grupo(resultado["moviles_por_grupo"], valores), use_container_width=True)
+
+    # --- Variación interanual ---
+    st.subheader("Variación interanual por mes")
+    interanual = resultado["interanual"]
+    if interanual["año_anterior"].notna().any():
+        st.plotly_chart(fig_interanual(interanual), use_container_width=True)
+    else:
+        st.info("Se necesita más de un año de datos para comparar contra el año anterior.")
+
+    # --- Descomposición estacional ---
+    st.subheader("Descomposición estacional (mensual)")
+    descomposicion = resultado["descomposicion"]
+    if "tendencia" in descomposicion.columns:
+        st.plotly_chart(fig_descomposicion(descomposicion), use_container_width=True)
+    else:
+        st.info("Se necesitan al menos 24 meses de datos para la descomposición estacional.")
+
+@medido("tendencias.fig_hora_dia", "figura")
+def fig_hora_dia(matriz):
+    import plotly.express as px
+    fig = px.imshow(
+        matriz, x=DIAS_SEMANA, y=matriz.index, aspect="auto", color_continuous_scale="Reds",
+        labels={"x": "Día", "y": "Hora", "color": "Hechos"},
+    )
+    fig.update_yaxes(autorange="reversed", dtick=2)
+    return fig
+
+@medido("tendencias.fig_moviles", "figura")
+def fig_moviles(moviles):
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    for dias, serie in moviles.items():
+        fig.add_trace(go.Scatter(x=serie.index, y=serie.iloc[:, 0], mode="lines", name=f"Últimos {dias} días"))
+    fig.update_layout(xaxis_title="Fecha", yaxis_title="Cantidad de hechos", hovermode="x unified")
+    return fig
+
+@medido("tendencias.fig_por_grupo", "figura")
+def fig_por_grupo(moviles, valores, maximo=10):
+    import plotly.graph_objects as go
+    # sin selección, los grupos con más hechos
+    columnas = [v for v in valores if v in moviles.columns] or list(moviles.sum().nlargest(maximo).index)
+    fig = go.Figure()
+    for columna in columnas:
+        fig.add_trace(go.Scatter(x=moviles.index, y=moviles[columna], mode="lines", name=str(columna)))
+    fig.update_layout(xaxis_title="Fecha", yaxis_title="Cantidad de hechos", hovermode="x unified")
+    return fig
+
+@medido("tendencias.fig_interanual", "figura")
+def fig_interanual(interanual):
+    import plotly.express as px
+    datos = interanual.dropna(subset=["año_anterior"]).reset_index()
+    datos["mes"] = datos["mes"].astype(str)
+    fig = px.bar(
+        datos, x="mes", y="diferencia", hover_data=["hechos", "año_anterior", "variacion_%"],
+        labels={"mes": "Mes", "diferencia": "Diferencia vs. año anterior"},
+    )
+    fig.update_traces(marker_color=["#d62728" if d > 0 else "#2ca02c" for d in datos["diferencia"]])
+    return fig
+
+@medido("tendencias.fig_descomposicion", "figura")
+def fig_descomposicion(descomposicion):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    componentes = ["observado", "tendencia", "estacional", "residuo"]
+    fig = make_subplots(rows=4, cols=1, shared_xaxes=True, subplot_titles=[c.capitalize() for c in componentes])
+    x = descomposicion.index.to_timestamp()
+    for i, componente in enumerate(componentes, start=1):
+        fig.add_trace(go.Scatter(x=x, y=descomposicion[componente], mode="lines", name=componente), row=i, col=1)
+    fig.update_layout(showlegend=False, height=800)
+    return fig
+
+if __name__ == "__main__":
+    run()